@@ -3,6 +3,7 @@
 #ifndef ZHONGQIANGREN_BASIC_DEBUG_H_
 #define ZHONGQIANGREN_BASIC_DEBUG_H_
 
+#include <chrono>
 #include <ctime>
 #include <iostream>
 
@@ -28,6 +29,40 @@ protected:
   std::clock_t start_ ;
 };
 
+/**
+ * @brief Like SimpleTimer, but measures elapsed (wall) time, e.g. of work spread over several threads,
+ * for which SimpleTimer would add up the CPU time of all threads.
+ */
+class WallTimer : public SimpleTimer {
+public:
+  WallTimer() {};
+  virtual ~WallTimer() {};
+  virtual int Start() override {
+    this->wall_start_ = std::chrono::steady_clock::now();
+    return 0; // normal
+  };
+  virtual double GetDurationSecond() override {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - this->wall_start_).count();
+  };
+protected:
+  std::chrono::steady_clock::time_point wall_start_ ;
+};
+
+/**
+ * @brief Adds the wall time from its construction to its destruction to *total (in seconds),
+ * e.g. to sum up the time spent in a function that is called many times.
+ */
+class ScopedTimer {
+public:
+  ScopedTimer(double* total) : total_(total), start_(std::chrono::steady_clock::now()) {};
+  ~ScopedTimer() {
+    *total_ += std::chrono::duration<double>(std::chrono::steady_clock::now() - start_).count();
+  };
+protected:
+  double* total_;
+  std::chrono::steady_clock::time_point start_;
+};
+
 
 
 }
@@ -0,0 +1,156 @@
+/*******************************************
+ * About: Frontiers of EMOA* and ext-BOA*-lex, i.e. the non-dominated costs of the labels expanded
+ *        at a vertex, with several data structures for the dominance checks, selectable at run time.
+ * Author: Denis Derkach
+ *******************************************/
+
+
+#ifndef ZHONGQIANGREN_SEARCH_FRONTIER_H_
+#define ZHONGQIANGREN_SEARCH_FRONTIER_H_
+
+#include "avltree.hpp"
+
+#include <memory>
+#include <string>
+#include <unordered_set>
+#include <vector>
+
+namespace rzq{
+namespace search{
+
+/**
+ * @brief The frontier interface. The labels are added in lexicographic order of f, so the first cost of
+ * the labels added before is never larger and the costs are compared on all but the first component.
+ * All implementations give the same answers, only the time (and n_check) differ.
+ */
+class ParetoFrontier {
+public:
+  virtual ~ParetoFrontier() {};
+  /**
+   * @brief return true if g is weakly dominated by the cost of a label in the frontier.
+   */
+  virtual bool Check(const std::vector<double>& g) = 0;
+  /**
+   * @brief add label id with cost g, removing the labels g weakly dominates.
+   */
+  virtual void Update(const std::vector<double>& g, long id) = 0;
+  /**
+   * @brief number of labels in the frontier.
+   */
+  virtual size_t Size() const = 0;
+  /**
+   * @brief estimated number of bytes held by the frontier, in O(1).
+   */
+  virtual size_t Bytes() const = 0;
+  std::vector<long> label_ids; // all labels added, in the order they were added.
+  long n_check = 0; // number of cost vectors (or bounding boxes) compared, see n_domCheck.
+};
+
+/**
+ * @brief The AVL-tree frontier of EMOA* (the default of EMOA*): the projected costs in an AVL-tree
+ * ordered lexicographically, rebuilt when labels are removed.
+ */
+class TreeFrontier : public basic::AVLTree< std::vector<double> >, public ParetoFrontier {
+public:
+  TreeFrontier();
+  virtual ~TreeFrontier();
+  virtual bool Check(const std::vector<double>& g) override ;
+  virtual void Update(const std::vector<double>& g, long id) override ;
+  virtual size_t Size() const override ;
+  virtual size_t Bytes() const override ;
+
+// protected:
+  // project the 3d vector to 2d vector by removing the first component.
+  virtual std::vector<double> _p(const std::vector<double>& v);
+
+  virtual void Filter(const std::vector<double>& v) ;
+  virtual void _rebuildTree(std::unordered_set<long> *skip_node);
+protected:
+  virtual basic::AVLNode* _filter(basic::AVLNode* n, const std::vector<double>& k, std::unordered_set<long> *a = NULL);
+  virtual basic::AVLNode* _rebuildTreeMethod(std::vector<long> &tree_node_ids, long start, long end);
+  virtual void _verifyNonDom(std::vector<long>&);
+  virtual bool _check(basic::AVLNode* n, const std::vector<double>& k) ; // new impl @2021-08-31
+};
+
+/**
+ * @brief The frontier of ext-BOA*-lex (its default): the costs in a vector sorted in decreasing
+ * lexicographic order of their projection, checked one by one on all components.
+ */
+class LexListFrontier : public ParetoFrontier {
+public:
+  virtual bool Check(const std::vector<double>& g) override ;
+  virtual void Update(const std::vector<double>& g, long id) override ;
+  virtual size_t Size() const override ;
+  virtual size_t Bytes() const override ;
+protected:
+  std::vector< std::vector<double> > _costs;
+};
+
+/**
+ * @brief The projected costs packed in one array (d values per label), sorted by their first component,
+ * so a check scans only the labels whose first component is not larger and compares the d values of each
+ * without branches.
+ */
+class FlatFrontier : public ParetoFrontier {
+public:
+  virtual bool Check(const std::vector<double>& g) override ;
+  virtual void Update(const std::vector<double>& g, long id) override ;
+  virtual size_t Size() const override ;
+  virtual size_t Bytes() const override ;
+protected:
+  // index of the first label whose first component is larger than (or, if equal, not smaller than) x.
+  size_t _bound(double x, bool equal) const ;
+  size_t _d = 0;
+  std::vector<double> _keys; // _d values per label.
+};
+
+/**
+ * @brief An ND-tree (Jaszkiewicz and Lust, 2018) of the projected costs: every node keeps the ideal and the
+ * nadir point of the costs below it, so that a check or a filter skips (or settles) a whole sub-tree when
+ * the cost is not dominated by its ideal point (or dominated by its nadir point).
+ * A leaf holding more than leaf_size costs is split at the median of its widest component.
+ */
+class NDTreeFrontier : public ParetoFrontier {
+public:
+  NDTreeFrontier(size_t leaf_size = 16) ;
+  virtual ~NDTreeFrontier() ;
+  virtual bool Check(const std::vector<double>& g) override ;
+  virtual void Update(const std::vector<double>& g, long id) override ;
+  virtual size_t Size() const override ;
+  virtual size_t Bytes() const override ;
+protected:
+  struct Node {
+    std::vector<double> ideal; // component-wise min of the costs below.
+    std::vector<double> nadir; // component-wise max of the costs below.
+    std::vector<double> keys; // leaf only, _d values per cost.
+    Node* child[2] = {NULL, NULL};
+    size_t size = 0; // number of costs below.
+  };
+  NDTreeFrontier(const NDTreeFrontier&) = delete;
+  NDTreeFrontier& operator=(const NDTreeFrontier&) = delete;
+  bool _check(Node* n, const double* v) ;
+  void _filter(Node* n, const double* v) ;
+  void _insert(Node* n, const double* v) ;
+  void _split(Node* n) ;
+  void _bounds(Node* n) ; // recompute the ideal and nadir points of n.
+  void _delete(Node* n) ;
+  size_t _d = 0;
+  size_t _leaf_size;
+  Node* _root = NULL;
+  size_t _num_nodes = 0;
+};
+
+/**
+ * @brief Return true if kind is "avl", "lex", "flat" or "ndtree".
+ */
+bool IsFrontierKind(const std::string& kind) ;
+
+/**
+ * @brief Create an empty frontier of the given kind, see IsFrontierKind.
+ */
+ParetoFrontier* NewFrontier(const std::string& kind) ;
+
+} // end namespace search
+} // end namespace rzq
+
+#endif  // ZHONGQIANGREN_SEARCH_FRONTIER_H_
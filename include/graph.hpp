@@ -11,14 +11,39 @@
 #include <string>
 #include <vector>
 #include <iostream>
+#include <stdint.h>
+#include <atomic>
 // #include "cost_vector.hpp"
 #include "vec_type.hpp"
+#include "mmap_file.hpp"
 
 namespace rzq{
 namespace basic{
 
+#define CSR_GRAPH_MAGIC "EMOACSR1" // first 8 bytes of a binary graph file.
+
 // #define GraphCostType CostVector // always vector-cost, more general
 
+/**
+ * @brief Non-owning view of the arcs leaving (or entering) a vertex of a graph in CSR layout,
+ * the k-th arc leads to Target(k) and its cdim costs start at Cost(k).
+ * Valid as long as the graph it comes from is alive and not modified.
+ */
+struct ArcSpan {
+  const int64_t* targets = NULL;
+  const double* costs = NULL; // cdim values per arc.
+  size_t size = 0;
+  size_t cdim = 0;
+  /**
+   * @brief
+   */
+  long Target(size_t k) const { return long(targets[k]); };
+  /**
+   * @brief the cdim costs of the k-th arc.
+   */
+  const double* Cost(size_t k) const { return costs + k * cdim; };
+};
+
 /**
  * @brief This class is an interface (for planners) to access all directed graphs G=(V,E,C), where
  * V is a vertex set with a long integer ID.
@@ -31,11 +56,21 @@ public:
   /**
    * @brief
    */
-  PlannerGraph() {};
+  PlannerGraph() : _instance_id(_NextInstanceId()) {};
+  /**
+   * @brief a copy is a new graph, with a new InstanceId.
+   */
+  PlannerGraph(const PlannerGraph&) : _instance_id(_NextInstanceId()) {};
+  PlannerGraph& operator=(const PlannerGraph&) { return *this; };
   /**
    * @brief
    */
   virtual ~PlannerGraph() {};
+  /**
+   * @brief an id unique to this graph object within the process, never reused (unlike its address),
+   * e.g. to cache values computed from the graph.
+   */
+  uint64_t InstanceId() const { return _instance_id; };
   /**
    * @brief
    */
@@ -84,6 +119,25 @@ public:
    * @brief 
    */  
   virtual std::vector<long> AllVertex() = 0;
+  /**
+   * @brief true if the graph is stored in CSR layout, then SuccSpan and PredSpan give its arcs without copies.
+   * Planners should prefer them over GetSuccs/GetSuccCosts, which allocate new vectors on every call.
+   */
+  virtual bool HasArcSpans() { return false; };
+  /**
+   * @brief arcs leaving v, empty if HasArcSpans() is false.
+   */
+  virtual ArcSpan SuccSpan(long v) { return ArcSpan(); };
+  /**
+   * @brief arcs entering v, empty if HasArcSpans() is false.
+   */
+  virtual ArcSpan PredSpan(long v) { return ArcSpan(); };
+private:
+  static uint64_t _NextInstanceId() {
+    static std::atomic<uint64_t> next(1);
+    return next++;
+  };
+  uint64_t _instance_id;
 };
 
 /**
@@ -203,6 +257,131 @@ protected:
  */
 std::ostream& operator<<(std::ostream& os, const SparseGraph& c) ;
 
+/**
+ * @brief Storage for the arcs of a vertex of a graph without arc spans, reused across calls.
+ */
+struct ArcBuffer {
+  std::vector<int64_t> targets;
+  std::vector<double> costs;
+};
+
+/**
+ * @brief The arcs leaving v: a view into g if g->HasArcSpans(), otherwise a view of a copy kept in buf.
+ */
+ArcSpan SuccArcs(PlannerGraph* g, long v, ArcBuffer* buf) ;
+
+/**
+ * @brief The arcs entering v, see SuccArcs.
+ */
+ArcSpan PredArcs(PlannerGraph* g, long v, ArcBuffer* buf) ;
+
+/**
+ * @brief Read-only graph in compressed sparse row (CSR) layout, backed by a memory-mapped
+ * binary graph file (see SaveCSRGraph in graph_io.hpp for the file layout), or by its own
+ * arrays when built from another graph (CreateFrom).
+ * Both the forward and the reverse adjacency are stored, with the M costs of each arc
+ * interleaved, so nothing is parsed or copied when the graph is loaded, and the planners
+ * read the arcs of a vertex through ArcSpan views.
+ */
+class CSRGraph: public PlannerGraph
+{
+public:
+  /**
+   * @brief
+   */
+  CSRGraph() ;
+  /**
+   * @brief
+   */
+  virtual ~CSRGraph() ;
+  /**
+   * @brief
+   */
+  virtual bool HasVertex(long v) override ;
+  /**
+   * @brief
+   */
+  virtual bool HasArc(long v, long u) override ;
+  /**
+   * @brief return successors of node v.
+   */
+  virtual std::vector<long> GetSuccs(long v) override ;
+  /**
+   * @brief return predecessors of node v
+   */
+  virtual std::vector<long> GetPreds(long v) override ;
+  /**
+   * @brief Not recommended. For better performance, use GetSuccCosts and GetPredCosts instead.
+   */
+  virtual std::vector<double> GetCost(long u, long v) override ;
+  /**
+   * @brief a vector of all successor costs
+   */
+  virtual std::vector< std::vector<double> > GetSuccCosts(long u) override ;
+  /**
+   * @brief a vector of all predecessor costs
+   */
+  virtual std::vector< std::vector<double> > GetPredCosts(long u) override ;
+  /**
+   * @brief
+   */
+  virtual size_t NumVertex() override ;
+  /**
+   * @brief
+   */
+  virtual size_t NumArc() override ;
+  /**
+   * @brief it is the same as NumArc()/2.
+   */
+  virtual size_t NumEdge() override ;
+  /**
+   * @brief
+   */
+  virtual size_t CostDim() override ;
+  /**
+   * @brief
+   */
+  virtual std::vector<long> AllVertex() override ;
+  /**
+   * @brief
+   */
+  virtual bool HasArcSpans() override ;
+  /**
+   * @brief
+   */
+  virtual ArcSpan SuccSpan(long v) override ;
+  /**
+   * @brief
+   */
+  virtual ArcSpan PredSpan(long v) override ;
+
+  //#### Non-Inherited Methods Below ####
+
+  /**
+   * @brief Map a binary graph file, return false if the file is missing or malformed.
+   */
+  virtual bool MapFile(const std::string& fname) ;
+  /**
+   * @brief Copy the arcs of g (in the order of GetSuccs / GetPreds) into arrays owned by this graph.
+   */
+  virtual void CreateFrom(PlannerGraph* g) ;
+
+protected:
+  MappedFile _file;
+  std::vector<uint64_t> _own_offsets; // owning mode (CreateFrom): fwd then rev offsets.
+  std::vector<int64_t> _own_targets; // fwd then rev targets.
+  std::vector<double> _own_costs; // fwd then rev costs.
+  size_t _n_vertex = 0;
+  size_t _n_arc = 0;
+  size_t _cdim = 0;
+  const uint64_t* _fwd_offsets = NULL;
+  const int64_t* _fwd_targets = NULL;
+  const double* _fwd_costs = NULL; // _cdim values per arc.
+  const uint64_t* _rev_offsets = NULL;
+  const int64_t* _rev_targets = NULL;
+  const double* _rev_costs = NULL;
+};
+
 /**
  * TODO, dense graph, matrix representation...
  */
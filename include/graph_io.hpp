@@ -7,6 +7,7 @@
 #include <string>
 #include <vector>
 #include <iostream>
+#include <memory>
 
 #include "graph.hpp"
 // #include "emoa.hpp"
@@ -19,6 +20,32 @@ namespace basic{
 
 int LoadSparseGraphDIMAC(std::vector<std::string> edge_cost_fnames, SparseGraph* out) ;
 
+/**
+ * @brief Write g into a binary graph file (CSR layout), which can then be memory-mapped by LoadCSRGraph.
+ * Layout (native byte order, 8-byte aligned sections):
+ *   char magic[8] = CSR_GRAPH_MAGIC; uint64 num_vertex, num_arc, cost_dim;
+ *   uint64 fwd_offsets[num_vertex+1]; int64 fwd_targets[num_arc]; double fwd_costs[num_arc*cost_dim];
+ *   uint64 rev_offsets[num_vertex+1]; int64 rev_targets[num_arc]; double rev_costs[num_arc*cost_dim].
+ * The costs of an arc are interleaved, i.e. fwd_costs[k*cost_dim + i] is the i-th cost of the k-th arc.
+ */
+int SaveCSRGraph(std::string fname, PlannerGraph* g) ;
+
+/**
+ * @brief Memory-map a binary graph file written by SaveCSRGraph, no parsing is done.
+ */
+int LoadCSRGraph(std::string fname, CSRGraph* out) ;
+
+/**
+ * @brief Return true if fname is a binary graph file, i.e. ends with ".csr".
+ */
+bool IsCSRGraphFile(const std::string& fname) ;
+
+/**
+ * @brief Load either a single binary graph file (CSRGraph) or M DIMACS cost files (SparseGraph,
+ * or with csr a CSRGraph owning the arcs read from them).
+ */
+int LoadPlannerGraph(std::vector<std::string> fnames, std::unique_ptr<PlannerGraph>* out, bool csr=false) ;
+
 int LoadStartGoal(std::string benchmark_table_fname, std::vector<int>* sources, std::vector<int>* goals);
 
 int LoadCoordDIMAC(std::string coord_file, std::vector< std::vector<double> >* output) ;
@@ -0,0 +1,109 @@
+/*******************************************
+ * About: Heuristic tables (cost-to-go of every vertex to a goal in each cost dimension)
+ *        and an on-disk cache of them, shared by EMOA* and ext-BOA*-lex.
+ * Author: Denis Derkach
+ *******************************************/
+
+
+#ifndef ZHONGQIANGREN_SEARCH_HEURISTIC_CACHE_H_
+#define ZHONGQIANGREN_SEARCH_HEURISTIC_CACHE_H_
+
+#include <stdint.h>
+#include <string>
+#include <vector>
+
+#include "graph.hpp"
+#include "mmap_file.hpp"
+
+#define HEURISTIC_FILE_MAGIC "EMOAHEU1"
+#define HEURISTIC_FILE_SUFFIX ".heu"
+
+namespace rzq{
+namespace search{
+
+/**
+ * @brief The cost-to-go from every vertex to a goal vd, for each cost dimension.
+ * The table either owns its values (Compute) or memory-maps a heuristic file (Map).
+ * Values are stored dimension-major, the value of (cdim, v) is at cdim*NumVertex()+v.
+ */
+class HeuristicTable {
+public:
+  HeuristicTable() ;
+  /**
+   * @brief Run one exhaustive backwards Dijkstra search from vd per cost dimension of g.
+   * With n_threads > 1, the searches run on up to n_threads threads, which only read the graph.
+   */
+  void Compute(basic::PlannerGraph* g, long vd, int n_threads = 1) ;
+  /**
+   * @brief Memory-map a heuristic file written by Save.
+   * Return false if the file does not exist or is not a table of (n_vertex, cdim, vd, graph_key).
+   */
+  bool Map(const std::string& fname, size_t n_vertex, size_t cdim, long vd, uint64_t graph_key) ;
+  /**
+   * @brief Write the table into a heuristic file.
+   * Layout (native byte order): char magic[8] = HEURISTIC_FILE_MAGIC;
+   *   uint64 n_vertex, cdim; int64 vd; uint64 graph_key; double values[cdim*n_vertex].
+   */
+  int Save(const std::string& fname, uint64_t graph_key) const ;
+  /**
+   * @brief The cost-to-go from v to the goal in cost dimension cdim.
+   */
+  inline double Get(size_t cdim, long v) const {
+    return _data[cdim * _n_vertex + v];
+  };
+
+  size_t NumVertex() const ;
+
+  size_t CostDim() const ;
+
+protected:
+  std::vector<double> _values; // owned values, empty if the table is mapped.
+  basic::MappedFile _file;
+  const double* _data = NULL;
+  size_t _n_vertex = 0;
+  size_t _cdim = 0;
+  long _vd = -1;
+};
+
+/**
+ * @brief An on-disk cache of heuristic tables, one file per (graph, goal), keyed by a hash of the graph content.
+ * Files are memory-mapped when reused, so processes on one machine share one copy of a table.
+ * When the files exceed max_bytes, the least recently used ones are removed.
+ * NOTE: an instance must not be used by several threads at once, several processes may share one directory.
+ */
+class HeuristicCache {
+public:
+  HeuristicCache(const std::string& dir, size_t max_bytes) ;
+  /**
+   * @brief Fill out with the heuristic table of (g, vd), from the cache if it is there,
+   * otherwise compute it and add it to the cache.
+   * Return true if the table was found in the cache. n_threads is passed to HeuristicTable::Compute.
+   */
+  bool Init(basic::PlannerGraph* g, long vd, HeuristicTable* out, int n_threads = 1) ;
+  /**
+   * @brief A hash of the vertices, arcs and costs of g, computed once per graph (see PlannerGraph::InstanceId).
+   */
+  uint64_t GraphKey(basic::PlannerGraph* g) ;
+
+protected:
+  std::string _FileName(uint64_t graph_key, long vd) const ;
+  // remove least recently used files until the cache fits into _max_bytes.
+  void _Evict() ;
+
+  std::string _dir;
+  size_t _max_bytes;
+  uint64_t _graph_id = 0; // InstanceId of the graph of _graph_key, 0 if none (ids start at 1).
+  uint64_t _graph_key = 0;
+};
+
+/**
+ * @brief Fill out with the heuristic table of (g, vd), through cache if it is not NULL.
+ * A computed table uses up to n_threads threads.
+ */
+void InitHeuristicTable(basic::PlannerGraph* g, long vd, HeuristicCache* cache, HeuristicTable* out,
+                        int n_threads = 1) ;
+
+} // end namespace search
+} // end namespace rzq
+
+#endif  // ZHONGQIANGREN_SEARCH_HEURISTIC_CACHE_H_
@@ -0,0 +1,126 @@
+/*******************************************
+ * About: Label storage of EMOA* and ext-BOA*-lex, the vertex, parent and g of every label
+ *        in chunks of fixed-width rows instead of one Label (two heap vectors) per label.
+ * Author: Denis Derkach
+ *******************************************/
+
+
+#ifndef ZHONGQIANGREN_SEARCH_LABEL_ARENA_H_
+#define ZHONGQIANGREN_SEARCH_LABEL_ARENA_H_
+
+#include <stdint.h>
+#include <string>
+#include <vector>
+
+#define LABEL_COSTS_DEFAULT "int"
+
+namespace rzq{
+namespace search{
+
+/**
+ * @brief Rows of width values of type T, allocated in chunks of 2^shift rows,
+ * so that appending never moves the rows already stored and at most one chunk is unused.
+ */
+template <typename T>
+class ChunkedRows {
+public:
+  ChunkedRows(size_t width = 1, size_t shift = 14) : _width(width), _shift(shift), _mask((size_t(1) << shift) - 1) {};
+  /**
+   * @brief append a row, return a pointer to its (uninitialized) width values.
+   */
+  T* Append() {
+    if ((_n & _mask) == 0) {
+      _chunks.push_back(std::vector<T>((_mask + 1) * _width));
+    }
+    _n++;
+    return Row(_n - 1);
+  };
+  /**
+   * @brief
+   */
+  T* Row(size_t k) { return &_chunks[k >> _shift][(k & _mask) * _width]; };
+  /**
+   * @brief
+   */
+  const T* Row(size_t k) const { return &_chunks[k >> _shift][(k & _mask) * _width]; };
+  /**
+   * @brief
+   */
+  size_t Size() const { return _n; };
+  /**
+   * @brief the memory held by the chunks.
+   */
+  size_t Bytes() const { return _chunks.size() * (_mask + 1) * _width * sizeof(T); };
+  /**
+   * @brief remove all rows and free the chunks.
+   */
+  void Clear() { std::vector< std::vector<T> >().swap(_chunks); _n = 0; };
+protected:
+  size_t _width;
+  size_t _shift;
+  size_t _mask;
+  size_t _n = 0;
+  std::vector< std::vector<T> > _chunks;
+};
+
+/**
+ * @brief The labels of a search, label k has id k.
+ * Its g is kept in a row of cdim values of the kind given to Init:
+ * "int" (int32) or "float" (float32) while every stored value is exactly representable,
+ * after which all rows are converted to "double" once, so the stored costs are always exact.
+ */
+class LabelArena {
+public:
+  LabelArena() ;
+  /**
+   * @brief remove all labels, the next ones have cdim costs stored as kind, see IsLabelCostsKind.
+   */
+  void Init(size_t cdim, const std::string& kind) ;
+  /**
+   * @brief store a label at vertex v with the given parent label (-1 if none), return its id.
+   */
+  long Add(long v, long parent, const std::vector<double>& g) ;
+  /**
+   * @brief
+   */
+  long V(long id) const ;
+  /**
+   * @brief
+   */
+  long Parent(long id) const ;
+  /**
+   * @brief the g of label id.
+   */
+  std::vector<double> G(long id) const ;
+  /**
+   * @brief
+   */
+  size_t Size() const ;
+  /**
+   * @brief the memory held by the labels.
+   */
+  size_t Bytes() const ;
+  /**
+   * @brief the kind the costs are currently stored as, "double" after a cost did not fit.
+   */
+  std::string Kind() const ;
+protected:
+  bool _Fits(const std::vector<double>& g) const ;
+  void _Widen() ;
+  size_t _cdim = 0;
+  int _kind = 0; // index in LABEL_COSTS_KINDS.
+  ChunkedRows<long> _vp; // v and parent of every label.
+  ChunkedRows<int32_t> _g_int;
+  ChunkedRows<float> _g_float;
+  ChunkedRows<double> _g_double;
+};
+
+/**
+ * @brief Return true if kind is "int", "float" or "double".
+ */
+bool IsLabelCostsKind(const std::string& kind) ;
+
+} // end namespace search
+} // end namespace rzq
+
+#endif  // ZHONGQIANGREN_SEARCH_LABEL_ARENA_H_
@@ -0,0 +1,53 @@
+/*******************************************
+ * About: Read-only memory-mapped files.
+ * Author: Denis Derkach
+ *******************************************/
+
+
+#ifndef ZHONGQIANGREN_BASIC_MMAP_FILE_H_
+#define ZHONGQIANGREN_BASIC_MMAP_FILE_H_
+
+#include <string>
+
+namespace rzq{
+namespace basic{
+
+/**
+ * @brief A read-only, shared memory mapping of a whole file.
+ * Several processes mapping the same file share one page-cache copy of it.
+ */
+class MappedFile {
+public:
+  MappedFile() ;
+  virtual ~MappedFile() ;
+  /**
+   * @brief Map the file, return false if it cannot be opened or mapped.
+   */
+  virtual bool Open(const std::string& fname) ;
+  /**
+   * @brief Unmap the file, called by the destructor.
+   */
+  virtual void Close() ;
+  /**
+   * @brief
+   */
+  const char* Data() const ;
+  /**
+   * @brief
+   */
+  size_t Size() const ;
+
+protected:
+  const char* _data = NULL;
+  size_t _size = 0;
+  void* _handle = NULL; // file mapping handle, only used on Windows.
+
+private:
+  MappedFile(const MappedFile&); // not copyable, the mapping is owned.
+  MappedFile& operator=(const MappedFile&);
+};
+
+} // end namespace basic
+} // end namespace rzq
+
+#endif  // ZHONGQIANGREN_BASIC_MMAP_FILE_H_
@@ -0,0 +1,121 @@
+/*******************************************
+ * About: Open lists of EMOA* and ext-BOA*-lex, which pop the label with the lexicographically
+ *        smallest f (ties by label id), selectable at run time.
+ * Author: Denis Derkach
+ *******************************************/
+
+
+#ifndef ZHONGQIANGREN_SEARCH_OPEN_LIST_H_
+#define ZHONGQIANGREN_SEARCH_OPEN_LIST_H_
+
+#include <memory>
+#include <set>
+#include <string>
+#include <vector>
+
+#define OPEN_LIST_DEFAULT "heap"
+
+namespace rzq{
+namespace search{
+
+/**
+ * @brief The open list interface. All implementations pop labels in the same order,
+ * i.e. by (f, id) in lexicographic order, so they find the same labels in the same order.
+ */
+class OpenList {
+public:
+  virtual ~OpenList() {};
+  /**
+   * @brief
+   */
+  virtual void Push(const std::vector<double>& f, long id) = 0;
+  /**
+   * @brief remove the label with the smallest (f, id) and return its id.
+   */
+  virtual long Pop() = 0;
+  /**
+   * @brief
+   */
+  virtual bool Empty() const = 0;
+  /**
+   * @brief
+   */
+  virtual size_t Size() const = 0;
+  /**
+   * @brief the memory held by the list, estimated from its entries (or array capacities).
+   */
+  virtual size_t Bytes() const = 0;
+};
+
+/**
+ * @brief The red-black tree of (f, id) pairs used before, one node allocation per label.
+ */
+class TreeOpenList : public OpenList {
+public:
+  virtual void Push(const std::vector<double>& f, long id) override ;
+  virtual long Pop() override ;
+  virtual bool Empty() const override ;
+  virtual size_t Size() const override ;
+  virtual size_t Bytes() const override ;
+protected:
+  std::set< std::pair< std::vector<double>, long > > _set;
+};
+
+/**
+ * @brief A d-ary min-heap whose keys are packed in one array (cdim values per entry),
+ * so pushing a label copies its f once and no memory is allocated once the arrays have grown.
+ */
+class HeapOpenList : public OpenList {
+public:
+  HeapOpenList(size_t cdim, size_t arity = 4) ;
+  virtual void Push(const std::vector<double>& f, long id) override ;
+  virtual long Pop() override ;
+  virtual bool Empty() const override ;
+  virtual size_t Size() const override ;
+  virtual size_t Bytes() const override ;
+protected:
+  bool _Less(size_t a, size_t b) const ;
+  void _Swap(size_t a, size_t b) ;
+  size_t _cdim;
+  size_t _arity;
+  std::vector<double> _keys; // _cdim values per entry.
+  std::vector<long> _ids;
+};
+
+/**
+ * @brief A bucket queue on the first cost of f, for integer costs (e.g. the generated maps, weights 1..10),
+ * each bucket is a HeapOpenList ordering the labels of equal first cost.
+ * Buckets are indexed from the first pushed cost, the lowest non-empty bucket is tracked,
+ * and Push throws if the first cost is not an integer.
+ */
+class BucketOpenList : public OpenList {
+public:
+  BucketOpenList(size_t cdim, size_t arity = 4) ;
+  virtual void Push(const std::vector<double>& f, long id) override ;
+  virtual long Pop() override ;
+  virtual bool Empty() const override ;
+  virtual size_t Size() const override ;
+  virtual size_t Bytes() const override ;
+protected:
+  size_t _cdim;
+  size_t _arity;
+  double _base = 0; // first cost of bucket 0.
+  size_t _first = 0; // no bucket below this one holds a label.
+  size_t _size = 0;
+  std::vector< std::unique_ptr<HeapOpenList> > _buckets;
+};
+
+/**
+ * @brief Return true if kind is "set", "heap" or "bucket".
+ */
+bool IsOpenListKind(const std::string& kind) ;
+
+/**
+ * @brief Create an open list of the given kind for cost vectors of size cdim, see IsOpenListKind.
+ */
+std::unique_ptr<OpenList> NewOpenList(const std::string& kind, size_t cdim) ;
+
+} // end namespace search
+} // end namespace rzq
+
+#endif  // ZHONGQIANGREN_SEARCH_OPEN_LIST_H_
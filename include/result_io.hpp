@@ -0,0 +1,161 @@
+/*******************************************
+ * About: Binary result files of EMOA* and ext-BOA*-lex, read lazily by python/result_file.py.
+ * Author: Denis Derkach
+ *******************************************/
+
+
+#ifndef ZHONGQIANGREN_SEARCH_RESULT_IO_H_
+#define ZHONGQIANGREN_SEARCH_RESULT_IO_H_
+
+#include <stdint.h>
+#include <algorithm>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <string>
+#include <utility>
+#include <vector>
+
+#define RESULT_FILE_MAGIC "EMOARES1"
+#define RESULT_FILE_SUFFIX ".bin"
+#define RESULT_METRIC_NAME_SIZE 32
+#define TRACE_FILE_MAGIC "EMOATRC1"
+#define TRACE_FILE_SUFFIX ".trace"
+
+namespace rzq{
+namespace search{
+
+/**
+ * @brief Return true if fname is a binary result file, i.e. ends with ".bin".
+ */
+inline bool IsBinaryResultFile(const std::string& fname) {
+  std::string suffix = RESULT_FILE_SUFFIX;
+  return fname.size() >= suffix.size() && fname.compare(fname.size() - suffix.size(), suffix.size(), suffix) == 0;
+};
+
+/**
+ * @brief The scalar metrics of a result, in the order they are written to result files.
+ */
+template<typename ResultType>
+std::vector< std::pair<std::string, double> > ResultMetrics(const ResultType& res) {
+  return {
+    {"n_generated", double(res.n_generated)},
+    {"n_expanded", double(res.n_expanded)},
+    {"n_domCheck", double(res.n_domCheck)},
+    {"rt_initHeu", res.rt_initHeu},
+    {"rt_search", res.rt_search},
+    {"timeout", double(res.timeout)},
+    {"num_nondom_labels_max", res.num_nondom_labels_max},
+    {"num_nondom_labels_avg", res.num_nondom_labels_avg},
+    {"rt_domCheck", res.rt_domCheck},
+    {"termination", double(res.termination)},
+    {"num_labels_max", double(res.num_labels_max)},
+    {"num_open_max", double(res.num_open_max)}
+  };
+};
+
+/**
+ * @brief Write a result (EMOAResult or BOALEXResult) into a binary result file.
+ * Layout (native byte order, 8-byte aligned sections):
+ *   char magic[8] = RESULT_FILE_MAGIC; uint64 num_metrics;
+ *   num_metrics x {char name[RESULT_METRIC_NAME_SIZE] (zero padded); double value};
+ *   uint64 N (solutions), cost_dim, num_path_vertices;
+ *   int64 label_ids[N]; double costs[N*cost_dim]; uint64 path_offsets[N+1]; int64 path_vertices[num_path_vertices].
+ * Solutions are sorted by label id, the path of the k-th solution is
+ * path_vertices[path_offsets[k]:path_offsets[k+1]].
+ * Readers look metrics up by name, so new metrics can be appended without breaking them.
+ */
+template<typename ResultType>
+int SaveBinaryResult(std::string fname, const ResultType& res) {
+  std::ofstream fout(fname, std::ios::binary);
+  if (!fout) {
+    std::cerr << "Error: file '" << fname << "' could not be opened" << std::endl;
+    return -1;
+  }
+
+  std::vector<long> label_ids;
+  for (const auto& kv: res.costs) {
+    label_ids.push_back(kv.first);
+  }
+  std::sort(label_ids.begin(), label_ids.end());
+
+  uint64_t n_sol = label_ids.size();
+  uint64_t cdim = n_sol > 0 ? res.costs.at(label_ids[0]).size() : 0;
+  std::vector<int64_t> ids(label_ids.begin(), label_ids.end());
+  std::vector<double> costs;
+  std::vector<uint64_t> offsets(1, 0);
+  std::vector<int64_t> vertices;
+  costs.reserve(n_sol * cdim);
+  for (auto id: label_ids) {
+    const auto& c = res.costs.at(id);
+    costs.insert(costs.end(), c.begin(), c.end());
+    const auto& path = res.paths.at(id);
+    vertices.insert(vertices.end(), path.begin(), path.end());
+    offsets.push_back(vertices.size());
+  }
+
+  auto metrics = ResultMetrics(res);
+  uint64_t n_metrics = metrics.size();
+  fout.write(RESULT_FILE_MAGIC, 8);
+  fout.write(reinterpret_cast<const char*>(&n_metrics), sizeof(uint64_t));
+  for (const auto& metric: metrics) {
+    char name[RESULT_METRIC_NAME_SIZE];
+    std::memset(name, 0, RESULT_METRIC_NAME_SIZE);
+    std::strncpy(name, metric.first.c_str(), RESULT_METRIC_NAME_SIZE - 1);
+    fout.write(name, RESULT_METRIC_NAME_SIZE);
+    fout.write(reinterpret_cast<const char*>(&metric.second), sizeof(double));
+  }
+
+  uint64_t sizes[3] = {n_sol, cdim, uint64_t(vertices.size())};
+  fout.write(reinterpret_cast<const char*>(sizes), sizeof(sizes));
+  fout.write(reinterpret_cast<const char*>(ids.data()), ids.size() * sizeof(int64_t));
+  fout.write(reinterpret_cast<const char*>(costs.data()), costs.size() * sizeof(double));
+  fout.write(reinterpret_cast<const char*>(offsets.data()), offsets.size() * sizeof(uint64_t));
+  fout.write(reinterpret_cast<const char*>(vertices.data()), vertices.size() * sizeof(int64_t));
+
+  if (!fout) {
+    std::cerr << "Error: file '" << fname << "' could not be written" << std::endl;
+    return -1;
+  }
+  return 1;
+};
+
+/**
+ * @brief Write the solution trace of a result (EMOAResult or BOALEXResult) into a trace file,
+ * by convention the result file name followed by TRACE_FILE_SUFFIX.
+ * Layout (native byte order): char magic[8] = TRACE_FILE_MAGIC; uint64 N (solutions), cost_dim;
+ *   double times[N] (search time in seconds, ascending); double costs[N*cost_dim].
+ */
+template<typename ResultType>
+int SaveSolutionTrace(std::string fname, const ResultType& res) {
+  std::ofstream fout(fname, std::ios::binary);
+  if (!fout) {
+    std::cerr << "Error: file '" << fname << "' could not be opened" << std::endl;
+    return -1;
+  }
+
+  uint64_t n_sol = res.trace_times.size();
+  uint64_t cdim = n_sol > 0 ? res.trace_costs[0].size() : 0;
+  std::vector<double> costs;
+  costs.reserve(n_sol * cdim);
+  for (const auto& c: res.trace_costs) {
+    costs.insert(costs.end(), c.begin(), c.end());
+  }
+
+  uint64_t sizes[2] = {n_sol, cdim};
+  fout.write(TRACE_FILE_MAGIC, 8);
+  fout.write(reinterpret_cast<const char*>(sizes), sizeof(sizes));
+  fout.write(reinterpret_cast<const char*>(res.trace_times.data()), n_sol * sizeof(double));
+  fout.write(reinterpret_cast<const char*>(costs.data()), costs.size() * sizeof(double));
+
+  if (!fout) {
+    std::cerr << "Error: file '" << fname << "' could not be written" << std::endl;
+    return -1;
+  }
+  return 1;
+};
+
+} // end namespace search
+} // end namespace rzq
+
+#endif  // ZHONGQIANGREN_SEARCH_RESULT_IO_H_
@@ -9,7 +9,11 @@
 #define ZHONGQIANGREN_BASIC_SEARCH_H_
 
 #include "graph.hpp"
+#include "open_list.hpp"
+#include "label_arena.hpp"
+#include "frontier.hpp"
 #include <chrono>
+#include <string>
 
 namespace rzq{
 namespace search{
@@ -53,6 +57,42 @@ protected:
 };
 
 
+/**
+ * @brief Why a multi-objective search stopped, reported as the "termination" metric of its result.
+ * The front is complete only for TERMINATION_DONE, otherwise it holds the solutions found so far.
+ */
+enum SearchTermination {
+  TERMINATION_DONE = 0, // open is empty.
+  TERMINATION_TIMEOUT = 1, // the time limit was reached.
+  TERMINATION_LABEL_LIMIT = 2, // the label budget was reached, see SetSearchBudget.
+  TERMINATION_MEMORY_LIMIT = 3 // the memory budget was reached, see SetSearchBudget.
+};
+
+// the memory budget of a search is checked every this many labels popped from open.
+#define SEARCH_MEMORY_CHECK_INTERVAL 1024
+
+/**
+ * @brief Optional settings of the command line programs, given as "--name value" anywhere in argv.
+ */
+struct SearchOptions {
+  std::string heu_cache_dir = ""; // --heu_cache DIR, directory of the heuristic cache, empty = no cache.
+  double heu_cache_mb = 4096; // --heu_cache_mb N, size limit of the heuristic cache in MB.
+  int heu_threads = 1; // --heu_threads N, number of threads computing the heuristic (one per objective at most).
+  bool trace = false; // --trace 1, write the solution trace next to each result file.
+  bool csr_graph = false; // --graph csr, store DIMACS graphs in CSR layout (see CSRGraph), "sparse" by default.
+  std::string open_list = OPEN_LIST_DEFAULT; // --open_list KIND, the open list of the search (see open_list.hpp).
+  std::string label_costs = LABEL_COSTS_DEFAULT; // --label_costs KIND, how the label costs are stored (see label_arena.hpp).
+  std::string frontier = ""; // --frontier KIND, the frontier data structure (see frontier.hpp), empty for the default.
+  long max_labels = 0; // --max_labels N, stop a search once it has stored N labels, 0 = no limit.
+  double max_memory_mb = 0; // --max_memory_mb N, stop a search once its labels, open list and frontiers take N MB, 0 = no limit.
+};
+
+/**
+ * @brief Parse the known options into opt and remove them from argv, other arguments keep their order.
+ * Return -1 if an option has no valid value.
+ */
+int ParseSearchOptions(int* argc, char* argv[], SearchOptions* opt) ;
+
 } // end namespace search
 } // end namespace zr
 
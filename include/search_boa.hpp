@@ -131,6 +131,7 @@ protected:
   virtual void _InitFrontiers() ;
 
   basic::PlannerGraph* _graph;
+  basic::ArcBuffer _arc_buf; // arcs of the expanded vertex, if the graph has no arc spans.
 
   // std::unordered_map< long, Frontier > _alpha; // map a vertex id (v) to alpha(v).
   //std::vector< Frontier > _alpha; // map a vertex id (v) to alpha(v).
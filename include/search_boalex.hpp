@@ -10,14 +10,21 @@
 
 #include "search.hpp"
 #include "search_dijkstra.hpp"
+#include "heuristic_cache.hpp"
+#include "open_list.hpp"
+#include "label_arena.hpp"
+#include "frontier.hpp"
 #include "algorithm"
 
 #include <unordered_map>
 #include <unordered_set>
 #include <set>
+#include <memory>
 
 #define DEBUG_BOALEX 0
 
+#define BOALEX_FRONTIER_DEFAULT "lex"
+
 namespace rzq{
 namespace search{
 
@@ -48,42 +55,19 @@ struct BOALEXResult {
   std::unordered_map< long, CostVec > costs;
   long n_generated = 0;
   long n_expanded = 0;
-  long n_domCheck = 0;
+  long n_domCheck = 0; // number of cost vectors compared by the frontiers, see ParetoFrontier::n_check.
+  double rt_domCheck = 0.0; // time spent in the frontier checks and updates, included in rt_search.
   double rt_initHeu = 0.0;
-  double rt_search = 0.0;
+  double rt_search = 0.0; // wall time of the search, which time_limit applies to.
   bool timeout = false;
+  int termination = TERMINATION_DONE; // why the search stopped, see SearchTermination.
+  long num_labels_max = 0; // number of labels stored (labels are never removed, so this is the peak).
+  long num_open_max = 0; // peak number of labels in open.
   double num_nondom_labels_avg = -1;
   double num_nondom_labels_max = -1;
-};
-
-/**
- * @brief an interface, depends on the impl of BOA*, TOA*, etc.
- */
-class Frontier_BOALEX : public CostVec {
-public:
-  Frontier_BOALEX();
-  virtual ~Frontier_BOALEX();
-  virtual bool Check(CostVec g) ; // check if l is dominated or not.
-  virtual void Update(Label l) ; // update the frontier using l.
-  std::vector<long> label_ids;
-  //std::unordered_map<long, Label> labels; // for BiPulse usage only...
-  std::vector<Label> labels; // for BOA-lex
-  // std::mutex ; // for BiPulse usage only...
-
-// protected:
-  // project the 3d vector to 2d vector by removing the first component.
-  virtual CostVec _p(CostVec v);
-
-  //virtual void Filter(CostVec v) ;
-  // virtual bool Check2(CostVec v) ;
-  //virtual void _rebuildTree(std::unordered_set<long> *skip_node);
-protected:
-  //virtual Filter_boa(std::unordered_map<long,Label> &a);
-  //virtual basic::AVLNode* _filter(basic::AVLNode* n, const CostVec& k, int* outFlag=NULL);
-  //virtual  _filter(std::vector<>* n, const CostVec& k, std::unordered_set<long> *a = NULL);
-  //virtual basic::AVLNode* _rebuildTreeMethod(std::vector<long> &tree_node_ids, long start, long end);
-  //virtual void _verifyNonDom(std::vector<long>&);
-  //virtual bool _check(std::vector<>* n,const CostVec& k) ; // new impl @2021-08-31
+  // solution trace (if enabled): the search time at which each solution joined the front, and its cost.
+  std::vector<double> trace_times;
+  std::vector<CostVec> trace_costs;
 };
 
 //////////////////////////////////////////////////////////////////////
@@ -100,6 +84,28 @@ public:
   // set graph as pointer, note to leverage polymorphism here.
   virtual void SetGraphPtr(basic::PlannerGraph* g) ;
 
+  // if set, InitHeu reuses heuristic tables from this cache (not owned).
+  virtual void SetHeuristicCache(HeuristicCache* cache) ;
+
+  // number of threads of the M backward Dijkstra searches in InitHeu, one per objective at most.
+  virtual void SetHeuristicThreads(int n_threads) ;
+
+  // if true, Search records when each solution is found, see trace_times / trace_costs of the result.
+  virtual void SetSolutionTrace(bool trace) ;
+
+  // the open list of Search, "set", "heap" or "bucket" (see open_list.hpp), all pop the labels in the same order.
+  virtual void SetOpenList(const std::string& kind) ;
+
+  // how the label costs are stored, "int", "float" or "double" (see label_arena.hpp), the stored costs are exact.
+  virtual void SetLabelCosts(const std::string& kind) ;
+
+  // the frontier data structure, "lex" (default), "avl", "flat" or "ndtree" (see frontier.hpp), all give the same result.
+  virtual void SetFrontier(const std::string& kind) ;
+
+  // Search stops (keeping the solutions found so far) once max_labels labels are stored or its labels, open
+  // list and frontiers take max_memory_mb MB, see SearchTermination. 0 means no limit.
+  virtual void SetSearchBudget(long max_labels, double max_memory_mb) ;
+
   // this vd must be the same as the vd in Search().
   virtual void InitHeu(long vd);
   
@@ -120,7 +126,8 @@ protected:
   // this method needs to new frontiers, which depend on the specific #obj.
   virtual void _UpdateFrontier(Label l) ;
 
-  virtual long _GenLabelId() ;
+  // the label with the given id, its f is computed from g and the heuristic.
+  virtual Label _GetLabel(long id) ;
 
   virtual bool _FrontierCheck(Label l) ;
   
@@ -132,29 +139,35 @@ protected:
 
   virtual void _InitFrontiers() ;
 
+  // return TERMINATION_LABEL_LIMIT or TERMINATION_MEMORY_LIMIT if a budget is reached, else TERMINATION_DONE.
+  // The memory (labels, open list and frontiers) is only estimated if check_memory is true, as summing the
+  // open list buckets takes a while.
+  virtual int _CheckBudget(bool check_memory) ;
+
   basic::PlannerGraph* _graph;
+  basic::ArcBuffer _arc_buf; // arcs of the expanded vertex, if the graph has no arc spans.
 
   // std::unordered_map< long, Frontier > _alpha; // map a vertex id (v) to alpha(v).
   //std::vector< Frontier > _alpha; // map a vertex id (v) to alpha(v).
-  std::vector< Frontier_BOALEX* > _alpha; // map a vertex id (v) to alpha(v).
+  std::vector< ParetoFrontier* > _alpha; // map a vertex id (v) to alpha(v).
+  size_t _frontier_bytes = 0; // sum of the Bytes() of _alpha, kept up to date by _UpdateFrontier.
+  std::string _frontier_kind = BOALEX_FRONTIER_DEFAULT;
   //std::vector< FrontierNaive> _alpha;
 
-  long _label_id_gen = 0;
   long _vo = -1, _vd = -1;
-  std::set< std::pair< CostVec, long> > _open;
-
-  // std::unordered_map<long, Label> _label;
-  std::vector<Label> _label; 
-
-  // std::unordered_map<long, long> _parent;
-  std::vector<long> _parent;
+  std::shared_ptr<OpenList> _open; // shared, so that the planner stays copyable.
+  std::string _open_kind = OPEN_LIST_DEFAULT;
 
-  size_t __vec_alloc_total = 0;
-  size_t __vec_alloc_batch = 1024;
-  size_t __vec_alloc_batch_max = 1024*4;
+  LabelArena _labels; // the labels that entered open, a label's id is its index.
+  std::string _label_costs = LABEL_COSTS_DEFAULT;
+  long _max_labels = 0;
+  double _max_memory_mb = 0;
 
   BOALEXResult _res;
-  std::vector<Dijkstra> _dijks;
+  std::shared_ptr<HeuristicTable> _heu;
+  HeuristicCache* _heu_cache = NULL;
+  int _heu_threads = 1;
+  bool _trace = false;
   // std::string _mode = ""; // for some special usage
 
   std::vector< std::vector<CostVec> > _heu_p2p;
@@ -173,13 +186,26 @@ void GraphExpandCostDim(rzq::basic::SparseGraph* g, bool add_deg_cost, bool add_
  * @brief The entry point of BOA*.
  * g - a pointer of graph, which can be either of class GridkConn or Roadmap. Polymorphism is used.
  * vo,vd - start and goal nodes.
- * time_limit - the run time limit for search.
+ * time_limit - the run (wall) time limit for search.
  * res - the output argument.
+ * heu_cache - if not NULL, the heuristic is loaded from / added to this cache.
+ * heu_threads - the number of threads computing the heuristic.
+ * trace - record the solution trace.
+ * open_list - the kind of open list, see SetOpenList.
+ * label_costs - how the label costs are stored, see SetLabelCosts.
+ * frontier - the frontier data structure, see SetFrontier.
+ * max_labels, max_memory_mb - the label and memory budgets of the search, see SetSearchBudget.
  */
-int RunBOALEX(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rzq::search::BOALEXResult* res);
+int RunBOALEX(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rzq::search::BOALEXResult* res,
+            HeuristicCache* heu_cache = NULL, int heu_threads = 1, bool trace = false,
+            const std::string& open_list = OPEN_LIST_DEFAULT,
+            const std::string& label_costs = LABEL_COSTS_DEFAULT,
+            const std::string& frontier = BOALEX_FRONTIER_DEFAULT,
+            long max_labels = 0, double max_memory_mb = 0);
 
 /**
  * @brief Save the BOA* result to a file.
+ * A file name ending with ".bin" selects the binary format of result_io.hpp, otherwise text is written.
  */
 int SaveBOALEXResult(std::string fname, const search::BOALEXResult& res);
 
@@ -85,6 +85,7 @@ protected:
 	std::vector<long> _parent; // help reconstruct the path.
 	std::vector<double> _v2d; // store the results.
 	std::vector<std::vector<double>> _cvec; // the corresponding cost vector of the path to vd.
+	ArcBuffer _arc_buf; // arcs of the expanded vertex, if the graph has no arc spans.
 };
 
 } // end namespace search
@@ -0,0 +1,93 @@
+/*******************************************
+ * About: In-process Python bindings of the graph loader and EMOA* / ext-BOA*-lex,
+ *        used by python/py_parallel_api.py as the "native" backend.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "emoa_py.hpp"
+#include "graph_io.hpp"
+#include "search_emoa.hpp"
+
+#include <memory>
+#include <stdexcept>
+
+using namespace rzq;
+
+namespace {
+
+std::unique_ptr<search::HeuristicCache> heu_cache;
+
+void SetHeuristicCache(std::string dir, double max_mb) {
+  if (dir.empty()) {
+    heu_cache.reset();
+  } else {
+    heu_cache.reset(new search::HeuristicCache(dir, size_t(max_mb * 1024 * 1024)));
+  }
+};
+
+std::shared_ptr<basic::PlannerGraph> LoadGraph(std::vector<std::string> fnames, bool csr) {
+  std::unique_ptr<basic::PlannerGraph> g;
+  int status;
+  {
+    py::gil_scoped_release release;
+    status = basic::LoadPlannerGraph(fnames, &g, csr);
+  }
+  if (status < 0) {
+    throw std::runtime_error("[ERROR] emoa_py.load_graph, cannot read graph files");
+  }
+  return std::shared_ptr<basic::PlannerGraph>(g.release());
+};
+
+py::dict RunEMOAPy(basic::PlannerGraph* g, long vo, long vd, double time_limit, int heu_threads, bool trace,
+  std::string open_list, std::string label_costs, std::string frontier, long max_labels, double max_memory_mb) {
+  search::EMOAResult res;
+  {
+    py::gil_scoped_release release;
+    search::RunEMOA(g, vo, vd, time_limit, &res, GetHeuristicCache(), heu_threads, trace, open_list, label_costs,
+      frontier, max_labels, max_memory_mb);
+  }
+  return ResultToDict(res, g->CostDim());
+};
+
+} // end anonymous namespace
+
+search::HeuristicCache* GetHeuristicCache() {
+  return heu_cache.get();
+};
+
+PYBIND11_MODULE(emoa_py, m) {
+  m.doc() = "In-process bindings of EMOA* and ext-BOA*-lex.";
+
+  py::class_<basic::PlannerGraph, std::shared_ptr<basic::PlannerGraph> >(m, "PlannerGraph")
+    .def("num_vertex", &basic::PlannerGraph::NumVertex)
+    .def("num_arc", &basic::PlannerGraph::NumArc)
+    .def("num_edge", &basic::PlannerGraph::NumEdge)
+    .def("cost_dim", &basic::PlannerGraph::CostDim);
+
+  py::class_<basic::SparseGraph, basic::PlannerGraph, std::shared_ptr<basic::SparseGraph> >(m, "SparseGraph")
+    .def(py::init<>());
+
+  py::class_<basic::CSRGraph, basic::PlannerGraph, std::shared_ptr<basic::CSRGraph> >(m, "CSRGraph");
+
+  m.def("load_graph", &LoadGraph, py::arg("fnames"), py::arg("csr") = false,
+        "Load M DIMACS cost files (one per objective) into a SparseGraph (with csr, into a CSRGraph the searches "
+        "read without copies), or map a single binary .csr graph file.");
+
+  m.def("run_emoa", &RunEMOAPy, py::arg("graph"), py::arg("start"), py::arg("goal"), py::arg("time_limit"),
+        py::arg("heu_threads") = 1, py::arg("trace") = false, py::arg("open_list") = OPEN_LIST_DEFAULT,
+        py::arg("label_costs") = LABEL_COSTS_DEFAULT, py::arg("frontier") = EMOA_FRONTIER_DEFAULT,
+        py::arg("max_labels") = 0, py::arg("max_memory_mb") = 0.0,
+        "Run EMOA* on a loaded graph, return metrics and the Pareto front. "
+        "The heuristic of the M objectives is computed on up to heu_threads threads, "
+        "with trace the time and cost of each solution as it is found are returned as well. "
+        "open_list is \"set\", \"heap\" or \"bucket\" (integer costs only), "
+        "label_costs is \"int\", \"float\" or \"double\" (the storage of the label costs, exact in all cases), "
+        "frontier is \"avl\", \"lex\", \"flat\" or \"ndtree\" (the dominance check data structure). "
+        "The search stops with the solutions found so far once it stores max_labels labels or its labels, open "
+        "list and frontiers take max_memory_mb MB (0 for no limit), the \"termination\" metric tells why it stopped.");
+
+  m.def("set_heuristic_cache", &SetHeuristicCache, py::arg("dir"), py::arg("max_mb") = 4096.0,
+        "Reuse heuristic tables stored in dir (and add new ones) in the following runs, an empty dir disables the cache.");
+
+  BindBOALEX(m);
+}
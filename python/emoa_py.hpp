@@ -0,0 +1,98 @@
+/*******************************************
+ * About: Shared helpers of the emoa_py Python extension module.
+ * Author: Denis Derkach
+ *******************************************/
+
+#ifndef EMOA_PY_H_
+#define EMOA_PY_H_
+
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+
+#include "graph.hpp"
+#include "heuristic_cache.hpp"
+
+namespace py = pybind11;
+
+/**
+ * @brief Register the ext-BOA*-lex entry point, implemented in emoa_py_boalex.cpp.
+ * search_emoa.hpp and search_boalex.hpp both define rzq::search::Label,
+ * so the two algorithms are bound from separate translation units.
+ */
+void BindBOALEX(py::module_& m);
+
+/**
+ * @brief The heuristic cache set by emoa_py.set_heuristic_cache, NULL if there is none.
+ * Shared by run_emoa and run_boalex, so paired runs compute the heuristic of a goal once.
+ */
+rzq::search::HeuristicCache* GetHeuristicCache();
+
+/**
+ * @brief Convert an EMOAResult / BOALEXResult into a python dict.
+ * Metrics are the same as in the result file written by SaveEMOAResult,
+ * the Pareto front is returned as an (N, M) float64 array "costs" with matching
+ * "label_ids" and a list of int64 vertex arrays "paths".
+ * The solution trace is returned as "trace_times" (N') and "trace_costs" (N', M), empty if it was not recorded.
+ */
+template<typename ResultType>
+py::dict ResultToDict(const ResultType& res, size_t cdim) {
+  py::dict out;
+  out["n_generated"] = res.n_generated;
+  out["n_expanded"] = res.n_expanded;
+  out["n_domCheck"] = res.n_domCheck;
+  out["rt_initHeu"] = res.rt_initHeu;
+  out["rt_search"] = res.rt_search;
+  out["timeout"] = int(res.timeout);
+  out["num_nondom_labels_max"] = res.num_nondom_labels_max;
+  out["num_nondom_labels_avg"] = res.num_nondom_labels_avg;
+  out["rt_domCheck"] = res.rt_domCheck;
+  out["termination"] = res.termination;
+  out["num_labels_max"] = res.num_labels_max;
+  out["num_open_max"] = res.num_open_max;
+  out["num_solutions"] = res.costs.size();
+
+  size_t n_sol = res.costs.size();
+  py::array_t<long long> label_ids(n_sol);
+  py::array_t<double> costs({n_sol, cdim});
+  auto ids_buf = label_ids.mutable_unchecked<1>();
+  auto costs_buf = costs.mutable_unchecked<2>();
+  py::list paths;
+
+  size_t row = 0;
+  for (const auto& kv : res.costs) {
+    ids_buf(row) = kv.first;
+    for (size_t k = 0; k < cdim; k++) {
+      costs_buf(row, k) = kv.second[k];
+    }
+    const std::vector<long>& path = res.paths.at(kv.first);
+    py::array_t<long long> path_arr(path.size());
+    auto path_buf = path_arr.mutable_unchecked<1>();
+    for (size_t i = 0; i < path.size(); i++) {
+      path_buf(i) = path[i];
+    }
+    paths.append(path_arr);
+    row++;
+  }
+
+  size_t n_trace = res.trace_times.size();
+  py::array_t<double> trace_times(n_trace);
+  py::array_t<double> trace_costs({n_trace, cdim});
+  auto times_buf = trace_times.mutable_unchecked<1>();
+  auto trace_buf = trace_costs.mutable_unchecked<2>();
+  for (size_t i = 0; i < n_trace; i++) {
+    times_buf(i) = res.trace_times[i];
+    for (size_t k = 0; k < cdim; k++) {
+      trace_buf(i, k) = res.trace_costs[i][k];
+    }
+  }
+
+  out["label_ids"] = label_ids;
+  out["costs"] = costs;
+  out["paths"] = paths;
+  out["trace_times"] = trace_times;
+  out["trace_costs"] = trace_costs;
+  return out;
+};
+
+#endif  // EMOA_PY_H_
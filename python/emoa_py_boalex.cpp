@@ -0,0 +1,39 @@
+/*******************************************
+ * About: ext-BOA*-lex part of the emoa_py Python extension module.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "emoa_py.hpp"
+#include "search_boalex.hpp"
+
+using namespace rzq;
+
+namespace {
+
+py::dict RunBOALEXPy(basic::PlannerGraph* g, long vo, long vd, double time_limit, int heu_threads, bool trace,
+  std::string open_list, std::string label_costs, std::string frontier, long max_labels, double max_memory_mb) {
+  search::BOALEXResult res;
+  {
+    py::gil_scoped_release release;
+    search::RunBOALEX(g, vo, vd, time_limit, &res, GetHeuristicCache(), heu_threads, trace, open_list, label_costs,
+      frontier, max_labels, max_memory_mb);
+  }
+  return ResultToDict(res, g->CostDim());
+};
+
+} // end anonymous namespace
+
+void BindBOALEX(py::module_& m) {
+  m.def("run_boalex", &RunBOALEXPy, py::arg("graph"), py::arg("start"), py::arg("goal"), py::arg("time_limit"),
+        py::arg("heu_threads") = 1, py::arg("trace") = false, py::arg("open_list") = OPEN_LIST_DEFAULT,
+        py::arg("label_costs") = LABEL_COSTS_DEFAULT, py::arg("frontier") = BOALEX_FRONTIER_DEFAULT,
+        py::arg("max_labels") = 0, py::arg("max_memory_mb") = 0.0,
+        "Run ext-BOA*-lex on a loaded graph, return metrics and the Pareto front. "
+        "The heuristic of the M objectives is computed on up to heu_threads threads, "
+        "with trace the time and cost of each solution as it is found are returned as well. "
+        "open_list is \"set\", \"heap\" or \"bucket\" (integer costs only), "
+        "label_costs is \"int\", \"float\" or \"double\" (the storage of the label costs, exact in all cases), "
+        "frontier is \"avl\", \"lex\", \"flat\" or \"ndtree\" (the dominance check data structure). "
+        "The search stops with the solutions found so far once it stores max_labels labels or its labels, open "
+        "list and frontiers take max_memory_mb MB (0 for no limit), the \"termination\" metric tells why it stopped.");
+};
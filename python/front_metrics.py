@@ -0,0 +1,340 @@
+"""
+About: Quality metrics of Pareto fronts (hypervolume, additive epsilon, IGD), used to compare the fronts
+       found by EMOA* and ext-BOA*-lex for the same test.
+Author: Denis Derkach
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+from python.result_file import BinaryResult, is_binary_result, read_text_metrics
+
+# Fronts with at most this many objectives get an exact hypervolume by default, larger ones a Monte Carlo estimate
+HV_EXACT_MAX_DIMS = 3
+
+# Number of samples of the Monte Carlo hypervolume, its standard error is below 0.5 / sqrt(HV_NUM_SAMPLES) of the box
+HV_NUM_SAMPLES = 20000
+
+# Reference point of the hypervolume in normalized objective space, see normalize_fronts
+HV_REFERENCE = 1.1
+
+# Number of rows compared at once in the vectorized pairwise computations, bounds their memory use.
+# The pairwise kernels loop over the objectives of a transposed (num_dims, n) copy of the points, which is
+# an order of magnitude faster than broadcasting (chunk, n, num_dims) arrays.
+CHUNK_SIZE = 1024
+
+# Columns that identify a test across configurations: simple map tests of every walls ratio share the map name and
+# test numbers, but not the map files
+TEST_KEY_COLUMNS = ["map_name", "map_files", "test_number"]
+
+
+def read_front(res_file: str) -> np.ndarray:
+    """
+    Reads the Pareto front of a result file written by run_emoa / run_boalex (text or binary).
+
+    :param res_file: Path to the result file.
+    :return: The (num_solutions, num_dims) matrix of the solution costs.
+    """
+    if is_binary_result(res_file):
+        return np.array(BinaryResult(res_file).front)
+
+    with open(res_file, mode="r") as fres:
+        lines = fres.readlines()
+
+    metrics, start = read_text_metrics(lines)
+    num_solutions = metrics["num_solutions"]
+    costs = [lines[start + 3 * i + 1].strip().strip("[]").rstrip(",").split(",") for i in range(num_solutions)]
+
+    return np.array(costs, dtype=np.float64).reshape(num_solutions, -1)
+
+
+def nondominated(costs: np.ndarray) -> np.ndarray:
+    """
+    Returns a mask of the cost vectors that are not dominated by another one (duplicates are all kept).
+
+    :param costs: A (num_points, num_dims) matrix of cost vectors.
+    :return: A boolean mask of length num_points.
+    """
+    mask = np.ones(len(costs), dtype=bool)
+    columns = np.ascontiguousarray(costs.T)
+
+    for start in range(0, len(costs), CHUNK_SIZE):
+        chunk = columns[:, start:start + CHUNK_SIZE, None]
+        weakly = columns[0][None, :] <= chunk[0]
+        strictly = columns[0][None, :] < chunk[0]
+        for k in range(1, len(columns)):
+            weakly &= columns[k][None, :] <= chunk[k]
+            strictly |= columns[k][None, :] < chunk[k]
+        mask[start:start + CHUNK_SIZE] = ~np.any(weakly & strictly, axis=1)
+
+    return mask
+
+
+def normalize_fronts(*fronts: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Scales fronts of the same test to [0, 1] per objective, using the ideal and nadir point of their union,
+    so that objectives of different units weigh the same. Objectives constant over the union are mapped to 0.
+
+    :param fronts: The fronts, (num_solutions, num_dims) matrices.
+    :return: The normalized fronts, in the same order.
+    """
+    union = np.concatenate(fronts)
+    ideal = union.min(axis=0)
+    span = union.max(axis=0) - ideal
+    span[span == 0] = 1
+
+    return tuple((front - ideal) / span for front in fronts)
+
+
+def additive_epsilon(front: np.ndarray, reference: np.ndarray) -> float:
+    """
+    Returns the additive epsilon indicator: the smallest eps such that every reference point is weakly dominated
+    by some point of front shifted by -eps. It is <= 0 iff front weakly dominates the whole reference.
+
+    :param front: A (n, num_dims) matrix.
+    :param reference: A (m, num_dims) matrix.
+    :return: The indicator value (inf if front is empty, -inf if reference is).
+    """
+    if len(reference) == 0:
+        return -np.inf
+    if len(front) == 0:
+        return np.inf
+
+    columns = np.ascontiguousarray(front.T)
+    worst = -np.inf
+    for start in range(0, len(reference), CHUNK_SIZE):
+        chunk = reference[start:start + CHUNK_SIZE].T[:, :, None]
+        gaps = columns[0][None, :] - chunk[0]
+        for k in range(1, len(columns)):
+            np.maximum(gaps, columns[k][None, :] - chunk[k], out=gaps)
+        worst = max(worst, float(np.min(gaps, axis=1).max()))
+
+    return worst
+
+
+def igd(front: np.ndarray, reference: np.ndarray) -> float:
+    """
+    Returns the inverted generational distance: the mean Euclidean distance of the reference points
+    to their nearest point of front.
+
+    :param front: A (n, num_dims) matrix.
+    :param reference: A (m, num_dims) matrix.
+    :return: The indicator value (inf if front is empty, NaN if reference is).
+    """
+    if len(reference) == 0:
+        return np.nan
+    if len(front) == 0:
+        return np.inf
+
+    columns = np.ascontiguousarray(front.T)
+    total = 0.0
+    for start in range(0, len(reference), CHUNK_SIZE):
+        chunk = reference[start:start + CHUNK_SIZE].T[:, :, None]
+        squared = np.zeros((chunk.shape[1], len(front)))
+        for k in range(len(columns)):
+            squared += (columns[k][None, :] - chunk[k]) ** 2
+        total += np.sqrt(np.min(squared, axis=1)).sum()
+
+    return total / len(reference)
+
+
+def hypervolume(front: np.ndarray, reference_point: np.ndarray, method: str = "auto",
+                num_samples: int = HV_NUM_SAMPLES, seed: int = 0) -> float:
+    """
+    Returns the volume of the region weakly dominated by front and bounded by reference_point (minimization).
+
+    :param front: A (n, num_dims) matrix, points not strictly below reference_point do not contribute.
+    :param reference_point: A vector of length num_dims.
+    :param method: "exact" (recursive slicing, fast for up to 3 objectives, exponential beyond),
+                   "monte_carlo" (uniform samples in the box between the ideal point of front and reference_point)
+                   or "auto" (exact up to HV_EXACT_MAX_DIMS objectives).
+    :param num_samples: Number of samples of the Monte Carlo estimate.
+    :param seed: Seed of the Monte Carlo samples, so repeated scoring gives the same values.
+    :return: The hypervolume.
+    """
+    reference_point = np.asarray(reference_point, dtype=np.float64)
+    front = front[np.all(front < reference_point, axis=1)]
+    if len(front) == 0:
+        return 0.0
+
+    front = front[nondominated(front)]
+    if method == "auto":
+        method = "exact" if front.shape[1] <= HV_EXACT_MAX_DIMS else "monte_carlo"
+
+    if method == "exact":
+        return _hv_exact(np.unique(front, axis=0), reference_point)
+    if method == "monte_carlo":
+        return _hv_monte_carlo(front, reference_point, num_samples, seed)
+
+    raise ValueError(f"unknown hypervolume method {method}")
+
+
+def _hv_exact(front: np.ndarray, reference_point: np.ndarray) -> float:
+    """
+    Exact hypervolume by slicing along the last objective. With more than 2 objectives the points must be
+    non-dominated, the 2-objective sweep also handles dominated ones.
+    """
+    if front.shape[1] == 1:
+        return float(reference_point[0] - front[:, 0].min())
+
+    if front.shape[1] == 2:
+        # sorted by the first objective, the second one decreases along a non-dominated front
+        front = front[np.argsort(front[:, 0])]
+        widths = np.diff(np.append(front[:, 0], reference_point[0]))
+        heights = reference_point[1] - np.minimum.accumulate(front[:, 1])
+        return float(np.dot(widths, heights))
+
+    front = front[np.argsort(front[:, -1])]
+    bounds = np.append(front[1:, -1], reference_point[-1])
+    volume = 0.0
+    for i in range(len(front)):
+        depth = bounds[i] - front[i, -1]
+        if depth <= 0:
+            continue
+        projection = front[:i + 1, :-1]
+        if projection.shape[1] > 2:
+            projection = np.unique(projection[nondominated(projection)], axis=0)
+        volume += depth * _hv_exact(projection, reference_point[:-1])
+
+    return volume
+
+
+def _hv_monte_carlo(front: np.ndarray, reference_point: np.ndarray, num_samples: int, seed: int) -> float:
+    """
+    Monte Carlo estimate of the hypervolume, from uniform samples in the box [ideal point, reference_point].
+    """
+    lower = front.min(axis=0)
+    box = float(np.prod(reference_point - lower))
+    rng = np.random.default_rng(seed)
+
+    columns = np.ascontiguousarray(front.T)
+    hits = 0
+    for start in range(0, num_samples, CHUNK_SIZE):
+        samples = rng.uniform(lower, reference_point, size=(min(CHUNK_SIZE, num_samples - start), len(lower))).T
+        dominated = columns[0][None, :] <= samples[0][:, None]
+        for k in range(1, len(columns)):
+            dominated &= columns[k][None, :] <= samples[k][:, None]
+        hits += int(np.any(dominated, axis=1).sum())
+
+    return box * hits / num_samples
+
+
+def compare_fronts(fronts: dict, hv_method: str = "auto", num_samples: int = HV_NUM_SAMPLES) -> dict:
+    """
+    Computes the quality metrics of the fronts found by several algorithms for the same test.
+
+    The fronts are normalized together (see normalize_fronts), the reference front is the non-dominated part
+    of their union, and the hypervolume is taken up to HV_REFERENCE in every objective.
+
+    :param fronts: A dictionary {algorithm: (num_solutions, num_dims) front}.
+    :param hv_method: The hypervolume method, see hypervolume.
+    :param num_samples: Number of samples of a Monte Carlo hypervolume.
+    :return: A dictionary {algorithm: {"hypervolume", "igd", "epsilon", "epsilon_<other algorithm>"}},
+             where "epsilon" is the additive epsilon to the reference front and "epsilon_<other>" to the front
+             of the other algorithm.
+    """
+    algorithms = list(fronts)
+    normalized = dict(zip(algorithms, normalize_fronts(*(np.asarray(fronts[a], dtype=np.float64)
+                                                          for a in algorithms))))
+    union = np.concatenate(list(normalized.values()))
+    reference = np.unique(union[nondominated(union)], axis=0)
+    reference_point = np.full(union.shape[1], HV_REFERENCE)
+
+    out = dict()
+    for algorithm in algorithms:
+        front = normalized[algorithm]
+        metrics = {
+            "hypervolume": hypervolume(front, reference_point, method=hv_method, num_samples=num_samples),
+            "igd": igd(front, reference),
+            "epsilon": additive_epsilon(front, reference)
+        }
+        for other in algorithms:
+            if other != algorithm:
+                metrics[f"epsilon_{other}"] = additive_epsilon(front, normalized[other])
+        out[algorithm] = metrics
+
+    return out
+
+
+def with_test_key(test_results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the test results with the TEST_KEY_COLUMNS, results recorded without map files get an empty "map_files",
+    so that they are grouped by map name and test number as before.
+
+    :param test_results: A DataFrame of test results.
+    :return: A copy of the test results with a "map_files" column without NaN.
+    """
+    test_results = test_results.copy()
+    if "map_files" not in test_results:
+        test_results["map_files"] = ""
+    test_results["map_files"] = test_results["map_files"].fillna("")
+
+    return test_results
+
+
+def _score_test(args: tuple) -> list:
+    """
+    Scores the result files of one test, a worker of front_metrics_table.
+    """
+    test, res_files, hv_method, num_samples = args
+    fronts = {algorithm: read_front(res_file) for algorithm, res_file in res_files.items()}
+    if any(len(front) == 0 for front in fronts.values()):
+        return []
+
+    rows = []
+    for algorithm, metrics in compare_fronts(fronts, hv_method, num_samples).items():
+        rows.append({**dict(zip(TEST_KEY_COLUMNS, test)), "algorithm": algorithm,
+                     "front_size": len(fronts[algorithm]), **metrics})
+
+    return rows
+
+
+def front_metrics_table(test_results: pd.DataFrame, hv_method: str = "auto", num_samples: int = HV_NUM_SAMPLES,
+                        n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Scores the fronts of all tests that were run by every algorithm and whose result files were kept
+    (py_parallel_api.parallel_run with a results_dir, the paths are in the "result_file" column).
+
+    :param test_results: A DataFrame of test results, tests are told apart by TEST_KEY_COLUMNS.
+    :param hv_method: The hypervolume method, see hypervolume.
+    :param num_samples: Number of samples of a Monte Carlo hypervolume.
+    :param n_jobs: Number of worker processes, tests are scored independently.
+    :return: A DataFrame with one row per test and algorithm: map_name, map_files, test_number, algorithm, front_size,
+             hypervolume, igd, epsilon and epsilon_<other algorithm>. Tests with an empty front are skipped.
+    """
+    algorithms = set(test_results["algorithm"])
+    kept = with_test_key(test_results.dropna(subset=["result_file"]))
+    kept = kept[kept["result_file"].map(os.path.exists)]
+
+    jobs = []
+    for test, runs in kept.groupby(TEST_KEY_COLUMNS):
+        res_files = dict(zip(runs["algorithm"], runs["result_file"]))
+        if set(res_files) == algorithms:
+            jobs.append((test, res_files, hv_method, num_samples))
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            scored = list(executor.map(_score_test, jobs, chunksize=max(1, len(jobs) // (4 * n_jobs))))
+    else:
+        scored = [_score_test(job) for job in jobs]
+
+    return pd.DataFrame([row for rows in scored for row in rows])
+
+
+def add_front_metrics(test_results: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """
+    Adds the columns of front_metrics_table to the test results, NaN for tests that were not scored.
+
+    :param test_results: A DataFrame of test results.
+    :param kwargs: Arguments of front_metrics_table.
+    :return: The test results with the metric columns.
+    """
+    metrics = front_metrics_table(test_results, **kwargs)
+    if metrics.empty:
+        return test_results
+
+    return with_test_key(test_results).merge(metrics.drop(columns="front_size"), on=TEST_KEY_COLUMNS + ["algorithm"],
+                                             how="left")
@@ -0,0 +1,296 @@
+"""
+About: Cross-validation of the Pareto fronts found by EMOA* and ext-BOA*-lex: on every test that did not time out
+       both algorithms must return the same optimal front, and the paths of the solutions must have the reported
+       costs in the map files.
+Author: Denis Derkach
+"""
+
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+from python.front_metrics import CHUNK_SIZE, nondominated
+from python.map_generator import read_map_arcs
+from python.result_file import BinaryResult, is_binary_result, read_text_metrics
+from python.results_journal import MAP_FILES_SEPARATOR
+from python.results_store import load_results
+
+# Absolute and relative tolerance when comparing costs
+COST_ATOL = 1e-6
+COST_RTOL = 1e-9
+
+# Number of solution paths per result file checked against the map files
+NUM_PATH_CHECKS = 10
+
+# Columns of the verification report
+REPORT_COLUMNS = ["map_name", "test_number", "status", "emoa_size", "boa_size", "only_emoa", "only_boa",
+                  "emoa_dominated", "boa_dominated", "paths_checked", "path_errors", "message"]
+
+
+def read_solutions(res_file: str) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Reads the front and the paths of a result file written by run_emoa / run_boalex (text or binary).
+
+    :param res_file: Path to the result file.
+    :return: A tuple (front, paths): the (num_solutions, num_dims) cost matrix and the vertex array of each solution.
+    """
+    if is_binary_result(res_file):
+        result = BinaryResult(res_file)
+        offsets, vertices = result.paths
+        offsets = offsets.astype(np.int64)
+        return np.array(result.front), [np.array(vertices[offsets[k]:offsets[k + 1]])
+                                        for k in range(result.num_solutions)]
+
+    with open(res_file, mode="r") as fres:
+        lines = fres.readlines()
+
+    metrics, start = read_text_metrics(lines)
+    num_solutions = metrics["num_solutions"]
+    costs = [lines[start + 3 * i + 1].strip().strip("[]").rstrip(",").split(",") for i in range(num_solutions)]
+    paths = [np.array(lines[start + 3 * i + 2].split(), dtype=np.int64) for i in range(num_solutions)]
+
+    return np.array(costs, dtype=np.float64).reshape(num_solutions, -1), paths
+
+
+class ArcCosts:
+    """
+    The cost vectors of the arcs of a map, looked up in bulk by (source, target) pairs.
+
+    As in SparseGraph, the last of several arcs between the same vertices holds the cost.
+    """
+
+    def __init__(self, map_files: List[str]):
+        """
+        :param map_files: M .gr files (one per objective) or a single binary .csr graph file.
+        """
+        sources, targets, costs = read_map_arcs(map_files)
+
+        self.num_vertices = int(max(sources.max(initial=0), targets.max(initial=0))) + 1
+        keys = sources * self.num_vertices + targets
+
+        # keep the last arc of each (source, target) pair
+        reverse_keys = keys[::-1]
+        self.keys, first = np.unique(reverse_keys, return_index=True)
+        self.costs = costs[::-1][first]
+
+    def path_cost(self, path: np.ndarray) -> np.ndarray:
+        """
+        :param path: The vertices of a path.
+        :return: The summed cost vector of the path, or None if a step of the path is not an arc of the map.
+        """
+        if len(path) < 2:
+            return np.zeros(self.costs.shape[1])
+        if path.min() < 0 or path.max() >= self.num_vertices:
+            return None
+
+        keys = path[:-1] * self.num_vertices + path[1:]
+        index = np.searchsorted(self.keys, keys)
+        index[index == len(self.keys)] = 0
+        if not np.array_equal(self.keys[index], keys):
+            return None
+
+        return self.costs[index].sum(axis=0)
+
+
+@lru_cache(maxsize=2)
+def load_arc_costs(map_files: Tuple[str, ...]) -> ArcCosts:
+    """
+    Returns the arc costs of a map, loading it only once per worker (tests are grouped by map).
+
+    :param map_files: The map files of the tests.
+    :return: An ArcCosts instance.
+    """
+    return ArcCosts(list(map_files))
+
+
+def _unmatched(front: np.ndarray, other: np.ndarray) -> int:
+    """
+    Returns the number of points of front with no point of other within the cost tolerance.
+    """
+    if len(other) == 0:
+        return len(front)
+
+    matched = np.zeros(len(front), dtype=bool)
+    columns = np.ascontiguousarray(other.T)
+    for start in range(0, len(front), CHUNK_SIZE):
+        chunk = front[start:start + CHUNK_SIZE].T[:, :, None]
+        close = np.ones((chunk.shape[1], len(other)), dtype=bool)
+        for k in range(len(columns)):
+            close &= np.abs(columns[k][None, :] - chunk[k]) <= COST_ATOL + COST_RTOL * np.abs(chunk[k])
+        matched[start:start + CHUNK_SIZE] = np.any(close, axis=1)
+
+    return int((~matched).sum())
+
+
+def _dominated_by(front: np.ndarray, other: np.ndarray) -> int:
+    """
+    Returns the number of points of front dominated by a point of other, beyond the cost tolerance: the point of
+    other is not worse in any objective and better by more than the tolerance in at least one.
+    """
+    if len(front) == 0 or len(other) == 0:
+        return 0
+
+    dominated = np.zeros(len(front), dtype=bool)
+    columns = np.ascontiguousarray(other.T)
+    for start in range(0, len(front), CHUNK_SIZE):
+        chunk = front[start:start + CHUNK_SIZE].T[:, :, None]
+        not_worse = np.ones((chunk.shape[1], len(other)), dtype=bool)
+        better = np.zeros((chunk.shape[1], len(other)), dtype=bool)
+        for k in range(len(columns)):
+            tolerance = COST_ATOL + COST_RTOL * np.abs(chunk[k])
+            not_worse &= columns[k][None, :] <= chunk[k] + tolerance
+            better |= columns[k][None, :] < chunk[k] - tolerance
+        dominated[start:start + CHUNK_SIZE] = np.any(not_worse & better, axis=1)
+
+    return int(dominated.sum())
+
+
+def _check_paths(front: np.ndarray, paths: List[np.ndarray], start: int, goal: int, arc_costs: ArcCosts,
+                 rng: np.random.Generator) -> Tuple[int, List[str]]:
+    """
+    Checks a sample of the solution paths of one result file against the map.
+    """
+    errors = []
+    sample = rng.choice(len(paths), size=min(NUM_PATH_CHECKS, len(paths)), replace=False)
+
+    for k in sample:
+        path = paths[k]
+        if len(path) == 0 or path[0] != start or path[-1] != goal:
+            errors.append(f"path {k} does not lead from {start} to {goal}")
+            continue
+        cost = arc_costs.path_cost(path)
+        if cost is None:
+            errors.append(f"path {k} uses a missing arc")
+        elif not np.allclose(cost, front[k], atol=COST_ATOL, rtol=COST_RTOL):
+            errors.append(f"path {k} costs {cost.tolist()}, reported {front[k].tolist()}")
+
+    return len(sample), errors
+
+
+def verify_test(runs: pd.DataFrame, seed: int = 0) -> dict:
+    """
+    Verifies the emoa and boa runs of one test.
+
+    :param runs: The result rows of the test, with "result_file" and "map_files" columns.
+    :param seed: Seed of the sampled path checks.
+    :return: A report row, see REPORT_COLUMNS. The status is "match", "mismatch" (the fronts differ),
+             "path_error" (a path does not match the map), "timeout" (a run timed out or reached its label or
+             memory budget, its front is partial and only paths are checked)
+             or "missing" (a run or result file is missing).
+    """
+    first = runs.iloc[0]
+    report = {column: 0 for column in REPORT_COLUMNS}
+    report.update({"map_name": first["map_name"], "test_number": first["test_number"], "message": ""})
+
+    by_algorithm = {row["algorithm"]: row for _, row in runs.iterrows()}
+    if set(by_algorithm) != {"emoa", "boa"}:
+        report.update({"status": "missing", "message": f"runs of {sorted(by_algorithm)} only"})
+        return report
+
+    rng = np.random.default_rng(seed)
+    fronts = dict()
+    errors = []
+    try:
+        arc_costs = load_arc_costs(tuple(first["map_files"].split(MAP_FILES_SEPARATOR)))
+        for algorithm, row in by_algorithm.items():
+            front, paths = read_solutions(row["result_file"])
+            fronts[algorithm] = front
+            checked, path_errors = _check_paths(front, paths, int(row["start"]), int(row["goal"]), arc_costs, rng)
+            report["paths_checked"] += checked
+            errors += [f"{algorithm}: {error}" for error in path_errors]
+    except (OSError, ValueError, IndexError) as error:
+        report.update({"status": "missing", "message": str(error)})
+        return report
+
+    report["path_errors"] = len(errors)
+    for algorithm, front in fronts.items():
+        report[f"{algorithm}_size"] = len(front)
+
+    timed_out = any(row["timeout"] != 0 or row.get("status") in ("label-limit", "memory-limit")
+                    for row in by_algorithm.values())
+    if not timed_out:
+        emoa = np.unique(fronts["emoa"][nondominated(fronts["emoa"])], axis=0)
+        boa = np.unique(fronts["boa"][nondominated(fronts["boa"])], axis=0)
+        report["only_emoa"] = _unmatched(emoa, boa)
+        report["only_boa"] = _unmatched(boa, emoa)
+        report["emoa_dominated"] = _dominated_by(emoa, boa)
+        report["boa_dominated"] = _dominated_by(boa, emoa)
+
+    if report["only_emoa"] or report["only_boa"]:
+        report["status"] = "mismatch"
+        errors.insert(0, f"{report['only_emoa']} solutions only in emoa, {report['only_boa']} only in boa")
+    elif errors:
+        report["status"] = "path_error"
+    else:
+        report["status"] = "timeout" if timed_out else "match"
+
+    report["message"] = "; ".join(errors[:3])
+    return report
+
+
+def _verify_tests(args: tuple) -> list:
+    """
+    Verifies a group of tests of the same map, a worker of verify_results.
+    """
+    groups, seed = args
+    return [verify_test(runs, seed) for runs in groups]
+
+
+def verify_results(test_results: pd.DataFrame, n_jobs: int = 1, seed: int = 0) -> pd.DataFrame:
+    """
+    Verifies all tests of a results DataFrame (as returned by py_parallel_api.parallel_run with a results_dir,
+    so that the result files are kept).
+
+    Tests are grouped by map, so each worker process reads a map only once.
+
+    :param test_results: A DataFrame of test results with "result_file" and "map_files" columns.
+    :param n_jobs: Number of worker processes.
+    :param seed: Seed of the sampled path checks.
+    :return: A DataFrame with one report row per test, see verify_test.
+    """
+    test_results = test_results.dropna(subset=["result_file", "map_files"])
+    jobs = []
+
+    for _, map_runs in test_results.groupby("map_files"):
+        groups = [runs for _, runs in map_runs.groupby(["map_name", "test_number"])]
+        chunk_size = max(1, len(groups) // max(1, n_jobs))
+        jobs += [(groups[i:i + chunk_size], seed) for i in range(0, len(groups), chunk_size)]
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            reports = list(executor.map(_verify_tests, jobs))
+    else:
+        reports = [_verify_tests(job) for job in jobs]
+
+    return pd.DataFrame([report for group in reports for report in group], columns=REPORT_COLUMNS)
+
+
+def verify_results_file(input_file: str, output_file: str = None, n_jobs: int = 1,
+                        filters: list = None) -> pd.DataFrame:
+    """
+    Verifies the tests of a results CSV file or a results store and prints a summary.
+
+    :param input_file: Path to the CSV file containing test results, or to a results store.
+    :param output_file: If given, the report rows of the tests that did not pass are saved to this CSV file.
+    :param n_jobs: Number of worker processes.
+    :param filters: Filters of the results read from a results store, e.g. [("map_family", "==", "NY")]
+                    (see results_store.load_results).
+    :return: The report of all tests, see verify_results.
+    """
+    report = verify_results(load_results(input_file, filters=filters), n_jobs=n_jobs)
+    failed = report[~report["status"].isin(["match", "timeout"])]
+
+    print(report["status"].value_counts().to_string())
+    if output_file is not None:
+        failed.to_csv(output_file, index=False)
+
+    return report
+
+
+if __name__ == "__main__":
+    # Example of usage, the results must have been written by parallel_run with a results_dir
+    verify_results_file(input_file="../data_out/NY_results/NY_test_results_final.csv",
+                        output_file="../data_out/NY_results/NY_verification_failures.csv",
+                        n_jobs=4)
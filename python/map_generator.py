@@ -5,7 +5,21 @@ Author: Denis Derkach
 """
 
 import numpy as np
-from typing import List, Dict, Tuple
+from contextlib import ExitStack
+from typing import List, Tuple
+
+# Binary graph files (see SaveCSRGraph in include/graph_io.hpp)
+CSR_GRAPH_MAGIC = b"EMOACSR1"
+CSR_GRAPH_SUFFIX = ".csr"
+
+# Size of the blocks in which .gr files are read
+READ_CHUNK_BYTES = 1 << 24
+
+# Number of edges formatted at once when .gr files are written
+WRITE_CHUNK_EDGES = 1 << 19
+
+# Version of the maps grid_generator generates from a seed, bump it when they change (it is part of the map store keys)
+GRID_GENERATOR_VERSION = 1
 
 
 def print_matrix_as_cards(matrix: List[List[str]]) -> None:
@@ -51,7 +65,77 @@ def get_neighbors(x: int, y: int, width: int, height: int) -> List[Tuple[int, in
     return successors
 
 
-def create_gr_files(weights: List[Dict[Tuple[int, int], int]],
+def _ascii_digits(values: np.ndarray, num_digits: int = None) -> np.ndarray:
+    """
+    Converts non-negative integers to their decimal digits, right-aligned and padded with zero bytes.
+
+    :param values: An array of non-negative integers.
+    :param num_digits: The number of columns, by default the number of digits of the largest value.
+    :return: A uint8 array of shape (len(values), num_digits).
+    """
+    values = np.asarray(values)
+    max_value = int(values.max(initial=0))
+    values = values.astype(np.int32 if max_value < 2 ** 31 else np.int64)
+    if num_digits is None:
+        num_digits = len(str(max_value))
+
+    digits = np.zeros((len(values), num_digits), dtype=np.uint8)
+    digits[:, -1] = values % 10 + ord("0")
+    for k in range(num_digits - 2, -1, -1):
+        values = values // 10
+        # leading zeros stay padding, which is dropped when the lines are written
+        digits[:, k] = np.where(values > 0, values % 10 + ord("0"), 0)
+
+    return digits
+
+
+def _format_edge_lines(sources: np.ndarray, targets: np.ndarray, num_weight_digits: int) -> np.ndarray:
+    """
+    Formats the two arc lines "a source target weight\\n" and "a target source weight\\n" of each edge
+    as rows of a padded byte matrix, with blank weight columns.
+
+    The weight columns are the last num_weight_digits columns before the newline, see _fill_arc_weights.
+
+    :param sources: An array of non-negative integer edge sources.
+    :param targets: An array of non-negative integer edge targets.
+    :param num_weight_digits: The number of weight columns.
+    :return: A uint8 array with two rows per edge.
+    """
+    num_digits = len(str(int(max(sources.max(initial=0), targets.max(initial=0)))))
+    source_digits = _ascii_digits(sources, num_digits)
+    target_digits = _ascii_digits(targets, num_digits)
+
+    lines = np.zeros((len(sources), 2, 2 * num_digits + 4 + num_weight_digits + 1), dtype=np.uint8)
+    lines[:, :, 0] = ord("a")
+    lines[:, :, 1] = ord(" ")
+    lines[:, 0, 2:2 + num_digits] = source_digits
+    lines[:, 1, 2:2 + num_digits] = target_digits
+    lines[:, :, 2 + num_digits] = ord(" ")
+    lines[:, 0, 3 + num_digits:3 + 2 * num_digits] = target_digits
+    lines[:, 1, 3 + num_digits:3 + 2 * num_digits] = source_digits
+    lines[:, :, 3 + 2 * num_digits] = ord(" ")
+    lines[:, :, -1] = ord("\n")
+
+    return lines.reshape(2 * len(sources), -1)
+
+
+def _fill_arc_weights(lines: np.ndarray, weights: np.ndarray, num_weight_digits: int) -> bytes:
+    """
+    Fills the weights into arc lines from _format_edge_lines and joins the lines without the padding.
+
+    :param lines: The padded arc lines, their weight columns are overwritten.
+    :param weights: An array of non-negative integer edge weights, each is used for the two arcs of its edge.
+    :param num_weight_digits: The number of weight columns of the lines.
+    :return: The bytes of all lines, in the given order.
+    """
+    lines[:, -1 - num_weight_digits:-1] = np.repeat(_ascii_digits(weights, num_weight_digits), 2, axis=0)
+
+    return lines.tobytes().translate(None, b"\0")
+
+
+def create_gr_files(sources: np.ndarray,
+                    targets: np.ndarray,
+                    weights: np.ndarray,
                     width: int,
                     height: int,
                     num_dims: int,
@@ -64,7 +148,11 @@ def create_gr_files(weights: List[Dict[Tuple[int, int], int]],
     """
     Creates .gr files for each dimension of the generated graph.
 
-    :param weights: A list of dictionaries containing edge weights for each dimension.
+    Each edge is written as two arcs with the same weight, first from source to target, then back.
+
+    :param sources: An array with the source vertex of each edge.
+    :param targets: An array with the target vertex of each edge.
+    :param weights: An array of shape (num_dims, num_edges) with the weight of each edge in each dimension.
     :param width: The width of the grid.
     :param height: The height of the grid.
     :param num_dims: The number of dimensions (weight sets).
@@ -76,21 +164,130 @@ def create_gr_files(weights: List[Dict[Tuple[int, int], int]],
     :param map_name: The base name for the generated files.
     :return: None
     """
-    for i, dictionary in enumerate(weights):
-        filename = f"{map_name}_{i + 1}.gr"
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(f"{map_name}_{i + 1}.gr", "wb")) for i in range(num_dims)]
+
+        for i, file in enumerate(files):
+            header = ("c Generated map\n"
+                      f"c Size: {width} * {height}, weights in range: 1 to {weight_range - 1}, walls: {walls}, with ratio {walls_ratio}\n"
+                      f"c dim {i + 1} of {num_dims}\n"
+                      "c\n"
+                      f"p sp {num_vertices} {num_edges}\n"
+                      f"c graph contains {num_vertices} nodes and {num_edges} arcs\n"
+                      "c\n")
+            file.write(header.encode())
+
+        num_weight_digits = len(str(int(weights.max(initial=0))))
+
+        for first in range(0, num_edges, WRITE_CHUNK_EDGES):
+            last = first + WRITE_CHUNK_EDGES
+            lines = _format_edge_lines(sources[first:last], targets[first:last], num_weight_digits)
+
+            for i, file in enumerate(files):
+                file.write(_fill_arc_weights(lines, weights[i, first:last], num_weight_digits))
+
+
+def read_gr_file(file_path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reads the arcs of a DIMACS .gr file in blocks, in the order they appear in the file.
+
+    :param file_path: The path to the .gr file.
+    :return: A tuple of arrays (sources, targets, weights).
+    """
+    chunks = []
 
-        with open(filename, "w") as file:
-            file.write("c Generated map\n")
-            file.write(
-                f"c Size: {width} * {height}, weights in range: 1 to {weight_range - 1}, walls: {walls}, with ratio {walls_ratio}\n")
-            file.write(f"c dim {i + 1} of {num_dims}\n")
-            file.write("c\n")
-            file.write(f"p sp {num_vertices} {num_edges}\n")
-            file.write(f"c graph contains {num_vertices} nodes and {num_edges} arcs\n")
-            file.write("c\n")
+    with open(file_path, "rb") as file:
+        while True:
+            lines = file.readlines(READ_CHUNK_BYTES)
+            if not lines:
+                break
 
-            for (x, y), z in dictionary.items():
-                file.write(f"a {x} {y} {z}\n")
+            arcs = b" ".join(line[2:] for line in lines if line.startswith(b"a "))
+            chunks.append(np.fromstring(arcs, sep=" "))
+
+    data = np.concatenate(chunks).reshape(-1, 3) if chunks else np.zeros((0, 3))
+
+    return data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2]
+
+
+def read_map_arcs(map_names_list: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reads the arcs of a map given as M .gr files (one per objective) or as one binary graph file.
+
+    :param map_names_list: A list of paths to the map files.
+    :return: A tuple (sources, targets, costs), costs is an (num_arcs, M) matrix. Arcs of .gr files keep their order,
+             arcs of a binary graph file are ordered by source.
+    """
+    if len(map_names_list) == 1 and map_names_list[0].endswith(CSR_GRAPH_SUFFIX):
+        file_path = map_names_list[0]
+        header = np.fromfile(file_path, dtype=np.uint64, count=3, offset=len(CSR_GRAPH_MAGIC))
+        num_vertices, num_arcs, num_dims = (int(x) for x in header)
+        offset = len(CSR_GRAPH_MAGIC) + header.nbytes
+
+        offsets = np.fromfile(file_path, dtype=np.uint64, count=num_vertices + 1, offset=offset)
+        offset += offsets.nbytes
+        targets = np.fromfile(file_path, dtype=np.int64, count=num_arcs, offset=offset)
+        offset += targets.nbytes
+        costs = np.fromfile(file_path, dtype=np.float64, count=num_arcs * num_dims, offset=offset)
+
+        sources = np.repeat(np.arange(num_vertices, dtype=np.int64), np.diff(offsets).astype(np.int64))
+        return sources, targets, costs.reshape(num_arcs, num_dims)
+
+    sources, targets, weights = read_gr_file(map_names_list[0])
+    costs = [weights]
+
+    for file_path in map_names_list[1:]:
+        dim_sources, dim_targets, dim_weights = read_gr_file(file_path)
+
+        if not (np.array_equal(dim_sources, sources) and np.array_equal(dim_targets, targets)):
+            raise ValueError(f"{file_path} does not have the same arcs as {map_names_list[0]}")
+
+        costs.append(dim_weights)
+
+    return sources, targets, np.stack(costs, axis=1).astype(np.float64)
+
+
+def compile_gr_files(map_names_list: List[str], output_file: str) -> None:
+    """
+    Compiles M .gr files (one per objective) into a single binary graph file in CSR layout.
+
+    The layout is the same as written by the compile_graph executable, so run_emoa and run_boalex
+    memory-map it instead of parsing the .gr files. Arcs keep the order of the .gr files.
+
+    :param map_names_list: A list of paths to the .gr files, one per dimension.
+    :param output_file: The path of the binary graph file, must end with ".csr".
+    :return: None
+    """
+    sources, targets, costs = read_map_arcs(map_names_list)
+    num_vertices = int(max(sources.max(initial=0), targets.max(initial=0))) + 1
+    header = np.array([num_vertices, len(sources), len(map_names_list)], dtype=np.uint64)
+
+    with open(output_file, "wb") as file:
+        file.write(CSR_GRAPH_MAGIC)
+        file.write(header.tobytes())
+
+        for keys, adjacent in ((sources, targets), (targets, sources)):
+            order = np.argsort(keys, kind="stable")
+            offsets = np.zeros(num_vertices + 1, dtype=np.uint64)
+            offsets[1:] = np.cumsum(np.bincount(keys, minlength=num_vertices))
+
+            file.write(offsets.tobytes())
+            file.write(adjacent[order].astype(np.int64).tobytes())
+            file.write(np.ascontiguousarray(costs[order]).tobytes())
+
+
+def get_num_dims(map_names_list: List[str]) -> int:
+    """
+    Returns the number of objectives of a map given as M .gr files or as one binary graph file.
+
+    :param map_names_list: A list of paths to the map files.
+    :return: The number of objectives.
+    """
+    if len(map_names_list) == 1 and map_names_list[0].endswith(CSR_GRAPH_SUFFIX):
+        header = np.fromfile(map_names_list[0], dtype=np.uint64, count=3, offset=len(CSR_GRAPH_MAGIC))
+        return int(header[2])
+
+    return len(map_names_list)
 
 
 def grid_generator(width: int = 10,
@@ -99,7 +296,8 @@ def grid_generator(width: int = 10,
                    weight_range: int = 11,
                    walls: bool = False,
                    walls_ratio: float = 0.2,
-                   map_name: str = "map.txt") -> List[List[str]]:
+                   map_name: str = "map.txt",
+                   seed: int = None) -> List[List[str]]:
     """
     Generates a grid with optional walls and random weights.
 
@@ -110,8 +308,10 @@ def grid_generator(width: int = 10,
     :param walls: Indicates if walls should be included in the generated map.
     :param walls_ratio: The ratio of walls to total vertices in the generated map.
     :param map_name: The base name for generated .gr files.
+    :param seed: Seed of the walls and weights, the global NumPy random state is used if None.
     :return: A 2D list representing the generated grid.
     """
+    rng = np.random.RandomState(seed) if seed is not None else np.random
 
     # Calculate number of edges based on dimensions
     num_edges_1 = ((width - 2) + (height - 2)) * 2 * 3
@@ -123,47 +323,38 @@ def grid_generator(width: int = 10,
 
     # Generate wall positions if required
     if walls:
-        walls_list = np.random.choice(range(2, num_vertices - 1), size=round(num_vertices * walls_ratio), replace=False)
+        walls_list = rng.choice(range(2, num_vertices - 1), size=round(num_vertices * walls_ratio), replace=False)
     else:
         walls_list = []
 
     # Generate random weights
-    random_weights = np.random.randint(1, weight_range, size=(num_dims, num_edges))
-
-    list_of_weights = [{} for _ in range(num_dims)]
-
-    curr_edge = 0
-    generated_map = [[] for _ in range(height)]
-
-    # Populate the grid and generate weights
-    for j in range(height):
-        for i in range(width):
-            vertex_number = j * width + i + 1
-
-            if vertex_number in walls_list:
-                generated_map[j].append("#")
-                continue
+    random_weights = rng.randint(1, weight_range, size=(num_dims, num_edges))
 
-            generated_map[j].append("*")
+    # Vertices are numbered from 1 in row-major order, index 0 is unused
+    is_wall = np.zeros(num_vertices + 1, dtype=bool)
+    is_wall[np.asarray(walls_list, dtype=np.int64)] = True
 
-            neighbors = get_neighbors(i, j, width, height)
+    vertices = np.arange(1, num_vertices + 1, dtype=np.int64)
+    x = (vertices - 1) % width
+    y = (vertices - 1) // width
 
-            for new_x, new_y in neighbors:
-                new_vertex_number = new_y * width + new_x + 1
+    # Every free vertex gets an edge to its upper, then to its right free neighbor
+    edge_sources = np.repeat(vertices, 2)
+    edge_targets = np.stack([vertices + width, vertices + 1], axis=1).ravel()
+    is_edge = np.stack([y + 1 < height, x + 1 < width], axis=1).ravel()
+    is_edge &= ~is_wall[edge_sources]
+    is_edge[is_edge] &= ~is_wall[edge_targets[is_edge]]
 
-                if (vertex_number, new_vertex_number) not in list_of_weights[0] and new_vertex_number not in walls_list:
-                    for n in range(num_dims):
-                        curr_weight = int(random_weights[n][curr_edge])
-                        list_of_weights[n][(vertex_number, new_vertex_number)] = curr_weight
-                        list_of_weights[n][(new_vertex_number, vertex_number)] = curr_weight
-                    curr_edge += 1
+    edge_sources = edge_sources[is_edge]
+    edge_targets = edge_targets[is_edge]
+    num_edges = len(edge_sources)
 
-    num_edges = int(len(list_of_weights[0]) / 2)
+    create_gr_files(edge_sources, edge_targets, random_weights[:, :num_edges], width, height, num_dims,
+                    weight_range, walls, walls_ratio, num_vertices, num_edges, map_name)
 
-    create_gr_files(list_of_weights, width, height, num_dims, weight_range,
-                    walls, walls_ratio, num_vertices, num_edges, map_name)
+    generated_map = np.where(is_wall[1:], "#", "*").reshape(height, width)
 
-    return generated_map[::-1]
+    return generated_map[::-1].tolist()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+"""
+About: Content-addressed store of generated grid maps: every map is kept once under a hash of its generation
+       parameters and seed, and generated only the first time it is asked for.
+Author: Denis Derkach
+"""
+
+import os
+import glob
+import json
+import uuid
+import shutil
+import hashlib
+import pandas as pd
+from typing import List
+
+from python.map_generator import GRID_GENERATOR_VERSION, grid_generator
+
+# Default location of the store, next to the maps generated before it
+MAP_STORE_PATH = "../data/generated_maps/"
+
+# Name of the file with the generation parameters of a stored map
+MAP_METADATA_FILE = "map.json"
+
+
+def map_parameters(width: int, height: int, num_dims: int, weight_range: int = 11, walls: bool = False,
+                   walls_ratio: float = 0.0, seed: int = 0) -> dict:
+    """
+    Returns the parameters a generated map is identified by. Without walls the walls ratio does not change the map,
+    so it is 0.
+
+    :return: A dict of the parameters, with the version of grid_generator.
+    """
+    return {"width": int(width), "height": int(height), "num_dims": int(num_dims), "weight_range": int(weight_range),
+            "walls": bool(walls), "walls_ratio": float(walls_ratio) if walls else 0.0, "seed": int(seed),
+            "generator_version": GRID_GENERATOR_VERSION}
+
+
+def map_key(parameters: dict) -> str:
+    """
+    :param parameters: The parameters of a map, see map_parameters.
+    :return: The hex key of the map.
+    """
+    return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode()).hexdigest()[:20]
+
+
+class MapStore:
+    """
+    A directory of generated maps, each in NUM_dims/PERCENT_walls_ratio/KEY/ (map_1.gr ... map_M.gr and map.json),
+    so that the results of the maps still tell their walls percentage (see results_store.walls_percentage).
+
+    A map is generated in a temporary directory which is then renamed to its key, so concurrent generators of the
+    same map never see a partial one: the first rename wins and the others drop their copy.
+    """
+
+    def __init__(self, path: str = MAP_STORE_PATH):
+        """
+        :param path: Path to the store directory, created on the first generated map.
+        """
+        self.path = path
+
+    def map_dir(self, parameters: dict) -> str:
+        """
+        :param parameters: The parameters of a map, see map_parameters.
+        :return: The directory of the map.
+        """
+        return os.path.join(self.path, f"{parameters['num_dims']}_dims",
+                            f"{int(parameters['walls_ratio'] * 100)}_walls_ratio", map_key(parameters))
+
+    def get(self, width: int, height: int, num_dims: int, weight_range: int = 11, walls: bool = False,
+            walls_ratio: float = 0.0, seed: int = 0) -> List[str]:
+        """
+        Returns the .gr files of a map, generating it with grid_generator if it is not in the store yet.
+
+        :param width: The width of the grid.
+        :param height: The height of the grid.
+        :param num_dims: The number of dimensions (weight sets).
+        :param weight_range: The range of weights for edges.
+        :param walls: Indicates if walls should be included in the map.
+        :param walls_ratio: The ratio of walls to total vertices.
+        :param seed: Seed of the walls and weights.
+        :return: The paths to the .gr files, one per dimension.
+        """
+        parameters = map_parameters(width, height, num_dims, weight_range, walls, walls_ratio, seed)
+        map_dir = self.map_dir(parameters)
+        map_files = [os.path.join(map_dir, f"map_{dim}.gr") for dim in range(1, num_dims + 1)]
+
+        if os.path.isdir(map_dir):
+            return map_files
+
+        os.makedirs(os.path.dirname(map_dir), exist_ok=True)
+        tmp_dir = f"{map_dir}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_dir)
+
+        try:
+            grid_generator(width=width, height=height, num_dims=num_dims, weight_range=weight_range, walls=walls,
+                           walls_ratio=parameters["walls_ratio"], map_name=os.path.join(tmp_dir, "map"), seed=seed)
+            with open(os.path.join(tmp_dir, MAP_METADATA_FILE), mode="w") as file:
+                json.dump(parameters, file)
+            os.rename(tmp_dir, map_dir)
+        except OSError:
+            # another generator stored the same map first
+            if not os.path.isdir(map_dir):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        return map_files
+
+    def maps(self) -> pd.DataFrame:
+        """
+        :return: A DataFrame with the parameters, key and directory of every stored map.
+        """
+        records = []
+        for file_path in glob.glob(os.path.join(self.path, "*_dims", "*_walls_ratio", "*", MAP_METADATA_FILE)):
+            with open(file_path, mode="r") as file:
+                parameters = json.load(file)
+            records.append({**parameters, "key": map_key(parameters), "map_dir": os.path.dirname(file_path)})
+
+        return pd.DataFrame.from_records(records)
@@ -0,0 +1,318 @@
+"""
+About: Difficulty of (start, goal) pairs from single-objective distances and hop counts, cached on disk per goal,
+       and a timeout model calibrated on prior results, used to generate difficulty-stratified tests.
+Author: Denis Derkach
+"""
+
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import List, Tuple
+
+from python.map_generator import read_map_arcs
+
+# Directory of the cached distance tables, one file per map and goal
+DISTANCE_CACHE_PATH = "../data_out/distance_cache/"
+
+# The feature the difficulty buckets are made of, see pair_features
+DIFFICULTY_FEATURE = "hops"
+
+# Seed of the goals of the candidate pairs, see sample_candidate_pairs
+GOALS_SEED = 0
+
+
+class ReverseGraph:
+    """
+    The in-arcs of every vertex of a map in CSR layout, for backward searches from a goal.
+    """
+
+    def __init__(self, map_files: List[str]):
+        """
+        :param map_files: M .gr files (one per objective) or a single binary .csr graph file.
+        """
+        sources, targets, costs = read_map_arcs(map_files)
+
+        self.num_vertices = int(max(sources.max(initial=0), targets.max(initial=0))) + 1
+        self.num_dims = costs.shape[1]
+
+        order = np.argsort(targets, kind="stable")
+        self.offsets = np.zeros(self.num_vertices + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum(np.bincount(targets, minlength=self.num_vertices))
+        self.sources = sources[order]
+        self.costs = np.ascontiguousarray(costs[order].T)
+
+    def distances_to(self, goal: int, weights: np.ndarray) -> np.ndarray:
+        """
+        Computes the shortest distances of all vertices to the goal with a frontier-based Bellman-Ford search:
+        every round relaxes the in-arcs of the vertices improved in the previous one, all at once.
+
+        :param goal: The goal vertex.
+        :param weights: The weight of each in-arc, in the order of self.sources.
+        :return: The distance of every vertex to the goal, inf if it can not reach it.
+        """
+        dist = np.full(self.num_vertices, np.inf)
+        dist[goal] = 0.0
+        frontier = np.array([goal], dtype=np.int64)
+
+        while len(frontier) > 0:
+            starts = self.offsets[frontier]
+            counts = self.offsets[frontier + 1] - starts
+            if counts.sum() == 0:
+                break
+
+            # indices of the in-arcs of all frontier vertices
+            arcs = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            candidates = np.repeat(dist[frontier], counts) + weights[arcs]
+            vertices = self.sources[arcs]
+
+            improved = candidates < dist[vertices]
+            vertices, candidates = vertices[improved], candidates[improved]
+            np.minimum.at(dist, vertices, candidates)
+            frontier = np.unique(vertices)
+
+        return dist
+
+
+@lru_cache(maxsize=2)
+def load_reverse_graph(map_files: Tuple[str, ...]) -> ReverseGraph:
+    """
+    Returns the reverse graph of a map, loading it only once per process.
+
+    :param map_files: The map files.
+    :return: A ReverseGraph.
+    """
+    return ReverseGraph(list(map_files))
+
+
+def map_key(map_files: List[str]) -> str:
+    """
+    Returns a key of the map files (paths, sizes and modification times), which changes when a file is rewritten.
+
+    :param map_files: The map files.
+    :return: A hex string.
+    """
+    digest = hashlib.sha1()
+    for file_path in map_files:
+        stat = os.stat(file_path)
+        digest.update(f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+
+    return digest.hexdigest()[:16]
+
+
+def goal_distances(map_files: List[str], goal: int, cache_dir: str = DISTANCE_CACHE_PATH) -> np.ndarray:
+    """
+    Returns the distances of all vertices to a goal in each objective and in hops, from the cache if it is there.
+
+    :param map_files: The map files.
+    :param goal: The goal vertex.
+    :param cache_dir: Directory of the distance cache, None to not cache.
+    :return: An (M + 1, num_vertices) float32 matrix, the last row are the hop counts (inf if unreachable).
+    """
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = os.path.join(cache_dir, f"{map_key(map_files)}_{goal}.npy")
+        if os.path.exists(cache_file):
+            return np.load(cache_file)
+
+    graph = load_reverse_graph(tuple(map_files))
+    rows = [graph.distances_to(goal, graph.costs[dim]) for dim in range(graph.num_dims)]
+    rows.append(graph.distances_to(goal, np.ones(len(graph.sources))))
+    distances = np.array(rows, dtype=np.float32)
+
+    if cache_file is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(cache_file + ".tmp.npy", distances)
+        os.replace(cache_file + ".tmp.npy", cache_file)
+
+    return distances
+
+
+def pair_features(map_files: List[str], starts: np.ndarray, goals: np.ndarray,
+                  cache_dir: str = DISTANCE_CACHE_PATH) -> pd.DataFrame:
+    """
+    Returns the single-objective distances and the hop count of (start, goal) pairs.
+
+    :param map_files: The map files.
+    :param starts: The start vertices.
+    :param goals: The goal vertices.
+    :param cache_dir: Directory of the distance cache, see goal_distances.
+    :return: A DataFrame with the columns start, goal, dist_1 ... dist_M and hops (inf if unreachable).
+    """
+    pairs = pd.DataFrame({"start": np.asarray(starts, dtype=np.int64), "goal": np.asarray(goals, dtype=np.int64)})
+    features = np.full((len(pairs), 0), np.nan)
+
+    for goal, rows in pairs.groupby("goal").indices.items():
+        distances = goal_distances(map_files, goal, cache_dir)[:, pairs["start"].values[rows]].T
+        if features.shape[1] == 0:
+            features = np.full((len(pairs), distances.shape[1]), np.nan)
+        features[rows] = distances
+
+    num_dims = features.shape[1] - 1
+    for dim in range(num_dims):
+        pairs[f"dist_{dim + 1}"] = features[:, dim]
+    pairs["hops"] = features[:, num_dims] if num_dims >= 0 else np.nan
+
+    return pairs
+
+
+def sample_candidate_pairs(map_files: List[str], num_goals: int, starts_per_goal: int, left_vertex_boundary: int,
+                           right_vertex_boundary: int, cache_dir: str = DISTANCE_CACHE_PATH,
+                           goals_seed: int = GOALS_SEED) -> pd.DataFrame:
+    """
+    Samples candidate pairs around a few random goals, so that only num_goals distance tables are needed,
+    and keeps those with a path from start to goal. The goals come from their own seed, so that later
+    generations reuse the cached tables, the starts from the global NumPy random state.
+
+    :param map_files: The map files.
+    :param num_goals: Number of goals.
+    :param starts_per_goal: Number of random starts per goal.
+    :param left_vertex_boundary: The minimum vertex index.
+    :param right_vertex_boundary: The maximum vertex index.
+    :param cache_dir: Directory of the distance cache, see goal_distances.
+    :param goals_seed: Seed of the goals.
+    :return: The features of the reachable candidate pairs, see pair_features.
+    """
+    goals = np.random.RandomState(goals_seed).randint(left_vertex_boundary, right_vertex_boundary + 1, size=num_goals)
+    starts = np.random.randint(left_vertex_boundary, right_vertex_boundary + 1, size=(num_goals, starts_per_goal))
+    pairs = pair_features(map_files, starts.ravel(), np.repeat(goals, starts_per_goal), cache_dir)
+
+    return pairs[np.isfinite(pairs["hops"]) & (pairs["hops"] > 0)].reset_index(drop=True)
+
+
+def _fit_logistic(x: np.ndarray, y: np.ndarray, ridge: float = 1e-3, num_iterations: int = 50) -> np.ndarray:
+    """
+    Fits p(y = 1) = 1 / (1 + exp(-(a + b * x))) with Newton's method, the small ridge keeps the coefficients
+    finite when the classes are separable.
+    """
+    features = np.column_stack([np.ones_like(x), x])
+    coefficients = np.zeros(2)
+
+    for _ in range(num_iterations):
+        p = 1.0 / (1.0 + np.exp(-features @ coefficients))
+        gradient = features.T @ (y - p) - ridge * coefficients
+        hessian = (features * (p * (1 - p))[:, None]).T @ features + ridge * np.eye(2)
+        step = np.linalg.solve(hessian, gradient)
+        coefficients += step
+        if np.abs(step).max() < 1e-8:
+            break
+
+    return coefficients
+
+
+class TimeoutModel:
+    """
+    Predicts, per algorithm, the probability that a test times out and its runtime when it does not,
+    from the log hop count of its pair. Calibrated on prior results of the same map.
+    """
+
+    def __init__(self, history: pd.DataFrame, map_files: List[str], cache_dir: str = DISTANCE_CACHE_PATH):
+        """
+        :param history: Prior results (start, goal, algorithm, timeout, heuristic_time, search_time columns).
+        :param map_files: The map files of the prior results.
+        :param cache_dir: Directory of the distance cache, see goal_distances.
+        """
+        history = history.dropna(subset=["timeout"])
+        features = pair_features(map_files, history["start"].values, history["goal"].values, cache_dir)
+        reachable = np.isfinite(features["hops"].values) & (features["hops"].values > 0)
+
+        history = history[reachable]
+        x = np.log(features["hops"].values[reachable])
+        self.timeout_coefficients = dict()
+        self.runtime_coefficients = dict()
+
+        for algorithm in history["algorithm"].unique():
+            rows = (history["algorithm"] == algorithm).values
+            timeout = (history["timeout"].values[rows] != 0).astype(float)
+            self.timeout_coefficients[algorithm] = _fit_logistic(x[rows], timeout)
+
+            solved = rows & (history["timeout"].values == 0)
+            runtime = (history["heuristic_time"] + history["search_time"]).values[solved]
+            if solved.sum() >= 2:
+                self.runtime_coefficients[algorithm] = np.polyfit(x[solved], np.log(np.maximum(runtime, 1e-3)), 1)
+            else:
+                self.runtime_coefficients[algorithm] = np.array([0.0, np.log(max(runtime.mean(), 1e-3))]) \
+                    if solved.any() else None
+
+    def timeout_probability(self, hops: np.ndarray, algorithm: str) -> np.ndarray:
+        """
+        :param hops: Hop counts of pairs.
+        :param algorithm: Algorithm name, "emoa" or "boa".
+        :return: The probability that the algorithm times out on each pair.
+        """
+        a, b = self.timeout_coefficients[algorithm]
+        return 1.0 / (1.0 + np.exp(-(a + b * np.log(hops))))
+
+    def expected_cost(self, hops: np.ndarray, time_limit: float) -> np.ndarray:
+        """
+        Returns the expected wall time of the tests of all calibrated algorithms on each pair: the time limit
+        if a test times out, the predicted runtime (at most the time limit) otherwise.
+
+        :param hops: Hop counts of pairs.
+        :param time_limit: The time limit of the tests.
+        :return: The expected cost in seconds of each pair.
+        """
+        cost = np.zeros(len(hops))
+
+        for algorithm, coefficients in self.runtime_coefficients.items():
+            p = self.timeout_probability(hops, algorithm)
+            runtime = np.minimum(np.exp(np.polyval(coefficients, np.log(hops))), time_limit) \
+                if coefficients is not None else time_limit
+            cost += p * time_limit + (1 - p) * runtime
+
+        return cost
+
+
+def stratified_pairs(map_files: List[str], num_tests: int = 50, num_buckets: int = 5, history: pd.DataFrame = None,
+                     budget_s: float = None, time_limit: float = 600, num_goals: int = 50, starts_per_goal: int = 200,
+                     left_vertex_boundary: int = 1, right_vertex_boundary: int = 264346,
+                     cache_dir: str = DISTANCE_CACHE_PATH) -> pd.DataFrame:
+    """
+    Samples (start, goal) pairs stratified into difficulty buckets: quantiles of the hop count of random
+    candidate pairs, so each bucket holds the same share of the random pairs.
+
+    Without a budget, every bucket gets num_tests / num_buckets pairs. With a budget, a TimeoutModel calibrated
+    on the history predicts the cost of every candidate, and every bucket gets as many pairs as fit into
+    budget_s / num_buckets, so the compute is spent evenly across the difficulty range.
+
+    :param map_files: The map files.
+    :param num_tests: Number of pairs without a budget.
+    :param num_buckets: Number of difficulty buckets.
+    :param history: Prior results of the same map and time limit, needed with a budget.
+    :param budget_s: Compute budget in seconds (wall time of all algorithms), or None.
+    :param time_limit: The time limit of the tests.
+    :param num_goals: Number of goals of the candidate pairs, see sample_candidate_pairs.
+    :param starts_per_goal: Number of starts per goal of the candidate pairs.
+    :param left_vertex_boundary: The minimum vertex index.
+    :param right_vertex_boundary: The maximum vertex index.
+    :param cache_dir: Directory of the distance cache, see goal_distances.
+    :return: A DataFrame with the pair features (see pair_features), the "bucket" of every pair and, with a history,
+             the "timeout_probability_<algorithm>" and "expected_cost" predicted by the TimeoutModel.
+    """
+    if budget_s is not None and history is None:
+        raise ValueError("a compute budget needs a history to predict the cost of the tests")
+
+    candidates = sample_candidate_pairs(map_files, num_goals, starts_per_goal, left_vertex_boundary,
+                                        right_vertex_boundary, cache_dir)
+    difficulty = candidates[DIFFICULTY_FEATURE].values
+    edges = np.quantile(difficulty, np.linspace(0, 1, num_buckets + 1)[1:-1])
+    candidates["bucket"] = np.searchsorted(edges, difficulty, side="right")
+
+    if history is not None:
+        model = TimeoutModel(history, map_files, cache_dir)
+        for algorithm in model.timeout_coefficients:
+            candidates[f"timeout_probability_{algorithm}"] = model.timeout_probability(candidates["hops"].values,
+                                                                                       algorithm)
+        candidates["expected_cost"] = model.expected_cost(candidates["hops"].values, time_limit)
+
+    selected = []
+    for bucket, pairs in candidates.groupby("bucket"):
+        if budget_s is not None:
+            count = int(budget_s / num_buckets / pairs["expected_cost"].mean())
+        else:
+            count = num_tests // num_buckets + (bucket < num_tests % num_buckets)
+        rows = np.random.choice(len(pairs), size=min(count, len(pairs)), replace=False)
+        selected.append(pairs.iloc[rows])
+
+    return pd.concat(selected, ignore_index=True)
@@ -3,11 +3,26 @@ About: Python script for generating tables and plots from NY city map test resul
 Author: Denis Derkach
 """
 
+import math
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from python.front_metrics import TEST_KEY_COLUMNS, front_metrics_table, nondominated, with_test_key
+from python.result_file import read_solution_trace
+from python.results_store import RESULTS_STORE_PATH, ResultsStore, load_results
+
+ALGORITHM_LABELS = {"emoa": "EMOA*", "boa": "ext-BOA*-lex"}
+ALGORITHM_COLORS = {"emoa": "red", "boa": "blue"}
+
+# Columns read by load_solution_traces
+TRACE_COLUMNS = ["map_name", "map_files", "test_number", "algorithm", "trace_file"]
+
+# Filters selecting the NY tests of a results store (see results_store.load_results)
+NY_FILTERS = [("map_family", "==", "NY")]
+
 
 def ny_table_generator(input_file: str = "../data_out/NY_results/NY_test_results_final.csv",
                        output_file: str = "../data_out/plots_and_tables/NY_successful_runs_table.csv") -> pd.DataFrame:
@@ -16,11 +31,12 @@ def ny_table_generator(input_file: str = "../data_out/NY_results/NY_test_results
 
     The table includes the number of successful runs and average search times.
 
-    :param input_file: Path to the input CSV file containing test results.
+    :param input_file: Path to the input CSV file containing test results, or to a results store.
     :param output_file: Path to the output CSV file where the comparison table will be saved.
     :return: A DataFrame containing the comparison data.
     """
-    test_results = pd.read_csv(input_file)
+    test_results = load_results(input_file, columns=["test_number", "algorithm", "timeout", "search_time"],
+                                filters=NY_FILTERS)
     comparison_data = []
     algorithms = ["emoa", "boa"]
 
@@ -50,28 +66,19 @@ def ny_table_generator_2(input_file: str, output_file: str) -> None:
 
     The ratio is calculated between the number of solutions found by EMOA and BOA.
 
-    :param input_file: Path to the input CSV file containing test results.
+    :param input_file: Path to the input CSV file containing test results, or to a results store.
     :param output_file: Path to the output CSV file where the statistics will be saved.
     :return: None
     """
-    test_results = pd.read_csv(input_file)
+    test_results = load_results(input_file, columns=["test_number", "algorithm", "num_solutions"],
+                                filters=NY_FILTERS + [("timeout", "==", 1)])
 
-    filtered_results = test_results[test_results["timeout"] == 1]
-    valid_tests = filtered_results.groupby("test_number").filter(lambda x: set(x["algorithm"]) == {"emoa", "boa"})
+    # one row per test, with the number of solutions of each algorithm, for the tests where both timed out
+    solutions = test_results.groupby(["test_number", "algorithm"])["num_solutions"].first().unstack("algorithm")
+    solutions = solutions.reindex(columns=["emoa", "boa"]).dropna()
 
-    ratios = []
-
-    for test_number in valid_tests["test_number"].unique():
-        emoa_solutions = \
-            valid_tests[(valid_tests["test_number"] == test_number) & (valid_tests["algorithm"] == "emoa")][
-                "num_solutions"].values[0]
-        boa_solutions = valid_tests[(valid_tests["test_number"] == test_number) & (valid_tests["algorithm"] == "boa")][
-            "num_solutions"].values[0]
-
-        ratio = emoa_solutions / boa_solutions
-        ratios.append({"test_number": test_number, "solution_ratio": ratio})
-
-    ratios_df = pd.DataFrame(ratios)
+    ratios_df = pd.DataFrame({"test_number": solutions.index,
+                              "solution_ratio": (solutions["emoa"] / solutions["boa"]).astype(float).values})
 
     statistics = {
         "min": round(ratios_df["solution_ratio"].min(), 2),
@@ -84,9 +91,315 @@ def ny_table_generator_2(input_file: str, output_file: str) -> None:
     stats_df.to_csv(output_file, index=False)
 
 
+def resources_table_generator(input_file: str = "../data_out/NY_results/NY_test_results_final.csv",
+                              output_file: str = "../data_out/plots_and_tables/NY_resources_table.csv",
+                              node_memory_gb: float = None, filters: list = None) -> pd.DataFrame:
+    """
+    Generates a table of the resources used per run, for each map, dimension and algorithm.
+
+    The table includes the peak RSS, CPU and wall times of the runs (see process_resources.RESOURCE_COLUMNS),
+    and, if the memory of a node is given, how many runs fit on it at once at the highest observed peak RSS.
+
+    :param input_file: Path to the input CSV file containing test results, or to a results store.
+    :param output_file: Path to the output CSV file where the table will be saved.
+    :param node_memory_gb: Memory of a node in GB, or None to skip the number of workers per node.
+    :param filters: Filters of the results read from a results store, e.g. NY_FILTERS (see load_results).
+    :return: A DataFrame containing the table.
+    """
+    test_results = load_results(input_file, columns=["map_name", "num_dims", "algorithm", "peak_rss_mb", "user_time",
+                                                     "sys_time", "wall_time"], filters=filters)
+    test_results = test_results.dropna(subset=["peak_rss_mb"])
+    test_results["cpu_time"] = test_results["user_time"] + test_results["sys_time"]
+
+    rows = []
+
+    for (map_name, num_dims, algorithm), runs in test_results.groupby(["map_name", "num_dims", "algorithm"]):
+        row = {
+            "Map": map_name,
+            "Dimensions": num_dims,
+            "Algorithm": "EMOA*" if algorithm == "emoa" else "ext-BOA*-lex",
+            "Runs": len(runs),
+            "Avg Peak RSS (MB)": round(runs["peak_rss_mb"].mean(), 1),
+            "Median Peak RSS (MB)": round(runs["peak_rss_mb"].median(), 1),
+            "Max Peak RSS (MB)": round(runs["peak_rss_mb"].max(), 1),
+            "Avg CPU Time": round(runs["cpu_time"].mean(), 2),
+            "Avg Wall Time": round(runs["wall_time"].mean(), 2),
+            "Max Wall Time": round(runs["wall_time"].max(), 2)
+        }
+        if node_memory_gb is not None:
+            row["Workers per Node"] = math.floor(node_memory_gb * 1024 / runs["peak_rss_mb"].max())
+
+        rows.append(row)
+
+    resources_table = pd.DataFrame(rows)
+    resources_table.to_csv(output_file, index=False)
+
+    return resources_table
+
+
+def plot_peak_rss_vs_generated(input_file: str = "../data_out/NY_results/NY_test_results_final.csv",
+                               output_file: str = "../data_out/plots_and_tables/NY_peak_rss_vs_generated.png",
+                               filters: list = None) -> None:
+    """
+    Plots the peak RSS of the runs against the number of generated labels, for each algorithm.
+
+    :param input_file: Path to the input CSV file containing test results, or to a results store.
+    :param output_file: Path to the output image file where the plot will be saved.
+    :param filters: Filters of the results read from a results store, e.g. NY_FILTERS (see load_results).
+    :return: None
+    """
+    test_results = load_results(input_file, columns=["algorithm", "n_generated", "peak_rss_mb"], filters=filters)
+    test_results = test_results.dropna(subset=["peak_rss_mb"])
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    for algorithm, color in [("emoa", "red"), ("boa", "blue")]:
+        subset = test_results[test_results["algorithm"] == algorithm]
+        ax.scatter(subset["n_generated"], subset["peak_rss_mb"], c=color, alpha=0.7, s=15,
+                   label="EMOA*" if algorithm == "emoa" else "ext-BOA*-lex")
+
+    ax.set_xlabel("Number of Generated Labels", fontsize=20)
+    ax.set_ylabel("Peak RSS (MB)", fontsize=20)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.legend(fontsize=15)
+    ax.tick_params(axis="both", labelsize=16)
+    ax.grid(True, which="both", ls="-", alpha=0.2)
+
+    plt.savefig(output_file,
+                dpi=400,
+                bbox_inches="tight")
+
+
+def load_solution_traces(test_results: pd.DataFrame) -> dict:
+    """
+    Reads the solution traces of the tests run with trace=True (see py_parallel_api.test_system).
+
+    :param test_results: A DataFrame of test results with a "trace_file" column.
+    :return: A dictionary {(map_name, map_files, test_number): {algorithm: (times, costs)}} (see
+             front_metrics.TEST_KEY_COLUMNS), tests without a trace are skipped.
+    """
+    traces = dict()
+
+    for _, row in with_test_key(test_results.dropna(subset=["trace_file"])).iterrows():
+        if os.path.exists(row["trace_file"]):
+            test = tuple(row[column] for column in TEST_KEY_COLUMNS)
+            traces.setdefault(test, dict())[row["algorithm"]] = read_solution_trace(row["trace_file"])
+
+    return traces
+
+
+def _cover_times(times: np.ndarray, costs: np.ndarray, reference: np.ndarray, chunk_size: int = 1024) -> np.ndarray:
+    """
+    Returns, for each reference cost vector, the earliest time at which a traced solution weakly dominates it
+    (inf if none does).
+    """
+    out = np.full(len(reference), np.inf)
+    if len(times) == 0:
+        return out
+
+    for start in range(0, len(reference), chunk_size):
+        covers = np.all(costs[None, :, :] <= reference[start:start + chunk_size, None, :], axis=2)
+        out[start:start + chunk_size] = np.where(covers, times[None, :], np.inf).min(axis=1)
+
+    return out
+
+
+def plot_time_to_kth_solution(input_file: str = "../data_out/NY_results/NY_test_results_final.csv",
+                              output_file: str = "../data_out/plots_and_tables/NY_time_to_kth_solution.png",
+                              max_k: int = 1000, filters: list = None) -> None:
+    """
+    Plots the search time until the k-th solution is found, for each algorithm.
+
+    The line is the median over the tests that found at least k solutions, the band spans the quartiles.
+    Needs test results run with trace=True.
+
+    :param input_file: Path to the input CSV file containing test results, or to a results store.
+    :param output_file: Path to the output image file where the plot will be saved.
+    :param max_k: The largest k to plot.
+    :param filters: Filters of the results read from a results store, e.g. NY_FILTERS (see load_results).
+    :return: None
+    """
+    traces = load_solution_traces(load_results(input_file, columns=TRACE_COLUMNS, filters=filters))
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    for algorithm in ALGORITHM_LABELS:
+        times = [trace[algorithm][0][:max_k] for trace in traces.values() if algorithm in trace]
+        if not times:
+            continue
+
+        num_k = max(len(t) for t in times)
+        padded = np.full((len(times), num_k), np.nan)
+        for i, t in enumerate(times):
+            padded[i, :len(t)] = t
+
+        ks = np.arange(1, num_k + 1)
+        ax.plot(ks, np.nanmedian(padded, axis=0), color=ALGORITHM_COLORS[algorithm], linewidth=2.5,
+                label=ALGORITHM_LABELS[algorithm])
+        ax.fill_between(ks, np.nanquantile(padded, 0.25, axis=0), np.nanquantile(padded, 0.75, axis=0),
+                        color=ALGORITHM_COLORS[algorithm], alpha=0.2)
+
+    ax.set_xlabel("k", fontsize=20)
+    ax.set_ylabel("Search Time to k-th Solution", fontsize=20)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.legend(fontsize=15)
+    ax.tick_params(axis="both", labelsize=16)
+    ax.grid(True, which="both", ls="-", alpha=0.2)
+
+    plt.savefig(output_file,
+                dpi=400,
+                bbox_inches="tight")
+
+
+def plot_front_coverage_over_time(input_file: str = "../data_out/NY_results/NY_test_results_final.csv",
+                                  output_file: str = "../data_out/plots_and_tables/NY_front_coverage.png",
+                                  num_points: int = 200, filters: list = None) -> None:
+    """
+    Plots the quality of the front found so far against the search time, for each algorithm.
+
+    The quality at time t is the share of the reference front of a test (the non-dominated solutions found by any
+    algorithm) that is weakly dominated by the solutions found until t, averaged over the tests traced with
+    all algorithms. Needs test results run with trace=True.
+
+    :param input_file: Path to the input CSV file containing test results, or to a results store.
+    :param output_file: Path to the output image file where the plot will be saved.
+    :param num_points: Number of time points of the curves.
+    :param filters: Filters of the results read from a results store, e.g. NY_FILTERS (see load_results).
+    :return: None
+    """
+    test_results = load_results(input_file, columns=TRACE_COLUMNS + ["time_limit"], filters=filters)
+    traces = load_solution_traces(test_results)
+    traces = {test: trace for test, trace in traces.items() if set(trace) == set(ALGORITHM_LABELS)}
+
+    if not traces:
+        print("No tests traced with all algorithms found.")
+        return
+
+    cover_times = {algorithm: [] for algorithm in ALGORITHM_LABELS}
+    for trace in traces.values():
+        costs = np.concatenate([trace[algorithm][1] for algorithm in ALGORITHM_LABELS])
+        reference = costs[nondominated(costs)]
+        if len(reference) == 0:
+            continue
+        for algorithm in ALGORITHM_LABELS:
+            cover_times[algorithm].append(_cover_times(*trace[algorithm], reference))
+
+    all_times = np.concatenate([t for runs in cover_times.values() for t in runs])
+    finite_times = all_times[np.isfinite(all_times) & (all_times > 0)]
+    t_min = finite_times.min() if len(finite_times) else 1e-3
+    grid = np.logspace(np.log10(t_min), np.log10(test_results["time_limit"].max()), num_points)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    for algorithm in ALGORITHM_LABELS:
+        coverage = np.mean([np.mean(times[:, None] <= grid[None, :], axis=0) for times in cover_times[algorithm]],
+                           axis=0)
+        ax.plot(grid, coverage, color=ALGORITHM_COLORS[algorithm], linewidth=2.5, label=ALGORITHM_LABELS[algorithm])
+
+    ax.set_xlabel("Search Time", fontsize=20)
+    ax.set_ylabel("Share of Reference Front Covered", fontsize=20)
+    ax.set_xscale("log")
+    ax.set_ylim(0, 1.02)
+    ax.legend(fontsize=15)
+    ax.tick_params(axis="both", labelsize=16)
+    ax.grid(True, which="both", ls="-", alpha=0.2)
+
+    plt.savefig(output_file,
+                dpi=400,
+                bbox_inches="tight")
+
+
+def front_quality_table_generator(input_file: str = "../data_out/NY_results/NY_test_results_final.csv",
+                                  output_file: str = "../data_out/plots_and_tables/NY_front_quality_table.csv",
+                                  metrics_file: str = None, n_jobs: int = 1, filters: list = None) -> pd.DataFrame:
+    """
+    Generates a table of the quality of the fronts found by EMOA and BOA for the same tests
+    (see front_metrics.compare_fronts), for each map and dimension.
+
+    The table includes the mean hypervolume, IGD and additive epsilon to the reference front of each algorithm,
+    and in how many tests the front of one algorithm weakly dominates the front of the other one.
+    Needs test results whose result files were kept (a "result_file" column).
+
+    :param input_file: Path to the input CSV file containing test results, or to a results store.
+    :param output_file: Path to the output CSV file where the table will be saved.
+    :param metrics_file: If given, the per-test metrics (one row per test and algorithm) are saved to this CSV file.
+    :param n_jobs: Number of worker processes scoring the fronts.
+    :param filters: Filters of the results read from a results store, e.g. NY_FILTERS (see load_results).
+    :return: A DataFrame containing the table.
+    """
+    test_results = load_results(input_file, columns=TEST_KEY_COLUMNS + ["algorithm", "num_dims", "result_file"],
+                                filters=filters)
+    metrics = front_metrics_table(test_results, n_jobs=n_jobs)
+
+    if metrics.empty:
+        print("No tests with result files of all algorithms found.")
+        return metrics
+
+    if metrics_file is not None:
+        metrics.to_csv(metrics_file, index=False)
+
+    num_dims = with_test_key(test_results).groupby(TEST_KEY_COLUMNS)["num_dims"].first()
+    metrics = metrics.join(num_dims, on=TEST_KEY_COLUMNS)
+
+    rows = []
+
+    for (map_name, dims, algorithm), runs in metrics.groupby(["map_name", "num_dims", "algorithm"]):
+        other = "boa" if algorithm == "emoa" else "emoa"
+        rows.append({
+            "Map": map_name,
+            "Dimensions": dims,
+            "Algorithm": ALGORITHM_LABELS[algorithm],
+            "Tests": len(runs),
+            "Avg Hypervolume": round(runs["hypervolume"].mean(), 4),
+            "Avg IGD": round(runs["igd"].mean(), 4),
+            "Avg Epsilon": round(runs["epsilon"].mean(), 4),
+            "Covers Other Front": f"{int((runs[f'epsilon_{other}'] <= 0).sum())}/{len(runs)}"
+        })
+
+    quality_table = pd.DataFrame(rows)
+    quality_table.to_csv(output_file, index=False)
+
+    return quality_table
+
+
+def _simple_map_filters(min_dim: int, max_dim: int, walls_percentage_list: tuple) -> list:
+    """
+    Returns the results store filters selecting the simple map tests of the given dimensions and wall percentages.
+    """
+    return [("map_family", "==", "simple_map"), ("num_dims", ">=", min_dim), ("num_dims", "<=", max_dim),
+            ("walls_percentage", "in", list(walls_percentage_list))]
+
+
+def import_simple_map_results(store_path: str = RESULTS_STORE_PATH, min_dim: int = 3, max_dim: int = 10,
+                              walls_percentage_list: tuple = (0, 5, 10)) -> None:
+    """
+    Imports the CSV files of the simple map runs (data_out/simple_map_{dims}_results/simple_map_{dims}_{walls}.csv)
+    into a results store, once, so that the simple map tables and plots can query them.
+
+    :param store_path: Path to the results store.
+    :param min_dim: Minimum dimension to import.
+    :param max_dim: Maximum dimension to import.
+    :param walls_percentage_list: Tuple of wall percentages to import.
+    :return: None
+    """
+    store = ResultsStore(store_path)
+    runs = store.runs()
+    imported = set(runs["source"].dropna()) if "source" in runs else set()
+
+    for num_dims in range(min_dim, max_dim + 1):
+        for walls_percentage in walls_percentage_list:
+            file_name = f"../data_out/simple_map_{num_dims}_results/simple_map_{num_dims}_{walls_percentage}.csv"
+
+            if os.path.exists(file_name) and file_name not in imported:
+                store.import_csv(file_name, walls=walls_percentage)
+
+
 def plot_search_time_vs_solutions(min_dim: int = 3, max_dim: int = 10,
                                   walls_percentage_list: tuple = (0, 5, 10),
-                                  output_file: str = "../data_out/plots_and_tables/st_num_sol_all_dims.png") -> None:
+                                  output_file: str = "../data_out/plots_and_tables/st_num_sol_all_dims.png",
+                                  input_file: str = RESULTS_STORE_PATH) -> None:
     """
     Plots search time against the number of solutions for different dimensions and wall percentages.
 
@@ -94,27 +407,18 @@ def plot_search_time_vs_solutions(min_dim: int = 3, max_dim: int = 10,
     :param max_dim: Maximum dimension to consider.
     :param walls_percentage_list: Tuple of wall percentages to consider in the plots.
     :param output_file: Path to the output image file where the plot will be saved.
+    :param input_file: Path to the results store (see import_simple_map_results for the CSV files of earlier runs).
     :return: None
     """
 
-    all_data = []
-
-    for num_dims in range(min_dim, max_dim + 1):
-        for walls_percentage in walls_percentage_list:
-            file_name = f"../data_out/simple_map_{num_dims}_results/simple_map_{num_dims}_{walls_percentage}.csv"
-
-            if os.path.exists(file_name):
-                df = pd.read_csv(file_name)
-                df["num_dims"] = num_dims
-                df["walls_percentage"] = walls_percentage
-                all_data.append(df)
+    combined_data = load_results(input_file,
+                                 columns=["num_dims", "walls_percentage", "algorithm", "num_solutions", "search_time"],
+                                 filters=_simple_map_filters(min_dim, max_dim, walls_percentage_list))
 
-    if not all_data:
-        print("No data files found.")
+    if combined_data.empty:
+        print("No simple map results found.")
         return
 
-    combined_data = pd.concat(all_data, ignore_index=True)
-
     fig = plt.figure(figsize=(22, 12))
     gs = fig.add_gridspec(2, 5)
 
@@ -132,11 +436,12 @@ def plot_search_time_vs_solutions(min_dim: int = 3, max_dim: int = 10,
     for idx, num_dims in enumerate(range(3, 11)):
         ax = fig.add_subplot(gs[idx // 4, idx % 4])
         data = combined_data[combined_data["num_dims"] == num_dims]
+        groups = dict(list(data.groupby(["algorithm", "walls_percentage"])))
 
         for algorithm in ["emoa", "boa"]:
             for walls in [0, 5, 10]:
-                subset = data[(data["algorithm"] == algorithm) & (data["walls_percentage"] == walls)]
-                if not subset.empty:
+                subset = groups.get((algorithm, walls))
+                if subset is not None:
                     ax.scatter(subset["num_solutions"], subset["search_time"],
                                c=colors[(algorithm, walls)], marker=markers[walls],
                                label=f"{algorithm}, {walls}% walls", alpha=0.7, s=15)
@@ -180,7 +485,8 @@ def plot_search_time_vs_solutions(min_dim: int = 3, max_dim: int = 10,
 def simple_map_table_generator(min_dim: int = 3,
                                max_dim: int = 10,
                                walls_percentage_list: tuple = (0, 5, 10),
-                               output_file: str = "../data_out/plots_and_tables/simple_map_stats_table.csv") -> pd.DataFrame:
+                               output_file: str = "../data_out/plots_and_tables/simple_map_stats_table.csv",
+                               input_file: str = RESULTS_STORE_PATH) -> pd.DataFrame:
     """
     Generates a statistics table for simple maps based on dimensions and wall percentages.
 
@@ -190,38 +496,36 @@ def simple_map_table_generator(min_dim: int = 3,
     :param max_dim: Maximum dimension to consider.
     :param walls_percentage_list: Tuple of wall percentages to consider.
     :param output_file: Path to the output CSV file where the statistics will be saved.
+    :param input_file: Path to the results store (see import_simple_map_results for the CSV files of earlier runs).
     :return: A DataFrame containing the statistics.
     """
 
-    results = []
+    df = load_results(input_file,
+                      columns=["num_dims", "walls_percentage", "test_number", "algorithm", "search_time"],
+                      filters=_simple_map_filters(min_dim, max_dim, walls_percentage_list))
 
-    for num_dims in range(min_dim, max_dim + 1):
-        for walls_percentage in walls_percentage_list:
-            file_name = f"../data_out/simple_map_{num_dims}_results/simple_map_{num_dims}_{walls_percentage}.csv"
+    grouped = df.groupby(["num_dims", "walls_percentage", "test_number", "algorithm"])["search_time"].first()
+    grouped = grouped.unstack("algorithm").reindex(columns=["emoa", "boa"])
+    ratio = (grouped["boa"] / grouped["emoa"]).groupby(["num_dims", "walls_percentage"])
 
-            if os.path.exists(file_name):
-                df = pd.read_csv(file_name)
-                df["num_dims"] = num_dims
-                df["walls_percentage"] = walls_percentage
-
-                grouped = df.groupby(["test_number", "algorithm"])["search_time"].first().unstack("algorithm")
-                ratio = grouped["boa"] / grouped["emoa"]
-
-                stats = {
-                    "num_dims": num_dims,
-                    "walls_percentage": walls_percentage,
-                    "mean_ratio": round(ratio.mean(), 2),
-                    "median_ratio": round(ratio.median(), 2),
-                    # Uncomment if needed
-                    # "std_ratio": round(ratio.std(), 2),
-                    "min_ratio": round(ratio.min(), 2),
-                    "max_ratio": round(ratio.max(), 2),
-                    # Uncomment if needed
-                    # "q1_ratio": round(ratio.quantile(0.25), 2),
-                    # "q3_ratio": round(ratio.quantile(0.75), 2)
-                }
-
-                results.append(stats)
+    results = []
+
+    for (num_dims, walls_percentage), ratios in ratio:
+        stats = {
+            "num_dims": num_dims,
+            "walls_percentage": walls_percentage,
+            "mean_ratio": round(ratios.mean(), 2),
+            "median_ratio": round(ratios.median(), 2),
+            # Uncomment if needed
+            # "std_ratio": round(ratios.std(), 2),
+            "min_ratio": round(ratios.min(), 2),
+            "max_ratio": round(ratios.max(), 2),
+            # Uncomment if needed
+            # "q1_ratio": round(ratios.quantile(0.25), 2),
+            # "q3_ratio": round(ratios.quantile(0.75), 2)
+        }
+
+        results.append(stats)
 
     final_table = pd.DataFrame(results)
     final_table.sort_values(["num_dims", "walls_percentage"], inplace=True)
@@ -277,10 +581,32 @@ if __name__ == "__main__":
     comparison_table = ny_table_generator(input_file="../data_out/NY_results/NY_test_results_final.csv",
                                           output_file="../data_out/plots_and_tables/NY_successful_runs_table.csv")
 
+    # NY resources table (peak RSS, CPU and wall time per run): can be uncommented if needed
+    # resources_table_generator(input_file="../data_out/NY_results/NY_test_results_final.csv",
+    #                           output_file="../data_out/plots_and_tables/NY_resources_table.csv",
+    #                           node_memory_gb=64)
+    # plot_peak_rss_vs_generated(input_file="../data_out/NY_results/NY_test_results_final.csv",
+    #                            output_file="../data_out/plots_and_tables/NY_peak_rss_vs_generated.png")
+
+    # NY anytime behaviour, needs tests run with trace=True: can be uncommented if needed
+    # plot_time_to_kth_solution(input_file="../data_out/NY_results/NY_test_results_final.csv",
+    #                           output_file="../data_out/plots_and_tables/NY_time_to_kth_solution.png")
+    # plot_front_coverage_over_time(input_file="../data_out/NY_results/NY_test_results_final.csv",
+    #                               output_file="../data_out/plots_and_tables/NY_front_coverage.png")
+
+    # NY front quality (hypervolume, IGD, epsilon), needs the result files: can be uncommented if needed
+    # front_quality_table_generator(input_file="../data_out/NY_results/NY_test_results_final.csv",
+    #                               output_file="../data_out/plots_and_tables/NY_front_quality_table.csv",
+    #                               metrics_file="../data_out/plots_and_tables/NY_front_metrics.csv",
+    #                               n_jobs=4)
+
     # NY table generation: can be uncommented if needed
     # ny_table_generator_2(input_file="../data_out/NY_results/NY_test_results_final.csv",
     #                      output_file="../data_out/plots_and_tables/NY_table_2.csv")
 
+    # Simple map results of earlier runs, imported once into the results store the simple map tables and plots read
+    import_simple_map_results(store_path=RESULTS_STORE_PATH, min_dim=3, max_dim=10, walls_percentage_list=(0, 5, 10))
+
     # Plotting search time vs solutions: can be uncommented if needed
     # plot_search_time_vs_solutions(min_dim=3,
     #                               max_dim=10,
@@ -0,0 +1,386 @@
+"""
+About: Resource usage (peak RSS, CPU time and wall time) and limits (wall time, address space) of the processes
+       running the algorithms.
+Author: Denis Derkach
+"""
+
+import os
+import math
+import time
+import signal
+import threading
+import subprocess
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Columns with the resource usage of a run, reported next to search_time
+RESOURCE_COLUMNS = ["wall_time", "user_time", "sys_time", "peak_rss_mb"]
+
+# Polling interval of the peak RSS of child processes, it is a high-water mark, so only the growth
+# in the last interval before a child exits can be missed
+SAMPLE_INTERVAL_S = 0.05
+
+# Statuses of a run: finished, finished at its own time limit, label or memory budget (with a partial front),
+# stopped by the watchdog, out of memory, crashed
+RUN_STATUSES = ["ok", "timeout", "label-limit", "memory-limit", "killed-timeout", "oom", "crash"]
+
+# Seconds between asking a run to stop (SIGTERM) and killing it (SIGKILL)
+KILL_GRACE_S = 5
+
+# Exit codes of run_emoa / run_boalex that are not failures (main returns 1 after writing the result file)
+SUCCESS_EXIT_CODES = {0, 1}
+
+_MB = 1024 * 1024
+
+
+def resource_usage(peak_rss_bytes: float, user_time: float, sys_time: float, wall_time: float) -> dict:
+    """
+    Builds the resource usage record of a run.
+
+    :return: A dictionary with the RESOURCE_COLUMNS (times in seconds, peak RSS in MB, NaN if unknown).
+    """
+    return {"wall_time": wall_time, "user_time": user_time, "sys_time": sys_time,
+            "peak_rss_mb": peak_rss_bytes / _MB}
+
+
+def wait_process(process: subprocess.Popen, start_time: float) -> dict:
+    """
+    Waits for a child process and returns its resource usage.
+
+    The CPU times are taken from os.wait4 (they include the children the process waited for, e.g. the executable
+    started by bash -c), or from psutil where os.wait4 is not available. The peak RSS is the high-water mark of the
+    process tree, polled while it runs: ru_maxrss of os.wait4 would also count the memory of this (Python) process,
+    from which the child was forked.
+
+    :param process: The child process.
+    :param start_time: time.perf_counter() when the process was started.
+    :return: A resource usage record, see resource_usage.
+    """
+    sampler = _TreeSampler(process.pid)
+    sampler.start()
+
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        user_time, sys_time = usage.ru_utime, usage.ru_stime
+    else:
+        process.wait()
+        user_time, sys_time = sampler.cpu_times()
+
+    wall_time = time.perf_counter() - start_time
+    sampler.stop()
+
+    return resource_usage(sampler.peak_rss, user_time, sys_time, wall_time)
+
+
+class Watchdog:
+    """
+    Stops a child process and the processes it started when its wall time runs out: SIGTERM to its process group,
+    then SIGKILL KILL_GRACE_S later if the group is still running. The child must be started with
+    start_new_session=True, so that it leads its own process group.
+    """
+
+    def __init__(self, process: subprocess.Popen, timeout: float):
+        """
+        :param process: The child process.
+        :param timeout: Wall time in seconds after start, None to never stop the child.
+        """
+        self.process = process
+        self.timeout = timeout
+        self.fired = False
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        """
+        Starts the clock, call it right after the child is started (or, for a server, the query is sent).
+
+        :return: None
+        """
+        if self.timeout is not None:
+            self._thread.start()
+
+    def cancel(self) -> None:
+        """
+        Stops the clock, call it as soon as the child has finished.
+
+        :return: None
+        """
+        self._cancelled.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        """
+        Waits for the timeout, then stops the process group unless cancelled.
+        """
+        if self._cancelled.wait(self.timeout):
+            return
+
+        self.fired = True
+        _signal_group(self.process, signal.SIGTERM)
+        if not self._cancelled.wait(KILL_GRACE_S):
+            _signal_group(self.process, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+
+def memory_limit(memory_limit_mb: float):
+    """
+    Returns a preexec_fn for subprocess.Popen that caps the address space of the child (RLIMIT_AS, which, unlike
+    RLIMIT_RSS, Linux enforces). Allocations beyond it fail in the child, instead of the node running out of memory.
+    Note that memory-mapped graph and heuristic files count as address space.
+
+    :param memory_limit_mb: The cap in MB, None for no cap.
+    :return: A function setting the limit, or None.
+    """
+    if memory_limit_mb is None:
+        return None
+    if resource is None:
+        raise ValueError("memory_limit_mb needs the resource module, which is not available on this platform")
+
+    limit = int(memory_limit_mb * _MB)
+
+    def set_limit() -> None:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    return set_limit
+
+
+def failure_status(returncode: int, watchdog_fired: bool, stderr_tail: str):
+    """
+    Classifies how a run of run_emoa / run_boalex ended, before its result file is read.
+
+    :param returncode: Exit code of the process (negative for a signal, 128 + signal when it ran under bash).
+    :param watchdog_fired: True if the Watchdog stopped the process.
+    :param stderr_tail: The end of the standard error output of the process.
+    :return: "killed-timeout", "oom" or "crash" (see RUN_STATUSES), or None if the run ended normally.
+    """
+    if watchdog_fired:
+        return "killed-timeout"
+    if returncode in SUCCESS_EXIT_CODES:
+        return None
+
+    # a failed allocation under the memory limit aborts with std::bad_alloc, the kernel OOM killer sends SIGKILL
+    killed = returncode in (-signal.SIGKILL, 128 + signal.SIGKILL) if hasattr(signal, "SIGKILL") else False
+    if "bad_alloc" in stderr_tail or "out of memory" in stderr_tail.lower() or killed:
+        return "oom"
+
+    return "crash"
+
+
+class UsageMeter:
+    """
+    Measures the resource usage of one query to a long-lived process, i.e. a query server or, for the native
+    backend, this process.
+
+    CPU times are the difference between start and stop. The peak RSS is reset at start where Linux allows it
+    (/proc/PID/clear_refs), otherwise it is the peak since the process started.
+    """
+
+    def __init__(self, pid: int):
+        """
+        :param pid: Process id of the measured process.
+        """
+        self.pid = pid
+        self._start_time = None
+        self._start_cpu = None
+
+    def start(self) -> None:
+        """
+        Starts measuring, call it right before the query is sent.
+
+        :return: None
+        """
+        _reset_peak_rss(self.pid)
+        self._start_cpu = _cpu_times(self.pid)
+        self._start_time = time.perf_counter()
+
+    def stop(self) -> dict:
+        """
+        Stops measuring, call it right after the query is answered.
+
+        :return: A resource usage record, see resource_usage.
+        """
+        wall_time = time.perf_counter() - self._start_time
+        user_time, sys_time = _cpu_times(self.pid)
+
+        return resource_usage(_peak_rss(self.pid), user_time - self._start_cpu[0], sys_time - self._start_cpu[1],
+                              wall_time)
+
+
+def executable_pid(pid: int) -> int:
+    """
+    Returns the pid of the process doing the work of a child started through a shell (bash -c "..."):
+    the most recently started descendant if there is one, otherwise pid itself.
+
+    :param pid: Process id of the child.
+    :return: A process id.
+    """
+    return _process_tree(pid)[-1]
+
+
+class _TreeSampler(threading.Thread):
+    """
+    Polls the peak RSS (and, with psutil, the CPU times) of a process tree until it is stopped.
+    """
+
+    def __init__(self, pid: int):
+        """
+        :param pid: Process id of the root of the tree.
+        """
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak_rss = float("nan")
+        self._peaks = dict()
+        self._cpu_times = dict()
+        # without os.wait4 the CPU times are sampled as well
+        self._sample_cpu = psutil is not None and not hasattr(os, "wait4")
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        """
+        Samples the tree every SAMPLE_INTERVAL_S until stop is called.
+
+        :return: None
+        """
+        while True:
+            for pid in _process_tree(self.pid):
+                peak = _peak_rss(pid)
+                if not math.isnan(peak):
+                    self._peaks[pid] = max(peak, self._peaks.get(pid, 0))
+                if self._sample_cpu:
+                    try:
+                        self._cpu_times[pid] = psutil.Process(pid).cpu_times()
+                    except psutil.Error:
+                        pass
+            if self._peaks:
+                self.peak_rss = sum(self._peaks.values())
+            if self._stopped.wait(SAMPLE_INTERVAL_S):
+                return
+
+    def stop(self) -> None:
+        """
+        Stops sampling and waits for the thread.
+
+        :return: None
+        """
+        self._stopped.set()
+        self.join()
+
+    def cpu_times(self) -> tuple:
+        """
+        Returns the (user, system) CPU time of the tree at the last sample, NaN without psutil.
+        """
+        if not self._cpu_times:
+            return float("nan"), float("nan")
+
+        return (sum(times.user for times in self._cpu_times.values()),
+                sum(times.system for times in self._cpu_times.values()))
+
+
+def _process_tree(pid: int) -> list:
+    """
+    Returns the pids of a process and all its descendants, in the order they were found.
+    """
+    pids = [pid]
+    for parent in pids:
+        try:
+            with open(f"/proc/{parent}/task/{parent}/children", mode="r") as file:
+                pids += [int(child) for child in file.read().split()]
+            continue
+        except OSError:
+            pass
+        if psutil is not None:
+            try:
+                pids += [child.pid for child in psutil.Process(parent).children()]
+            except psutil.Error:
+                pass
+
+    return pids
+
+
+def _signal_group(process: subprocess.Popen, sig: int) -> None:
+    """
+    Sends a signal to the process group led by a child, or to the child and its descendants where there are no
+    process groups.
+    """
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, sig)
+        except OSError:
+            pass
+        return
+
+    if psutil is None:
+        process.send_signal(sig)
+        return
+
+    for pid in reversed(_process_tree(process.pid)):
+        try:
+            psutil.Process(pid).send_signal(sig)
+        except psutil.Error:
+            pass
+
+
+def _reset_peak_rss(pid: int) -> None:
+    """
+    Resets the peak RSS (VmHWM) of a process, if the platform supports it.
+    """
+    try:
+        with open(f"/proc/{pid}/clear_refs", mode="w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def _cpu_times(pid: int) -> tuple:
+    """
+    Returns the (user, system) CPU time of a process in seconds, NaN if unknown.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", mode="r") as file:
+            # the fields after the command name, which may contain spaces, start with the state (field 3)
+            fields = file.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return int(fields[11]) / ticks, int(fields[12]) / ticks
+    except OSError:
+        pass
+
+    if psutil is not None:
+        try:
+            times = psutil.Process(pid).cpu_times()
+            return times.user, times.system
+        except psutil.Error:
+            pass
+
+    return float("nan"), float("nan")
+
+
+def _peak_rss(pid: int) -> float:
+    """
+    Returns the peak RSS of a process in bytes, NaN if unknown.
+    """
+    try:
+        with open(f"/proc/{pid}/status", mode="r") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if psutil is not None:
+        try:
+            memory = psutil.Process(pid).memory_info()
+            # peak_wset is the peak working set on Windows, elsewhere only the current RSS is known
+            return getattr(memory, "peak_wset", memory.rss)
+        except psutil.Error:
+            pass
+
+    return float("nan")
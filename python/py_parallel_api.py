@@ -3,43 +3,98 @@ About: Python helper APIs for running algorithms and processing results from tes
 Author: Zhongqiang (Richard) Ren and Denis Derkach
 """
 
+import os
+import sys
 import random
+import shutil
+import tempfile
+import threading
+import time
+import multiprocessing.util
 import numpy as np
 import subprocess
 import pandas as pd
 from tqdm import tqdm
-from joblib import Parallel, delayed
-
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from python.map_generator import get_num_dims
+from python.process_resources import RESOURCE_COLUMNS, UsageMeter, Watchdog, executable_pid, failure_status, \
+    memory_limit, resource_usage, wait_process
+from python.result_file import BinaryResult, is_binary_result, read_text_metrics, trace_file, \
+    write_solution_trace
+from python.results_journal import MAP_FILES_SEPARATOR, ResultsJournal, test_key
+from python.results_store import ResultsStore
 from python.tests_generator import ny_tests_generator, simple_map_tests_generator
 
 # ATTENTION: Constants for file paths, change it if needed
 BASH_PATH = "C:\\Program Files\\Git\\bin\\bash.exe"
 BASE_EXECUTABLE_PATH = "C:/Users/denis/CLionProjects/Emoa_heu/cmake-build-debug/"
 RESULTS_PATH = "../data_out/technical_txts/simple_map_{}.txt"
+TECHNICAL_TXTS_PATH = "../data_out/technical_txts/"
+HEURISTIC_CACHE_PATH = "../data_out/heuristic_cache/"
+
+# Size limit of the heuristic cache, the least recently used heuristic tables are removed above it
+HEURISTIC_CACHE_MB = 4096
+
+# Wall time a run may take beyond its time limit (heuristic, graph loading, writing the result file)
+# before the watchdog stops it
+WALL_TIME_GRACE_S = 60
+
+# Columns of the results DataFrame, in the order they are reported
+RESULT_COLUMNS = ["test_number", "algorithm", "map_name", "num_dims",
+                  "heuristic_time", "search_time", "dom_check_time"] + RESOURCE_COLUMNS + ["num_solutions",
+                  "time_limit", "start", "goal", "n_generated", "n_expanded", "n_domCheck",
+                  "timeout", "status", "num_nondom_labels_max", "num_nondom_labels_avg", "num_labels_max",
+                  "num_open_max", "result_file", "trace_file", "map_files"]
+
+# Status of a run that wrote its result, by the "termination" metric of the search (SearchTermination in search.hpp)
+TERMINATION_STATUSES = ["ok", "timeout", "label-limit", "memory-limit"]
+
+# The native backend needs the emoa_py module, which is built next to the executables when pybind11 is available
+sys.path.append(BASE_EXECUTABLE_PATH)
+try:
+    import emoa_py
+except ImportError:
+    emoa_py = None
+
+# Graphs loaded by the native backend, shared by all tests of the process that use the same map files
+# (at most MAX_NATIVE_GRAPHS, the least recently used one is dropped)
+MAX_NATIVE_GRAPHS = 4
+_native_graphs = dict()
+_native_graphs_lock = threading.Lock()
+_native_heuristic_cache = None
+
+# Warm query servers of the server backend, keyed by (job thread id, executable, map files)
+MAX_SERVERS_PER_JOB = 4
+_query_servers = dict()
+_query_servers_lock = threading.Lock()
+_query_servers_finalizer = None
 
 
 def getResult(res_file: str) -> dict:
     """
     Parses the result file and extracts relevant metrics into a dictionary.
 
+    For a binary result file (".bin") only the metrics are read, the front and the paths
+    can be memory-mapped later from the BinaryResult stored under "result".
+
     :param res_file: Path to the result file generated by the algorithm.
     :return: A dictionary containing extracted metrics such as number of generated nodes,
              expanded nodes, search times, and solution paths.
     """
+    if is_binary_result(res_file):
+        result = BinaryResult(res_file)
+        res_dict = dict(result.metrics)
+        res_dict["num_solutions"] = result.num_solutions
+        res_dict["result"] = result
+        return res_dict
+
     res_dict = dict()
     with open(res_file, mode="r") as fres:
         lines = fres.readlines()
-        res_dict["n_generated"] = int(lines[1].split(":")[1])
-        res_dict["n_expanded"] = int(lines[2].split(":")[1])
-        res_dict["n_domCheck"] = int(lines[3].split(":")[1])
-        res_dict["rt_initHeu"] = float(lines[4].split(":")[1])
-        res_dict["rt_search"] = float(lines[5].split(":")[1])
-        res_dict["timeout"] = int(lines[6].split(":")[1])
-        res_dict["num_nondom_labels_max"] = float(lines[7].split(":")[1])
-        res_dict["num_nondom_labels_avg"] = float(lines[8].split(":")[1])
-        res_dict["num_solutions"] = int(lines[9].split(":")[1])
-
-        start_idx = 10
+        metrics, start_idx = read_text_metrics(lines)
+        res_dict.update(metrics)
+
         res_dict["paths"] = dict()
         res_dict["costs"] = dict()
 
@@ -55,113 +110,695 @@ def getResult(res_file: str) -> dict:
     return res_dict
 
 
-def run_algorithm(cg_list: list, exe_path: str, res_path: str, vo: int, vd: int, tlimit: int) -> dict:
+def failed_result(status: str, usage: dict) -> dict:
+    """
+    Builds the result of a run that did not write its result file, its metrics are NaN.
+
+    :param status: How the run ended, "killed-timeout", "oom" or "crash" (see process_resources.RUN_STATUSES).
+    :param usage: The resource usage of the run.
+    :return: A dictionary with the keys of getResult, "timeout" is 1 for a run stopped by the watchdog.
+    """
+    out = {metric: float("nan") for metric in ["n_generated", "n_expanded", "n_domCheck", "rt_initHeu", "rt_search",
+                                               "rt_domCheck", "num_nondom_labels_max", "num_nondom_labels_avg",
+                                               "termination", "num_labels_max", "num_open_max", "num_solutions"]}
+    out.update(usage)
+    out["timeout"] = 1 if status == "killed-timeout" else float("nan")
+    out["status"] = status
+
+    return out
+
+
+def search_status(out: dict) -> str:
+    """
+    Returns the status of a run that wrote its result, from how its search stopped.
+
+    :param out: The result of the run, as returned by getResult.
+    :return: "ok", "timeout", "label-limit" or "memory-limit" (see TERMINATION_STATUSES), results written before
+             the "termination" metric existed give "ok" or "timeout".
+    """
+    termination = out.get("termination", 1 if out["timeout"] else 0)
+
+    return TERMINATION_STATUSES[int(termination)]
+
+
+def read_result(res_file: str, status: str, usage: dict) -> dict:
+    """
+    Reads the result file of a run unless the run failed, a missing or truncated result file counts as a crash.
+
+    :param res_file: Path to the result file.
+    :param status: The failure status of the run (see process_resources.failure_status), None if it ended normally.
+    :param usage: The resource usage of the run.
+    :return: A dictionary as returned by getResult, with the resource usage and the "status" of the run.
+    """
+    if status is None:
+        try:
+            out = getResult(res_file)
+        except (OSError, ValueError, IndexError):
+            status = "crash"
+
+    if status is not None:
+        return failed_result(status, usage)
+
+    out.update(usage)
+    out["status"] = search_status(out)
+
+    return out
+
+
+def _read_tail(file, num_bytes: int = 4096) -> str:
+    """
+    Returns the last bytes written to a temporary file, decoded.
+    """
+    file.seek(0, os.SEEK_END)
+    file.seek(max(0, file.tell() - num_bytes))
+
+    return file.read().decode(errors="replace")
+
+
+def search_options_args(heuristic_cache: str = None, heuristic_threads: int = 1, trace: bool = False,
+                        max_labels: int = None, max_memory_mb: float = None) -> list:
+    """
+    Returns the command line options of run_emoa / run_boalex for the heuristic cache, heuristic threads,
+    solution trace and search budget.
+
+    :param heuristic_cache: Directory of the heuristic cache, or None to compute every heuristic.
+    :param heuristic_threads: Number of threads computing the heuristic (one per objective at most).
+    :param trace: If True, the solution trace is written next to each result file.
+    :param max_labels: Label budget of a search, or None for no limit.
+    :param max_memory_mb: Memory budget in MB of the labels, open list and frontiers of a search, or None for no
+                          limit.
+    :return: A list of command line arguments (empty for the defaults).
+    """
+    args = []
+    if heuristic_cache is not None:
+        args += ["--heu_cache", heuristic_cache, "--heu_cache_mb", str(HEURISTIC_CACHE_MB)]
+    if heuristic_threads != 1:
+        args += ["--heu_threads", str(heuristic_threads)]
+    if trace:
+        args += ["--trace", "1"]
+    if max_labels is not None:
+        args += ["--max_labels", str(int(max_labels))]
+    if max_memory_mb is not None:
+        args += ["--max_memory_mb", str(max_memory_mb)]
+
+    return args
+
+
+def run_algorithm(cg_list: list, exe_path: str, res_path: str, vo: int, vd: int, tlimit: int,
+                  heuristic_cache: str = None, heuristic_threads: int = 1, trace: bool = False,
+                  memory_limit_mb: float = None, wall_time_grace: float = WALL_TIME_GRACE_S,
+                  max_labels: int = None, max_memory_mb: float = None) -> dict:
     """
     Runs the specified algorithm using subprocess and retrieves results.
 
     ATTENTION: Constants for file paths are in the beginning of file, you probably need to change them.
 
-    :param cg_list: List of command-line arguments for the algorithm.
+    :param cg_list: List of paths to the map files, one per objective, or a single binary .csr graph file.
     :param exe_path: Path to the executable file of the algorithm.
     :param res_path: Path where results will be saved.
     :param vo: Starting vertex index.
     :param vd: Destination vertex index.
     :param tlimit: Time limit for the algorithm execution.
-    :return: A dictionary containing results from the algorithm execution.
+    :param heuristic_cache: Directory of the heuristic cache, or None to compute the heuristic.
+    :param heuristic_threads: Number of threads computing the heuristic.
+    :param trace: If True, the solution trace is written to trace_file(res_path).
+    :param memory_limit_mb: Address space cap of the process in MB (see process_resources.memory_limit), or None.
+    :param wall_time_grace: The process is stopped when it runs wall_time_grace seconds longer than tlimit,
+                            None to wait for it however long it takes.
+    :param max_labels: Label budget of the search, or None (see test_system).
+    :param max_memory_mb: Memory budget of the search in MB, or None (see test_system).
+    :return: A dictionary containing results from the algorithm execution, the resource usage of the process
+             (see process_resources.RESOURCE_COLUMNS) and its "status" (see process_resources.RUN_STATUSES).
     """
-    cmd = [str(vo), str(vd), str(tlimit), str(len(cg_list))] + cg_list + [res_path]
+    cmd = [str(vo), str(vd), str(tlimit), str(get_num_dims(cg_list))] + cg_list + [res_path]
+    cmd += search_options_args(heuristic_cache, heuristic_threads, trace, max_labels, max_memory_mb)
 
     cmd_s = " ".join(cmd)
 
     cmd = [BASH_PATH, "-c", f"{BASE_EXECUTABLE_PATH}{exe_path} {cmd_s}"]
 
-    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
-    process.wait()
+    # a result file left by an earlier run must not be read back as the result of a failed one
+    if os.path.exists(res_path):
+        os.remove(res_path)
+
+    with tempfile.TemporaryFile() as stderr:
+        start_time = time.perf_counter()
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr, start_new_session=True,
+                                   preexec_fn=memory_limit(memory_limit_mb))
+        watchdog = Watchdog(process, tlimit + wall_time_grace if wall_time_grace is not None else None)
+        watchdog.start()
+        try:
+            usage = wait_process(process, start_time)
+        finally:
+            watchdog.cancel()
+
+        status = failure_status(process.returncode, watchdog.fired, _read_tail(stderr))
+
+    return read_result(res_path, status, usage)
+
+
+class QueryServer:
+    """
+    A long-lived run_emoa / run_boalex process started with --server.
+
+    The process loads the map files once and then answers "start goal time_limit result_path" queries
+    sent to its stdin, printing one "RESULT ..." record per query when the result file is written.
+    """
+
+    def __init__(self, cg_list: list, exe_path: str, res_path: str, heuristic_cache: str = None,
+                 heuristic_threads: int = 1, trace: bool = False, memory_limit_mb: float = None,
+                 max_labels: int = None, max_memory_mb: float = None):
+        """
+        Starts the server process and waits until the graph is loaded. If the server fails to load it,
+        every query returns a failed result with the status of the server.
+
+        :param cg_list: List of paths to the map files, one per objective.
+        :param exe_path: Path to the executable file of the algorithm.
+        :param res_path: Default path where results will be saved.
+        :param heuristic_cache: Directory of the heuristic cache, or None to compute every heuristic.
+        :param heuristic_threads: Number of threads computing the heuristic.
+        :param trace: If True, the solution trace of each query is written next to its result file.
+        :param memory_limit_mb: Address space cap of the server process in MB, or None.
+        :param max_labels: Label budget of every search, or None.
+        :param max_memory_mb: Memory budget of every search in MB, or None.
+        """
+        cmd_s = " ".join(["--server", str(get_num_dims(cg_list))] + cg_list + [res_path]
+                         + search_options_args(heuristic_cache, heuristic_threads, trace, max_labels, max_memory_mb))
+        cmd = [BASH_PATH, "-c", f"{BASE_EXECUTABLE_PATH}{exe_path} {cmd_s}"]
+
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self._stderr,
+                                        text=True, bufsize=1, start_new_session=True,
+                                        preexec_fn=memory_limit(memory_limit_mb))
+        self.startup_status = None
+        try:
+            self._read_until("READY")
+        except RuntimeError:
+            self.startup_status = self._exit_status(watchdog_fired=False)
+        self.meter = UsageMeter(executable_pid(self.process.pid))
+
+    def _read_until(self, prefix: str) -> str:
+        """
+        Skips the log output of the server until a line with the given prefix.
+
+        :param prefix: Prefix of the expected line.
+        :return: The line with the given prefix.
+        """
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Query server exited with code {self.process.poll()}")
+            if line.startswith(prefix):
+                return line
+
+    def _exit_status(self, watchdog_fired: bool) -> str:
+        """
+        Waits for the exited server process and classifies how it ended, see process_resources.failure_status.
+
+        :param watchdog_fired: True if the Watchdog stopped the process.
+        :return: "killed-timeout", "oom" or "crash".
+        """
+        self.process.wait()
+        return failure_status(self.process.returncode, watchdog_fired, _read_tail(self._stderr)) or "crash"
+
+    def query(self, vo: int, vd: int, tlimit: int, res_path: str, wall_time_grace: float = WALL_TIME_GRACE_S) -> dict:
+        """
+        Runs one search on the already loaded graph and retrieves results.
+
+        If the query runs wall_time_grace seconds longer than tlimit, the server is stopped (see Watchdog).
+        A server that has exited answers no more queries, see is_alive.
+
+        :param vo: Starting vertex index.
+        :param vd: Destination vertex index.
+        :param tlimit: Time limit for the algorithm execution.
+        :param res_path: Path where results will be saved.
+        :param wall_time_grace: Wall time allowed beyond tlimit, None to wait however long it takes.
+        :return: A dictionary containing results from the algorithm execution, the resource usage of the server
+                 during the query (see process_resources.UsageMeter) and the "status" of the query.
+        """
+        if self.startup_status is not None:
+            return failed_result(self.startup_status, resource_usage(float("nan"), float("nan"), float("nan"), 0.0))
+
+        if os.path.exists(res_path):
+            os.remove(res_path)
+
+        watchdog = Watchdog(self.process, tlimit + wall_time_grace if wall_time_grace is not None else None)
+        status = None
+
+        self.meter.start()
+        watchdog.start()
+        try:
+            self.process.stdin.write(f"{vo} {vd} {tlimit} {res_path}\n")
+            self.process.stdin.flush()
+            self._read_until("RESULT")
+        except (RuntimeError, OSError):
+            status = self._exit_status(watchdog.fired)
+        finally:
+            watchdog.cancel()
+        usage = self.meter.stop()
+
+        return read_result(res_path, status, usage)
+
+    def is_alive(self) -> bool:
+        """
+        :return: True if the server process is running.
+        """
+        return self.process.poll() is None
+
+    def close(self) -> None:
+        """
+        Stops the server process.
+
+        :return: None
+        """
+        if self.process.poll() is None:
+            self.process.stdin.write("quit\n")
+            self.process.stdin.close()
+            self.process.wait()
+        self._stderr.close()
+
+
+def run_algorithm_server(cg_list: list, exe_path: str, res_path: str, vo: int, vd: int, tlimit: int,
+                         heuristic_cache: str = None, heuristic_threads: int = 1, trace: bool = False,
+                         memory_limit_mb: float = None, wall_time_grace: float = WALL_TIME_GRACE_S,
+                         max_labels: int = None, max_memory_mb: float = None) -> dict:
+    """
+    Runs the specified algorithm on a warm query server of the current job and retrieves results.
+
+    Every job (thread) keeps its own servers, a server is started on the first query for its executable
+    and map files, and the least recently used one is stopped when the job holds more than MAX_SERVERS_PER_JOB.
+    A server that exited during the query (stopped by the watchdog, out of memory, crashed) is replaced
+    by the next query.
+
+    :param cg_list: List of paths to the map files, one per objective.
+    :param exe_path: Path to the executable file of the algorithm.
+    :param res_path: Path where results will be saved.
+    :param vo: Starting vertex index.
+    :param vd: Destination vertex index.
+    :param tlimit: Time limit for the algorithm execution.
+    :param heuristic_cache: Directory of the heuristic cache, or None to compute the heuristic.
+    :param heuristic_threads: Number of threads computing the heuristic.
+    :param trace: If True, the solution trace is written to trace_file(res_path).
+    :param memory_limit_mb: Address space cap of the server process in MB, or None.
+    :param wall_time_grace: Wall time allowed beyond tlimit, see QueryServer.query.
+    :param max_labels: Label budget of the search, or None.
+    :param max_memory_mb: Memory budget of the search in MB, or None.
+    :return: A dictionary containing results from the algorithm execution.
+    """
+    job_id = threading.get_ident()
+    key = (job_id, exe_path, tuple(cg_list), heuristic_cache, heuristic_threads, trace, memory_limit_mb, max_labels,
+           max_memory_mb)
+
+    with _query_servers_lock:
+        server = _query_servers.pop(key, None)
+        job_keys = [k for k in _query_servers if k[0] == job_id]
+        evicted = [_query_servers.pop(k) for k in job_keys[:max(0, len(job_keys) + 1 - MAX_SERVERS_PER_JOB)]]
+
+    for old_server in evicted:
+        old_server.close()
+
+    if server is None:
+        server = QueryServer(cg_list, exe_path, res_path, heuristic_cache, heuristic_threads, trace, memory_limit_mb,
+                             max_labels, max_memory_mb)
+        _close_query_servers_at_exit()
+
+    out = server.query(vo, vd, tlimit, res_path, wall_time_grace)
+
+    # re-insert to keep the dict ordered from the least to the most recently used server
+    if server.is_alive():
+        with _query_servers_lock:
+            _query_servers[key] = server
+    else:
+        server.close()
 
-    out = getResult(res_path)
+    return out
+
+
+def _close_query_servers_at_exit() -> None:
+    """
+    Makes sure the query servers of this process are stopped when it exits. The servers belong to the process that
+    started them, e.g. a worker of parallel_run, and a multiprocessing finalizer also runs when a pool worker exits,
+    which atexit handlers do not.
+    """
+    global _query_servers_finalizer
+
+    with _query_servers_lock:
+        if _query_servers_finalizer is None:
+            _query_servers_finalizer = multiprocessing.util.Finalize(None, close_query_servers, exitpriority=10)
+
+
+def close_query_servers() -> None:
+    """
+    Stops all query servers started by run_algorithm_server in this process. Called when the process exits,
+    so only needed to stop the servers of a long-lived process earlier.
+
+    :return: None
+    """
+    with _query_servers_lock:
+        servers = list(_query_servers.values())
+        _query_servers.clear()
+
+    for server in servers:
+        server.close()
+
+
+def get_native_graph(cg_list: list):
+    """
+    Returns the graph for the given map files, loading it through emoa_py only on the first request,
+    in CSR layout so that the searches read its arcs without copies. The process keeps the MAX_NATIVE_GRAPHS most
+    recently used graphs, so a sweep over many maps does not keep all of them in memory.
+
+    :param cg_list: List of paths to the map files, one per objective.
+    :return: An emoa_py graph object.
+    """
+    key = tuple(cg_list)
+
+    with _native_graphs_lock:
+        graph = _native_graphs.pop(key, None)
+        if graph is None:
+            graph = emoa_py.load_graph(list(cg_list), csr=True)
+            while len(_native_graphs) >= MAX_NATIVE_GRAPHS:
+                _native_graphs.pop(next(iter(_native_graphs)))
+
+        # re-insert to keep the dict ordered from the least to the most recently used graph
+        _native_graphs[key] = graph
+
+        return graph
+
+
+def run_algorithm_native(cg_list: list, algorithm: str, vo: int, vd: int, tlimit: int,
+                         heuristic_cache: str = None, heuristic_threads: int = 1, trace: bool = False,
+                         max_labels: int = None, max_memory_mb: float = None) -> dict:
+    """
+    Runs the specified algorithm in-process through the emoa_py extension module.
+
+    No process is started and no result file is written, the graph is loaded once per process and map files.
+
+    :param cg_list: List of paths to the map files, one per objective.
+    :param algorithm: Algorithm name, "emoa" or "boa".
+    :param vo: Starting vertex index.
+    :param vd: Destination vertex index.
+    :param tlimit: Time limit for the algorithm execution.
+    :param heuristic_cache: Directory of the heuristic cache, or None to compute the heuristic.
+    :param heuristic_threads: Number of threads computing the heuristic.
+    :param trace: If True, the solution trace is returned as "trace_times" and "trace_costs".
+    :param max_labels: Label budget of the search, or None.
+    :param max_memory_mb: Memory budget of the search in MB, or None.
+    :return: A dictionary with the same metrics as getResult, the Pareto front is given as NumPy arrays
+             ("costs" of shape (num_solutions, num_dims), "label_ids" and "paths"), and the resource usage
+             of this process during the run.
+    """
+    global _native_heuristic_cache
+
+    if emoa_py is None:
+        raise ImportError(f"emoa_py module is not found in {BASE_EXECUTABLE_PATH}, build it with pybind11 first")
+
+    with _native_graphs_lock:
+        if heuristic_cache != _native_heuristic_cache:
+            emoa_py.set_heuristic_cache(heuristic_cache or "", HEURISTIC_CACHE_MB)
+            _native_heuristic_cache = heuristic_cache
+
+    graph = get_native_graph(cg_list)
+    run = emoa_py.run_emoa if algorithm == "emoa" else emoa_py.run_boalex
+
+    meter = UsageMeter(os.getpid())
+    meter.start()
+    out = run(graph, vo, vd, tlimit, heu_threads=heuristic_threads, trace=trace, max_labels=max_labels or 0,
+              max_memory_mb=max_memory_mb or 0.0)
+    out.update(meter.stop())
+    out["status"] = search_status(out)
 
     return out
 
 
-def test_system(tests: list, display_progress: bool = False) -> pd.DataFrame:
+def test_system(tests: list, display_progress: bool = False, backend: str = "cli",
+                heuristic_cache: str = None, heuristic_threads: int = 1, trace: bool = False,
+                memory_limit_mb: float = None, wall_time_grace: float = WALL_TIME_GRACE_S,
+                max_labels: int = None, max_memory_mb: float = None) -> pd.DataFrame:
     """
     Executes a series of tests on specified algorithms and collects results.
 
     :param tests: A list of test parameters including algorithm type and configurations.
     :param display_progress: If True, displays a progress bar during execution.
+    :param backend: "cli" runs the executables and parses their result files,
+                    "server" sends the tests to warm run_emoa / run_boalex servers that load each map only once,
+                    "native" runs the algorithms in-process through the emoa_py module.
+    :param heuristic_cache: Directory of the heuristic cache (e.g. HEURISTIC_CACHE_PATH), in which the heuristic
+                            of every (map, goal) is stored once and then reused by all tests and algorithms.
+                            If None, every test computes its heuristic.
+    :param heuristic_threads: Number of threads computing the heuristic of a test, one Dijkstra search per objective
+                              runs on each of them. Worth it when there are more cores than parallel tests.
+    :param trace: If True, every test writes its solution trace (see result_file.read_solution_trace) next to
+                  its result file, the path is reported in the "trace_file" column.
+                  The path of the result file itself is in the "result_file" column (None for the native backend,
+                  which does not write one), e.g. to score the fronts with front_metrics.front_metrics_table.
+                  The maps of the test are in the "map_files" column, joined by MAP_FILES_SEPARATOR.
+    :param memory_limit_mb: Address space cap in MB of every process running a test (or, for the server backend,
+                            of every server), or None. A run exceeding it gets the "oom" status.
+    :param wall_time_grace: A run is stopped (status "killed-timeout") when it takes wall_time_grace seconds longer
+                            than its time limit, None to wait however long it takes. The "status" column tells
+                            how each run ended (see process_resources.RUN_STATUSES), the metrics of runs that
+                            did not write a result file are NaN. Neither limit applies to the native backend,
+                            which runs in this process.
+    :param max_labels: Label budget of every search, or None. Unlike the limits above, a budget stops the search
+                       itself, which still reports the solutions found so far (status "label-limit"), and it also
+                       applies to the native backend. The "num_labels_max" and "num_open_max" columns are the peak
+                       numbers of labels stored and in open of every search.
+    :param max_memory_mb: Memory budget in MB of the labels, open list and frontiers of every search, or None, a
+                          search reaching it stops like above (status "memory-limit"). Keep it below
+                          memory_limit_mb, which also covers the graph and the heuristic.
     :return: A DataFrame containing results of all tests executed.
     """
 
-    exp_num = 0
-    test_results = pd.DataFrame(columns=["test_number", "algorithm", "map_name", "num_dims",
-                                         "heuristic_time", "search_time", "num_solutions", "time_limit",
-                                         "start", "goal", "n_generated", "n_expanded",
-                                         "timeout", "num_nondom_labels_max", "num_nondom_labels_avg"])
+    rows = []
 
     iterator = tqdm(tests, desc="Running tests") if display_progress else tests
 
     for test in iterator:
-        exp_num += 1
-
         test_number, algorithm, map_name, time_limit, start, goal, result_file, maps = test
 
-        exe_path = "run_emoa.exe" if algorithm == "emoa" else "run_boalex.exe"
-
-        out = run_algorithm(cg_list=maps,
-                            exe_path=exe_path,
-                            res_path=result_file,
-                            vo=start,
-                            vd=goal,
-                            tlimit=time_limit)
-
-        new_row = {
+        if backend == "native":
+            out = run_algorithm_native(cg_list=maps,
+                                       algorithm=algorithm,
+                                       vo=start,
+                                       vd=goal,
+                                       tlimit=time_limit,
+                                       heuristic_cache=heuristic_cache,
+                                       heuristic_threads=heuristic_threads,
+                                       trace=trace,
+                                       max_labels=max_labels,
+                                       max_memory_mb=max_memory_mb)
+            if trace:
+                write_solution_trace(trace_file(result_file), out["trace_times"], out["trace_costs"])
+        else:
+            exe_path = "run_emoa.exe" if algorithm == "emoa" else "run_boalex.exe"
+            run = run_algorithm_server if backend == "server" else run_algorithm
+
+            out = run(cg_list=maps,
+                      exe_path=exe_path,
+                      res_path=result_file,
+                      vo=start,
+                      vd=goal,
+                      tlimit=time_limit,
+                      heuristic_cache=heuristic_cache,
+                      heuristic_threads=heuristic_threads,
+                      trace=trace,
+                      memory_limit_mb=memory_limit_mb,
+                      wall_time_grace=wall_time_grace,
+                      max_labels=max_labels,
+                      max_memory_mb=max_memory_mb)
+
+        rows.append({
             "test_number": test_number,
             "algorithm": algorithm,
             "map_name": map_name,
-            "num_dims": len(maps),
+            "num_dims": get_num_dims(maps),
             "time_limit": time_limit,
             "start": start,
             "goal": goal,
             "n_generated": out["n_generated"],
             "n_expanded": out["n_expanded"],
+            "n_domCheck": out["n_domCheck"],
             "heuristic_time": out["rt_initHeu"],
             "search_time": out["rt_search"],
+            "dom_check_time": out.get("rt_domCheck", float("nan")),
+            **{column: out[column] for column in RESOURCE_COLUMNS},
             "timeout": out["timeout"],
+            "status": out["status"],
             "num_nondom_labels_max": out["num_nondom_labels_max"],
             "num_nondom_labels_avg": out["num_nondom_labels_avg"],
-            "num_solutions": out["num_solutions"]
-        }
+            "num_labels_max": out.get("num_labels_max", float("nan")),
+            "num_open_max": out.get("num_open_max", float("nan")),
+            "num_solutions": out["num_solutions"],
+            "result_file": result_file if backend != "native" else None,
+            "trace_file": trace_file(result_file) if trace else None,
+            "map_files": MAP_FILES_SEPARATOR.join(maps)
+        })
 
-        test_results = pd.concat([test_results, pd.DataFrame([new_row])], ignore_index=True)
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
 
-    return test_results
 
+def load_history(history) -> pd.DataFrame:
+    """
+    Loads results of prior runs, as written by parallel_run.
 
-def parallel_run(tests: list, batch_size: int = 1, n_jobs: int = 1, display_progress: bool = False) -> pd.DataFrame:
+    :param history: A DataFrame, a path to a CSV file or a list of such paths and DataFrames.
+    :return: A DataFrame with all prior results (empty if nothing is given).
     """
-    Executes tests in parallel using joblib.
+    if history is None:
+        return pd.DataFrame()
+    if isinstance(history, pd.DataFrame):
+        return history
+    if isinstance(history, str):
+        return pd.read_csv(history)
+
+    frames = [load_history(item) for item in history]
+    frames = [frame for frame in frames if not frame.empty]
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def estimate_test_costs(tests: list, history=None) -> list:
+    """
+    Estimates the expected wall time of each test from prior runs of the same (map_name, num_dims, algorithm) class.
+
+    Timed out runs count as their full time limit. Tests of classes without prior runs get the median estimate
+    of the known classes, or their time limit if nothing is known at all.
 
     :param tests: A list of test parameters including algorithm type and configurations.
-    :param batch_size: Number of tests to run in each batch.
-    :param n_jobs: Number of parallel jobs to run.
-    :param display_progress: If True, displays a progress bar during execution. Works correctly only when n_jobs=1.
-    :return: A DataFrame containing results of all tests executed.
+    :param history: Prior results, see load_history.
+    :return: A list with the expected cost (in seconds) of each test.
     """
+    prior = load_history(history)
+    class_costs = dict()
 
-    random.shuffle(tests)
+    if not prior.empty:
+        run_time = prior["heuristic_time"] + prior["search_time"]
+        run_time = run_time.where(prior["timeout"] == 0, np.fmax(run_time, prior["time_limit"]))
+        class_costs = run_time.groupby([prior["map_name"], prior["num_dims"], prior["algorithm"]]).mean().to_dict()
+
+    default_cost = float(np.median(list(class_costs.values()))) if class_costs else None
+
+    costs = []
+    for test in tests:
+        test_class = (test[2], get_num_dims(test[-1]), test[1])
+        cost = class_costs.get(test_class, default_cost)
+        costs.append(float(test[3]) if cost is None else cost)
+
+    return costs
+
+
+def parallel_run(tests: list, batch_size: int = 1, n_jobs: int = 1, display_progress: bool = False,
+                 backend: str = "cli", history=None, results_dir: str = None,
+                 journal_path: str = None, result_format: str = "txt", heuristic_cache: str = None,
+                 heuristic_threads: int = 1, trace: bool = False, store_path: str = None,
+                 run_metadata: dict = None, memory_limit_mb: float = None,
+                 wall_time_grace: float = WALL_TIME_GRACE_S, max_labels: int = None,
+                 max_memory_mb: float = None) -> pd.DataFrame:
+    """
+    Executes tests in parallel in a pool of worker processes.
+
+    Tests are dispatched longest-expected-first (see estimate_test_costs), so long runs such as NY timeouts
+    start early instead of becoming stragglers at the end of the run. Without history the order is random.
+    Every test writes its own result file, so concurrent tests never share a file.
 
-    for i in range(len(tests)):
-        tests[i] = tests[i][:6] + [f"../data_out/technical_txts/technical_{i % (n_jobs * 2)}.txt"] + [tests[i][6]]
+    With a journal, every finished batch is appended to it at once, so an interrupted run loses only the tests
+    that were still running. Calling parallel_run again with the same journal skips the tests already recorded.
 
-    num_batch = (len(tests) // batch_size) + (len(tests) % batch_size > 0)
+    :param tests: A list of test parameters including algorithm type and configurations.
+    :param batch_size: Number of tests sent to a worker at once.
+    :param n_jobs: Number of worker processes.
+    :param display_progress: If True, displays a progress bar of finished tests.
+    :param backend: "cli", "server" or "native", see test_system.
+    :param history: Results of prior runs used to estimate the cost of the tests, see load_history.
+    :param results_dir: Directory to keep the result files in. If None, they are written to a scratch
+                        directory in TECHNICAL_TXTS_PATH, which is removed at the end.
+    :param journal_path: Path to the results journal (see ResultsJournal). If None, results are kept in memory.
+    :param result_format: "txt" for text result files, "bin" for binary ones, which are faster to write and read.
+    :param heuristic_cache: Directory of the heuristic cache, see test_system.
+    :param heuristic_threads: Number of threads computing the heuristic of a test, see test_system.
+    :param trace: If True, every test writes its solution trace, see test_system. Needs results_dir,
+                  where the traces are kept.
+    :param store_path: Path to a results store (see ResultsStore, e.g. RESULTS_STORE_PATH) the results of the run
+                       are appended to, with the run parameters and run_metadata.
+    :param run_metadata: Additional metadata of the run saved in the store, e.g. {"experiment": "NY 3 dims"}.
+    :param memory_limit_mb: Address space cap in MB of every run, see test_system. With n_jobs workers,
+                            n_jobs * memory_limit_mb below the memory of the node keeps it from running out of memory.
+    :param wall_time_grace: Wall time a run may take beyond its time limit, see test_system.
+    :param max_labels: Label budget of every search, see test_system.
+    :param max_memory_mb: Memory budget of every search in MB, see test_system.
+    :return: A DataFrame containing results of all tests executed (for a journal: of all given tests).
+    """
+    if trace and results_dir is None:
+        raise ValueError("trace needs a results_dir, the scratch directory is removed at the end of the run")
 
-    tests_with_batch = [tests[i * batch_size:(i + 1) * batch_size] for i in range(num_batch)]
+    scratch_dir = results_dir
+    if scratch_dir is None:
+        os.makedirs(TECHNICAL_TXTS_PATH, exist_ok=True)
+        scratch_dir = tempfile.mkdtemp(prefix="run_", dir=TECHNICAL_TXTS_PATH)
+    else:
+        os.makedirs(scratch_dir, exist_ok=True)
 
-    with Parallel(n_jobs=n_jobs, verbose=11, backend="threading") as parallel:
-        results = parallel(
-            delayed(test_system)(test_batch, display_progress=display_progress) for test_batch in tests_with_batch)
+    if heuristic_cache is not None:
+        os.makedirs(heuristic_cache, exist_ok=True)
 
-    test_results = pd.concat(results, ignore_index=True)
+    journal = ResultsJournal(journal_path) if journal_path is not None else None
+    requested_keys = [test_key(test) for test in tests]
+
+    if journal is not None:
+        completed = journal.completed_keys()
+        tests = [test for test in tests if test_key(test) not in completed]
+
+    random.shuffle(tests)
+    costs = estimate_test_costs(tests, history)
+    order = sorted(range(len(tests)), key=lambda i: costs[i], reverse=True)
+
+    scheduled = []
+    for i in order:
+        test = tests[i]
+        result_file = f"{scratch_dir}/{test[0]}_{test[1]}_{i}.{result_format}".replace("\\", "/")
+        scheduled.append(test[:6] + [result_file] + [test[6]])
+
+    batches = [scheduled[i:i + batch_size] for i in range(0, len(scheduled), batch_size)]
+    results = []
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(test_system, batch, backend=backend, heuristic_cache=heuristic_cache,
+                                       heuristic_threads=heuristic_threads, trace=trace,
+                                       memory_limit_mb=memory_limit_mb, wall_time_grace=wall_time_grace,
+                                       max_labels=max_labels, max_memory_mb=max_memory_mb)
+                       for batch in batches]
+
+            progress = tqdm(total=len(scheduled), desc="Running tests") if display_progress else None
+            for future in as_completed(futures):
+                batch_results = future.result()
+                if journal is not None:
+                    journal.append(batch_results)
+                else:
+                    results.append(batch_results)
+                if progress is not None:
+                    progress.update(len(batch_results))
+            if progress is not None:
+                progress.close()
+    finally:
+        if results_dir is None:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    if journal is not None:
+        test_results = journal.to_dataframe(requested_keys)
+        test_results = test_results.reindex(columns=RESULT_COLUMNS)
+    else:
+        test_results = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=RESULT_COLUMNS)
+
+    if store_path is not None:
+        ResultsStore(store_path).append(test_results, {
+            "num_tests": len(requested_keys), "backend": backend, "n_jobs": n_jobs, "batch_size": batch_size,
+            "result_format": result_format, "heuristic_threads": heuristic_threads, "trace": trace,
+            "results_dir": results_dir, "journal_path": journal_path, "memory_limit_mb": memory_limit_mb,
+            "wall_time_grace": wall_time_grace, "max_labels": max_labels, "max_memory_mb": max_memory_mb,
+            **(run_metadata or dict())
+        })
 
     return test_results
 
@@ -189,7 +826,7 @@ if __name__ == "__main__":
     # test_results.to_csv("../data_out/NY_results/NY_test_results_2_2.csv", index=False)
     # print(test_results)
 
-    # Simple maps tests: can be uncommented if needed
+    # Simple maps tests: can be uncommented if needed, python/sweep_pipeline.py runs them all as one pipeline
     # tests_params = [
     #     {"num_dims": 3, "width": 30, "height": 30},
     #     {"num_dims": 4, "width": 15, "height": 15},
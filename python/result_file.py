@@ -0,0 +1,165 @@
+"""
+About: Lazy reader of the binary result files written by run_emoa and run_boalex (see include/result_io.hpp),
+       and reader / writer of their solution trace files.
+Author: Denis Derkach
+"""
+
+import numpy as np
+from typing import List, Tuple
+
+RESULT_FILE_MAGIC = b"EMOARES1"
+RESULT_FILE_SUFFIX = ".bin"
+RESULT_METRIC_NAME_SIZE = 32
+TRACE_FILE_MAGIC = b"EMOATRC1"
+TRACE_FILE_SUFFIX = ".trace"
+
+# Metrics stored as doubles in the file that are reported as integers
+INTEGER_METRICS = {"n_generated", "n_expanded", "n_domCheck", "timeout", "termination", "num_labels_max",
+                   "num_open_max"}
+
+
+def is_binary_result(res_file: str) -> bool:
+    """
+    :param res_file: Path to a result file.
+    :return: True if the file is a binary result file, i.e. ends with ".bin".
+    """
+    return res_file.endswith(RESULT_FILE_SUFFIX)
+
+
+def read_text_metrics(lines: List[str]) -> Tuple[dict, int]:
+    """
+    Reads the metrics of a text result file: after the header line, one "name: value" line per metric up to the
+    number of solutions "N", so readers do not depend on the position of the metrics.
+
+    :param lines: The lines of the result file.
+    :return: A tuple (metrics, start): the metrics by name (N as "num_solutions") and the index of the line of the
+             first solution.
+    """
+    metrics = dict()
+    for i in range(1, len(lines)):
+        name, value = lines[i].split(":", 1)
+        if name == "N":
+            metrics["num_solutions"] = int(value)
+            return metrics, i + 1
+        metrics[name] = int(value) if name in INTEGER_METRICS else float(value)
+
+    raise ValueError("the result file has no number of solutions")
+
+
+def trace_file(res_file: str) -> str:
+    """
+    :param res_file: Path to a result file.
+    :return: Path to the solution trace written next to it (with --trace 1).
+    """
+    return res_file + TRACE_FILE_SUFFIX
+
+
+def read_solution_trace(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reads a solution trace file.
+
+    :param path: Path to the trace file.
+    :return: A tuple (times, costs): the search time (seconds, ascending) at which each solution joined the front,
+             and the (num_solutions, cost_dim) matrix of their costs.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(TRACE_FILE_MAGIC)) != TRACE_FILE_MAGIC:
+            raise ValueError(f"{path} is not a solution trace file")
+
+        num_solutions, cost_dim = (int(x) for x in np.frombuffer(file.read(16), dtype=np.uint64))
+        times = np.frombuffer(file.read(8 * num_solutions), dtype=np.float64)
+        costs = np.frombuffer(file.read(8 * num_solutions * cost_dim), dtype=np.float64)
+
+    return times, costs.reshape(num_solutions, cost_dim)
+
+
+def write_solution_trace(path: str, times: np.ndarray, costs: np.ndarray) -> None:
+    """
+    Writes a solution trace file in the format of run_emoa / run_boalex, e.g. for traces of the native backend.
+
+    :param path: Path to the trace file.
+    :param times: The search time at which each solution joined the front.
+    :param costs: The (num_solutions, cost_dim) matrix of their costs.
+    :return: None
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    num_solutions = len(times)
+    cost_dim = costs.shape[1] if num_solutions > 0 else 0
+
+    with open(path, "wb") as file:
+        file.write(TRACE_FILE_MAGIC)
+        file.write(np.array([num_solutions, cost_dim], dtype=np.uint64).tobytes())
+        file.write(np.asarray(times, dtype=np.float64).tobytes())
+        file.write(costs.reshape(num_solutions, cost_dim).tobytes())
+
+
+class BinaryResult:
+    """
+    A binary result file. Only the header is read on construction, the Pareto front and the paths
+    are memory-mapped when they are first asked for.
+    """
+
+    def __init__(self, res_file: str):
+        """
+        :param res_file: Path to the binary result file.
+        """
+        self.res_file = res_file
+        self.metrics = dict()
+
+        with open(res_file, "rb") as file:
+            if file.read(len(RESULT_FILE_MAGIC)) != RESULT_FILE_MAGIC:
+                raise ValueError(f"{res_file} is not a binary result file")
+
+            num_metrics = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+            records = np.frombuffer(file.read(num_metrics * (RESULT_METRIC_NAME_SIZE + 8)),
+                                    dtype=[("name", f"S{RESULT_METRIC_NAME_SIZE}"), ("value", "<f8")])
+
+            for name, value in records:
+                name = name.decode()
+                self.metrics[name] = int(value) if name in INTEGER_METRICS else float(value)
+
+            self.num_solutions, self.cost_dim, self.num_path_vertices = \
+                (int(x) for x in np.frombuffer(file.read(24), dtype=np.uint64))
+            self._offset = file.tell()
+
+    def _map(self, dtype: type, count: int, offset: int) -> np.ndarray:
+        """
+        Memory-maps count values of the given type, starting at offset bytes into the file.
+        """
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.res_file, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+    @property
+    def label_ids(self) -> np.ndarray:
+        """
+        :return: The label ids of the solutions, in ascending order.
+        """
+        return self._map(np.int64, self.num_solutions, self._offset)
+
+    @property
+    def front(self) -> np.ndarray:
+        """
+        :return: The costs of the solutions, a (num_solutions, cost_dim) matrix.
+        """
+        offset = self._offset + 8 * self.num_solutions
+        return self._map(np.float64, self.num_solutions * self.cost_dim, offset).reshape(self.num_solutions,
+                                                                                         self.cost_dim)
+
+    @property
+    def paths(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: A tuple (offsets, vertices), the path of the k-th solution is vertices[offsets[k]:offsets[k + 1]].
+        """
+        offset = self._offset + 8 * self.num_solutions * (1 + self.cost_dim)
+        offsets = self._map(np.uint64, self.num_solutions + 1, offset)
+        vertices = self._map(np.int64, self.num_path_vertices, offset + 8 * (self.num_solutions + 1))
+        return offsets, vertices
+
+    def path(self, k: int) -> np.ndarray:
+        """
+        :param k: Index of a solution.
+        :return: The vertices of the path of the k-th solution.
+        """
+        offsets, vertices = self.paths
+        return vertices[int(offsets[k]):int(offsets[k + 1])]
@@ -0,0 +1,131 @@
+"""
+About: Append-only on-disk journal of test results, used by parallel_run to resume interrupted runs.
+Author: Denis Derkach
+"""
+
+import os
+import json
+import pandas as pd
+from typing import Any, Iterable, List, Set, Tuple
+
+# Separator of the map files of a test in the "map_files" column
+MAP_FILES_SEPARATOR = ";"
+
+# Columns that identify a test in the journal. The map files tell apart tests of different maps with the same map name
+# and test number, e.g. the simple map tests of every walls ratio
+JOURNAL_KEY_COLUMNS = ["test_number", "algorithm", "map_name", "start", "goal", "time_limit", "map_files"]
+
+
+def journal_key(test_number: Any, algorithm: Any, map_name: Any, start: Any, goal: Any, time_limit: Any,
+                map_files: Any) -> Tuple:
+    """
+    Builds the normalized key of a test, so that keys read back from JSON compare equal to keys of test lists.
+
+    :param map_files: The map files of the test, as a list or joined by MAP_FILES_SEPARATOR.
+    :return: A tuple (test_number, algorithm, map_name, start, goal, time_limit, map_files).
+    """
+    if not isinstance(map_files, str):
+        map_files = MAP_FILES_SEPARATOR.join(map_files)
+
+    return int(test_number), str(algorithm), str(map_name), int(start), int(goal), float(time_limit), map_files
+
+
+def test_key(test: list) -> Tuple:
+    """
+    Returns the journal key of a test given in the tests list format.
+
+    :param test: A test [test_number, algorithm, map_name, time_limit, start, goal, maps].
+    :return: The journal key of the test.
+    """
+    return journal_key(test[0], test[1], test[2], test[4], test[5], test[3], test[6])
+
+
+class ResultsJournal:
+    """
+    An append-only file with one JSON record per finished test.
+
+    Every append is flushed and synced to disk, so a crash or Ctrl-C loses at most the tests still running.
+    A record truncated by a crash is skipped when the journal is read back.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the journal file, created on the first append.
+        """
+        self.path = path
+
+    @staticmethod
+    def _record_key(record: dict) -> Tuple:
+        """
+        Returns the journal key of a record. Records of journals written before the map files were part of the key
+        match no test, so their tests are run again.
+        """
+        return journal_key(*[record.get(column, "") for column in JOURNAL_KEY_COLUMNS])
+
+    def read_records(self) -> List[dict]:
+        """
+        Reads all complete records of the journal.
+
+        :return: A list of result records in the order they were appended.
+        """
+        records = []
+
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, mode="r") as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+
+        return records
+
+    def completed_keys(self) -> Set[Tuple]:
+        """
+        :return: The set of journal keys of all recorded tests.
+        """
+        return {self._record_key(record) for record in self.read_records()}
+
+    def append(self, results: pd.DataFrame) -> None:
+        """
+        Appends the rows of a results DataFrame to the journal and syncs the file.
+
+        :param results: A DataFrame with (at least) the JOURNAL_KEY_COLUMNS columns.
+        :return: None
+        """
+        if results.empty:
+            return
+
+        lines = results.to_json(orient="records", lines=True)
+        if not lines.endswith("\n"):
+            lines += "\n"
+
+        with open(self.path, mode="a+") as file:
+            # a record cut by a crash must not be merged with the next one
+            if file.tell() > 0:
+                file.seek(file.tell() - 1)
+                if file.read(1) != "\n":
+                    file.write("\n")
+
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def to_dataframe(self, keys: Iterable[Tuple] = None) -> pd.DataFrame:
+        """
+        Builds a DataFrame from the journal in one pass.
+
+        :param keys: If given, only records with these journal keys are kept.
+        :return: A DataFrame with one row per record (the last record wins for repeated keys).
+        """
+        keys = set(keys) if keys is not None else None
+        records = dict()
+
+        for record in self.read_records():
+            key = self._record_key(record)
+            if keys is None or key in keys:
+                records[key] = record
+
+        return pd.DataFrame.from_records(list(records.values()))
@@ -0,0 +1,315 @@
+"""
+About: Consolidated columnar store of test results, partitioned by map family, number of dimensions and walls
+       percentage, which the runner appends to and the tables and plots query.
+Author: Denis Derkach
+"""
+
+import os
+import re
+import glob
+import json
+import uuid
+import socket
+import datetime
+import operator
+import numpy as np
+import pandas as pd
+from typing import Any, Iterable, List, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+# Default location of the store
+RESULTS_STORE_PATH = "../data_out/results_store/"
+
+# Columns of the partition directories (map_family=.../num_dims=.../walls_percentage=...)
+PARTITION_COLUMNS = ["map_family", "num_dims", "walls_percentage"]
+
+# Columns identifying the run (one call of parallel_run or one import) a result belongs to
+RUN_COLUMNS = ["run_id", "recorded_at"]
+
+# Types of the stored columns (py_parallel_api.RESULT_COLUMNS, then the partition and run columns),
+# so that every partition file reads back the same
+STORE_SCHEMA = {
+    "test_number": "Int64", "algorithm": "string", "map_name": "string", "num_dims": "Int64",
+    "heuristic_time": "float64", "search_time": "float64", "dom_check_time": "float64", "wall_time": "float64",
+    "user_time": "float64",
+    "sys_time": "float64", "peak_rss_mb": "float64", "num_solutions": "Int64", "time_limit": "float64",
+    "start": "Int64", "goal": "Int64", "n_generated": "Int64", "n_expanded": "Int64", "n_domCheck": "Int64",
+    "timeout": "Int64",
+    "status": "string", "num_nondom_labels_max": "float64", "num_nondom_labels_avg": "float64",
+    "num_labels_max": "Int64", "num_open_max": "Int64",
+    "result_file": "string", "trace_file": "string", "map_files": "string", "map_family": "string",
+    "walls_percentage": "Int64", "run_id": "string", "recorded_at": "string"
+}
+
+STORE_COLUMNS = list(STORE_SCHEMA)
+
+_FILTER_OPERATORS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+                     ">": operator.gt, ">=": operator.ge, "in": lambda values, allowed: values.isin(allowed)}
+
+_WALLS_PATTERN = re.compile(r"(\d+)_walls_ratio")
+
+
+def map_family(map_name: str) -> str:
+    """
+    Returns the map family of a map name: "NY", "simple_map" for the maps of simple_map_tests_generator
+    ("simple map 3 dims"), otherwise the map name with non-alphanumerics replaced by "_".
+
+    :param map_name: The map name of a test.
+    :return: The map family.
+    """
+    if re.fullmatch(r"simple map \d+ dims", map_name):
+        return "simple_map"
+
+    return re.sub(r"\W+", "_", map_name).strip("_")
+
+
+def walls_percentage(map_files: Any) -> int:
+    """
+    Returns the walls percentage of a generated map from its path (see simple_map_tests_generator), 0 otherwise.
+
+    :param map_files: The map files of a test ("map_files" column), or None.
+    :return: The walls percentage.
+    """
+    match = _WALLS_PATTERN.search(map_files) if isinstance(map_files, str) else None
+    return int(match.group(1)) if match else 0
+
+
+def with_partition_columns(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the partition columns that a results DataFrame is missing, derived from map_name and map_files.
+
+    :param results: A DataFrame of test results.
+    :return: The DataFrame with the PARTITION_COLUMNS.
+    """
+    results = results.copy()
+
+    if "map_family" not in results:
+        families = {name: map_family(str(name)) for name in results["map_name"].unique()}
+        results["map_family"] = results["map_name"].map(families)
+    if "walls_percentage" not in results:
+        map_files = results["map_files"] if "map_files" in results else pd.Series(None, index=results.index)
+        results["walls_percentage"] = map_files.map(walls_percentage)
+
+    return results
+
+
+def apply_filters(results: pd.DataFrame, filters: List[Tuple[str, str, Any]]) -> pd.DataFrame:
+    """
+    Keeps the rows of a DataFrame matching all filters.
+
+    :param results: A DataFrame.
+    :param filters: A list of (column, op, value), op is one of "==", "!=", "<", "<=", ">", ">=", "in".
+    :return: The matching rows.
+    """
+    if not filters:
+        return results
+
+    mask = np.ones(len(results), dtype=bool)
+    for column, op, value in filters:
+        mask &= np.asarray(_FILTER_OPERATORS[op](results[column], value), dtype=bool)
+
+    return results[mask]
+
+
+class ResultsStore:
+    """
+    A directory of results partitioned as map_family=F/num_dims=D/walls_percentage=W/, each append adds one file
+    per partition (Parquet with pyarrow, otherwise CSV read back with STORE_SCHEMA), and the metadata of every run
+    is kept in _runs/RUN_ID.json.
+
+    Queries only open the partitions matching the filters on PARTITION_COLUMNS, and only read the asked columns.
+    """
+
+    def __init__(self, path: str = RESULTS_STORE_PATH):
+        """
+        :param path: Path to the store directory, created on the first append.
+        """
+        self.path = path
+
+    def append(self, results: pd.DataFrame, run_metadata: dict = None) -> str:
+        """
+        Appends the results of a run.
+
+        :param results: A DataFrame of test results (py_parallel_api.RESULT_COLUMNS), missing columns are null.
+        :param run_metadata: Parameters of the run (backend, n_jobs, ...), saved with the host and the time.
+        :return: The id of the run.
+        """
+        run_id = uuid.uuid4().hex
+        recorded_at = datetime.datetime.now().isoformat(timespec="seconds")
+
+        metadata = {"run_id": run_id, "recorded_at": recorded_at, "host": socket.gethostname(),
+                    "num_results": len(results), **(run_metadata or dict())}
+        os.makedirs(os.path.join(self.path, "_runs"), exist_ok=True)
+        with open(os.path.join(self.path, "_runs", f"{run_id}.json"), mode="w") as file:
+            json.dump(metadata, file, default=str)
+
+        if results.empty:
+            return run_id
+
+        results = with_partition_columns(results)
+        results["run_id"] = run_id
+        results["recorded_at"] = recorded_at
+        results = _typed(results.reindex(columns=STORE_COLUMNS))
+
+        for partition, rows in results.groupby(PARTITION_COLUMNS):
+            self._write(self._partition_dir(*partition), rows.drop(columns=PARTITION_COLUMNS), run_id)
+
+        return run_id
+
+    def import_csv(self, input_file: str, walls: int = None, run_metadata: dict = None) -> str:
+        """
+        Appends a results CSV file, e.g. of an earlier run.
+
+        :param input_file: Path to the CSV file containing test results.
+        :param walls: Walls percentage of the maps, if it can not be derived from the map_files column.
+        :param run_metadata: Parameters of the run, see append.
+        :return: The id of the run.
+        """
+        results = pd.read_csv(input_file)
+        if walls is not None:
+            results["walls_percentage"] = walls
+
+        return self.append(results, {"source": input_file, **(run_metadata or dict())})
+
+    def query(self, columns: List[str] = None, filters: List[Tuple[str, str, Any]] = None) -> pd.DataFrame:
+        """
+        Reads the results matching the filters.
+
+        :param columns: The columns to return, all STORE_COLUMNS if None.
+        :param filters: A list of (column, op, value), see apply_filters.
+        :return: A DataFrame with the matching results.
+        """
+        columns = list(columns) if columns is not None else STORE_COLUMNS
+        filters = filters or []
+        partition_filters = [f for f in filters if f[0] in PARTITION_COLUMNS]
+        row_filters = [f for f in filters if f[0] not in PARTITION_COLUMNS]
+
+        file_columns = [column for column in STORE_COLUMNS if column not in PARTITION_COLUMNS and
+                        (column in columns or column in {f[0] for f in row_filters})]
+        parts = []
+
+        for partition, files in self._partitions(partition_filters):
+            for file_path in files:
+                part = self._read(file_path, file_columns)
+                for column, value in zip(PARTITION_COLUMNS, partition):
+                    part[column] = value
+                parts.append(apply_filters(part, row_filters))
+
+        if not parts:
+            return _typed(pd.DataFrame(columns=columns))
+
+        return _typed(pd.concat(parts, ignore_index=True))[columns]
+
+    def runs(self) -> pd.DataFrame:
+        """
+        :return: A DataFrame with the metadata of all runs in the store, in the order they were recorded.
+        """
+        records = []
+        for file_path in glob.glob(os.path.join(self.path, "_runs", "*.json")):
+            with open(file_path, mode="r") as file:
+                records.append(json.load(file))
+
+        runs = pd.DataFrame.from_records(records)
+        return runs.sort_values("recorded_at", ignore_index=True) if not runs.empty else runs
+
+    def compact(self) -> None:
+        """
+        Merges the files of every partition into one, which keeps queries fast after many small appends.
+
+        :return: None
+        """
+        for partition, files in self._partitions([]):
+            if len(files) < 2:
+                continue
+            file_columns = [column for column in STORE_COLUMNS if column not in PARTITION_COLUMNS]
+            merged = pd.concat([self._read(file_path, file_columns) for file_path in files], ignore_index=True)
+            self._write(self._partition_dir(*partition), merged, "compacted-" + uuid.uuid4().hex)
+            for file_path in files:
+                os.remove(file_path)
+
+    def _partition_dir(self, family: str, num_dims: int, walls: int) -> str:
+        """
+        Returns the directory of a partition.
+        """
+        return os.path.join(self.path, f"map_family={family}", f"num_dims={num_dims}", f"walls_percentage={walls}")
+
+    def _partitions(self, filters: List[Tuple[str, str, Any]]) -> Iterable[Tuple[tuple, List[str]]]:
+        """
+        Yields the partitions matching the filters on PARTITION_COLUMNS and their files.
+        """
+        for directory in sorted(glob.glob(os.path.join(self.path, "map_family=*", "num_dims=*",
+                                                       "walls_percentage=*"))):
+            values = [part.split("=", 1)[1] for part in os.path.normpath(directory).split(os.sep)[-3:]]
+            partition = pd.DataFrame([[values[0], int(values[1]), int(values[2])]], columns=PARTITION_COLUMNS)
+            if apply_filters(partition, filters).empty:
+                continue
+            files = sorted(glob.glob(os.path.join(directory, "part-*")))
+            if files:
+                yield tuple(partition.iloc[0]), files
+
+    @staticmethod
+    def _write(directory: str, rows: pd.DataFrame, name: str) -> None:
+        """
+        Writes the rows of one partition to a new file, through a temporary file so readers never see a partial one.
+        """
+        os.makedirs(directory, exist_ok=True)
+        suffix = ".parquet" if pyarrow is not None else ".csv"
+        file_path = os.path.join(directory, f"part-{name}{suffix}")
+
+        if pyarrow is not None:
+            pq.write_table(pyarrow.Table.from_pandas(rows, preserve_index=False), file_path + ".tmp")
+        else:
+            rows.to_csv(file_path + ".tmp", index=False)
+        os.replace(file_path + ".tmp", file_path)
+
+    @staticmethod
+    def _read(file_path: str, columns: List[str]) -> pd.DataFrame:
+        """
+        Reads the given columns of a partition file, the columns added to STORE_SCHEMA after it was written are null.
+        """
+        if file_path.endswith(".parquet"):
+            if pyarrow is None:
+                raise ImportError(f"reading {file_path} needs pyarrow")
+            file_columns = set(pq.read_schema(file_path).names)
+            return pq.read_table(file_path, columns=[column for column in columns if column in file_columns]) \
+                .to_pandas().reindex(columns=columns)
+        if file_path.endswith(".csv"):
+            return pd.read_csv(file_path, usecols=lambda column: column in columns,
+                               dtype={column: STORE_SCHEMA[column] for column in columns}).reindex(columns=columns)
+
+        return pd.DataFrame(columns=columns)
+
+
+def _typed(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Casts the columns of a DataFrame to their STORE_SCHEMA types.
+    """
+    return results.astype({column: STORE_SCHEMA[column] for column in results.columns if column in STORE_SCHEMA})
+
+
+def load_results(source: str, columns: List[str] = None, filters: List[Tuple[str, str, Any]] = None) -> pd.DataFrame:
+    """
+    Reads test results from a ResultsStore directory or a results CSV file, so that tables and plots accept both.
+
+    :param source: Path to a store directory or to a CSV file containing test results.
+    :param columns: The columns to return, all columns if None.
+    :param filters: A list of (column, op, value), see apply_filters. For a CSV file the PARTITION_COLUMNS
+                    are derived from map_name and map_files.
+    :return: A DataFrame with the matching results.
+    """
+    if os.path.isdir(source):
+        return ResultsStore(source).query(columns, filters)
+
+    results = pd.read_csv(source)
+    if filters and any(f[0] in PARTITION_COLUMNS for f in filters) or \
+            columns and any(column in PARTITION_COLUMNS for column in columns):
+        results = with_partition_columns(results)
+    results = apply_filters(results, filters)
+
+    # columns recorded only by later runs (e.g. map_files) are NaN in older CSV files
+    return results.reindex(columns=list(columns)) if columns is not None else results
@@ -0,0 +1,205 @@
+"""
+About: Pipelined simple map sweeps: the maps are generated in a process pool and the tests of every map are sent to
+       one pool of workers as soon as its files are written, across all (dims, walls) configurations at once.
+Author: Denis Derkach
+"""
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from tqdm import tqdm
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List
+
+from python.map_store import MAP_STORE_PATH, MapStore
+from python.py_parallel_api import RESULT_COLUMNS, TECHNICAL_TXTS_PATH, WALL_TIME_GRACE_S, test_system
+from python.results_journal import ResultsJournal, test_key
+from python.results_store import ResultsStore
+
+# The map sizes of the simple map experiments, per number of dimensions
+SIMPLE_MAP_CONFIGS = [
+    {"num_dims": 3, "width": 30, "height": 30},
+    {"num_dims": 4, "width": 15, "height": 15},
+    {"num_dims": 5, "width": 12, "height": 12},
+    {"num_dims": 6, "width": 10, "height": 10},
+    {"num_dims": 7, "width": 9, "height": 9},
+    {"num_dims": 8, "width": 9, "height": 9},
+    {"num_dims": 9, "width": 8, "height": 8},
+    {"num_dims": 10, "width": 8, "height": 8},
+]
+
+# The walls ratios of the simple map experiments
+SIMPLE_MAP_WALLS_RATIOS = [0.0, 0.05, 0.10]
+
+# Journal of the simple map sweep of __main__, a sweep interrupted for any reason resumes from it
+SWEEP_JOURNAL_PATH = "../data_out/simple_map_sweep_journal.jsonl"
+
+
+def simple_map_sweep(configs: List[dict] = None, walls_ratios: List[float] = None, num_tests: int = 50,
+                     time_limit: int = 600, seed: int = 0) -> List[dict]:
+    """
+    Lists the maps of a simple map sweep, test by test across the configurations, so that all configurations
+    progress together instead of one after the other.
+
+    As in simple_map_tests_generator, test k of a configuration uses the map generated with seed + k - 1 and
+    searches from the first to the last vertex.
+
+    :param configs: A list of {"num_dims", "width", "height"}, SIMPLE_MAP_CONFIGS if None.
+    :param walls_ratios: The walls ratios of every configuration, SIMPLE_MAP_WALLS_RATIOS if None.
+    :param num_tests: Number of tests (maps) per configuration and walls ratio.
+    :param time_limit: The time limit for each test in seconds.
+    :param seed: Seed of the first map of every configuration.
+    :return: A list of map jobs for pipelined_run.
+    """
+    configs = configs if configs is not None else SIMPLE_MAP_CONFIGS
+    walls_ratios = walls_ratios if walls_ratios is not None else SIMPLE_MAP_WALLS_RATIOS
+    map_jobs = []
+
+    for exp_number in range(1, num_tests + 1):
+        for config in configs:
+            for walls_ratio in walls_ratios:
+                map_jobs.append({"test_number": exp_number, "width": config["width"], "height": config["height"],
+                                 "num_dims": config["num_dims"], "walls": walls_ratio > 0, "walls_ratio": walls_ratio,
+                                 "seed": seed + exp_number - 1, "start": 1,
+                                 "goal": config["width"] * config["height"], "time_limit": time_limit})
+
+    return map_jobs
+
+
+def _generate_map(map_store_path: str, map_job: dict) -> List[str]:
+    """
+    Generates the map of a map job (or finds it in the store), a worker of pipelined_run.
+    """
+    return MapStore(map_store_path).get(width=map_job["width"], height=map_job["height"],
+                                        num_dims=map_job["num_dims"], walls=map_job["walls"],
+                                        walls_ratio=map_job["walls_ratio"], seed=map_job["seed"])
+
+
+def pipelined_run(map_jobs: List[dict], n_jobs: int = 1, generator_jobs: int = 1, display_progress: bool = False,
+                  backend: str = "cli", map_store_path: str = MAP_STORE_PATH, results_dir: str = None,
+                  result_format: str = "txt", heuristic_cache: str = None, heuristic_threads: int = 1,
+                  store_path: str = None, run_metadata: dict = None, memory_limit_mb: float = None,
+                  wall_time_grace: float = WALL_TIME_GRACE_S, max_labels: int = None,
+                  max_memory_mb: float = None, journal_path: str = None) -> pd.DataFrame:
+    """
+    Generates the maps of the map jobs in a pool of generator_jobs processes and runs the emoa and boa tests of
+    each map in a pool of n_jobs workers as soon as the map is generated, so the workers do not wait for the
+    maps of a whole configuration and the tail of one configuration overlaps with the next ones.
+
+    :param map_jobs: The maps and tests to run, see simple_map_sweep.
+    :param n_jobs: Number of worker processes running tests.
+    :param generator_jobs: Number of processes generating maps.
+    :param display_progress: If True, displays a progress bar of finished tests.
+    :param backend: "cli", "server" or "native", see test_system.
+    :param map_store_path: Path to the map store, see MapStore.
+    :param results_dir: Directory to keep the result files in, see parallel_run.
+    :param result_format: "txt" or "bin", see parallel_run.
+    :param heuristic_cache: Directory of the heuristic cache, see test_system.
+    :param heuristic_threads: Number of threads computing the heuristic of a test, see test_system.
+    :param store_path: Path to a results store the results are appended to, see parallel_run.
+    :param run_metadata: Additional metadata of the run saved in the store.
+    :param memory_limit_mb: Address space cap of every run, see test_system.
+    :param wall_time_grace: Wall time a run may take beyond its time limit, see test_system.
+    :param max_labels: Label budget of every search, see test_system.
+    :param max_memory_mb: Memory budget of every search in MB, see test_system.
+    :param journal_path: Path to the results journal (see ResultsJournal), every test is appended to it as soon as
+                         it finishes, so a failed or interrupted sweep loses only the tests that were running.
+                         Calling pipelined_run again with the same journal skips the tests already recorded
+                         (the maps come back from the map store). If None, results are kept in memory.
+    :return: A DataFrame with the results of all tests (for a journal: of all tests of the map jobs). The test
+             numbers restart in every configuration, which results_store.with_partition_columns tells apart
+             (num_dims and walls_percentage).
+    """
+    scratch_dir = results_dir
+    if scratch_dir is None:
+        os.makedirs(TECHNICAL_TXTS_PATH, exist_ok=True)
+        scratch_dir = tempfile.mkdtemp(prefix="sweep_", dir=TECHNICAL_TXTS_PATH)
+    else:
+        os.makedirs(scratch_dir, exist_ok=True)
+
+    if heuristic_cache is not None:
+        os.makedirs(heuristic_cache, exist_ok=True)
+
+    journal = ResultsJournal(journal_path) if journal_path is not None else None
+    completed = journal.completed_keys() if journal is not None else set()
+    requested_keys = []
+    results = []
+
+    try:
+        with ProcessPoolExecutor(max_workers=generator_jobs) as generator, \
+                ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            map_futures = {generator.submit(_generate_map, map_store_path, map_job): (i, map_job)
+                           for i, map_job in enumerate(map_jobs)}
+            pending = set(map_futures)
+            progress = tqdm(total=2 * len(map_jobs), desc="Running tests") if display_progress else None
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future not in map_futures:
+                        test_results = future.result()
+                        if journal is not None:
+                            journal.append(test_results)
+                        else:
+                            results.append(test_results)
+                        if progress is not None:
+                            progress.update(1)
+                        continue
+
+                    i, map_job = map_futures.pop(future)
+                    map_files = future.result()
+                    for algorithm in ("emoa", "boa"):
+                        result_file = f"{scratch_dir}/{map_job['test_number']}_{algorithm}_{i}.{result_format}"
+                        test = [map_job["test_number"], algorithm, f"simple map {map_job['num_dims']} dims",
+                                map_job["time_limit"], map_job["start"], map_job["goal"],
+                                result_file.replace("\\", "/"), map_files]
+                        key = test_key(test[:6] + [map_files])
+                        requested_keys.append(key)
+                        if key in completed:
+                            if progress is not None:
+                                progress.update(1)
+                            continue
+                        pending.add(executor.submit(test_system, [test], backend=backend,
+                                                    heuristic_cache=heuristic_cache,
+                                                    heuristic_threads=heuristic_threads,
+                                                    memory_limit_mb=memory_limit_mb,
+                                                    wall_time_grace=wall_time_grace,
+                                                    max_labels=max_labels,
+                                                    max_memory_mb=max_memory_mb))
+
+            if progress is not None:
+                progress.close()
+    finally:
+        if results_dir is None:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    if journal is not None:
+        test_results = journal.to_dataframe(requested_keys).reindex(columns=RESULT_COLUMNS)
+    else:
+        test_results = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=RESULT_COLUMNS)
+
+    if store_path is not None:
+        ResultsStore(store_path).append(test_results, {
+            "num_tests": 2 * len(map_jobs), "backend": backend, "n_jobs": n_jobs, "generator_jobs": generator_jobs,
+            "result_format": result_format, "heuristic_threads": heuristic_threads, "results_dir": results_dir,
+            "journal_path": journal_path, "memory_limit_mb": memory_limit_mb, "wall_time_grace": wall_time_grace,
+            "max_labels": max_labels,
+            "max_memory_mb": max_memory_mb, **(run_metadata or dict())
+        })
+
+    return test_results
+
+
+if __name__ == "__main__":
+    # Example of usage: the whole simple map sweep, saved per configuration as before
+    from python.results_store import with_partition_columns
+
+    test_results = pipelined_run(simple_map_sweep(num_tests=50, time_limit=600), n_jobs=4, display_progress=True,
+                                 journal_path=SWEEP_JOURNAL_PATH)
+
+    for (num_dims, walls_percent), config_results in with_partition_columns(test_results).groupby(
+            ["num_dims", "walls_percentage"]):
+        config_results[RESULT_COLUMNS].sort_values(["test_number", "algorithm"]).to_csv(
+            f"../data_out/simple_map_{num_dims}_results/simple_map_{num_dims}_{walls_percent}.csv", index=False)
@@ -4,9 +4,16 @@ Author: Denis Derkach
 """
 
 import random
+import numpy as np
+import pandas as pd
 from python.map_generator import grid_generator
+from python.map_store import MAP_STORE_PATH, MapStore
+from python.pair_difficulty import DISTANCE_CACHE_PATH, stratified_pairs
 from typing import List, Any
 
+# Map files of the NY map: distance, time and degree costs
+NY_MAP_FILES = ["../data/USA-road-d.NY.gr", "../data/USA-road-t.NY.gr", "../data/USA-road-deg.NY.gr"]
+
 
 def ny_tests_generator(num_tests: int = 50,
                        left_vertex_boundary: int = 1,
@@ -29,11 +36,9 @@ def ny_tests_generator(num_tests: int = 50,
         first_vertex = random.randint(left_vertex_boundary, right_vertex_boundary)
         second_vertex = random.randint(left_vertex_boundary, right_vertex_boundary)
 
-        emoa_test = [exp_number, "emoa", "NY", time_limit, first_vertex, second_vertex,
-                     ["../data/USA-road-d.NY.gr", "../data/USA-road-t.NY.gr", "../data/USA-road-deg.NY.gr"]]
+        emoa_test = [exp_number, "emoa", "NY", time_limit, first_vertex, second_vertex, list(NY_MAP_FILES)]
 
-        boa_test = [exp_number, "boa", "NY", time_limit, first_vertex, second_vertex,
-                    ["../data/USA-road-d.NY.gr", "../data/USA-road-t.NY.gr", "../data/USA-road-deg.NY.gr"]]
+        boa_test = [exp_number, "boa", "NY", time_limit, first_vertex, second_vertex, list(NY_MAP_FILES)]
 
         tests.append(emoa_test)
         tests.append(boa_test)
@@ -41,6 +46,51 @@ def ny_tests_generator(num_tests: int = 50,
     return tests
 
 
+def ny_stratified_tests_generator(num_tests: int = 50,
+                                  num_buckets: int = 5,
+                                  history=None,
+                                  budget_s: float = None,
+                                  time_limit: int = 600,
+                                  map_files: List[str] = None,
+                                  cache_dir: str = DISTANCE_CACHE_PATH,
+                                  pairs_file: str = None) -> List[List[Any]]:
+    """
+    Generates a list of test cases for the NY graph, stratified by difficulty (see pair_difficulty.stratified_pairs).
+
+    The (start, goal) pairs are sampled evenly from buckets of increasing hop count instead of uniformly, which
+    mostly gives pairs that are either trivial or time out. With results of prior NY runs as history and a compute
+    budget, every bucket gets the same share of the budget according to the predicted timeouts and runtimes.
+
+    :param num_tests: The number of test cases to generate without a budget.
+    :param num_buckets: The number of difficulty buckets.
+    :param history: Prior NY results (a DataFrame or a path to a CSV file), needed with a budget.
+    :param budget_s: Compute budget in seconds (wall time of both algorithms over all tests), or None.
+    :param time_limit: The time limit for each test case in seconds.
+    :param map_files: The NY map files, NY_MAP_FILES if None.
+    :param cache_dir: Directory of the cached distance tables.
+    :param pairs_file: If given, the sampled pairs with their features, bucket and predictions are saved to this CSV.
+    :return: A list of test cases, where each test case is a list containing information about the test.
+    """
+    map_files = list(map_files or NY_MAP_FILES)
+    if isinstance(history, str):
+        history = pd.read_csv(history)
+    if history is not None and "map_name" in history:
+        history = history[history["map_name"] == "NY"]
+
+    pairs = stratified_pairs(map_files, num_tests=num_tests, num_buckets=num_buckets, history=history,
+                             budget_s=budget_s, time_limit=time_limit, cache_dir=cache_dir)
+    if pairs_file is not None:
+        pairs.to_csv(pairs_file, index=False)
+
+    tests = []
+
+    for exp_number, (start, goal) in enumerate(zip(pairs["start"], pairs["goal"]), start=1):
+        tests.append([exp_number, "emoa", "NY", time_limit, int(start), int(goal), list(map_files)])
+        tests.append([exp_number, "boa", "NY", time_limit, int(start), int(goal), list(map_files)])
+
+    return tests
+
+
 def simple_map_tests_generator(num_tests: int = 50,
                                start: int = 1,
                                finish: int = 225,
@@ -50,11 +100,16 @@ def simple_map_tests_generator(num_tests: int = 50,
                                walls: bool = False,
                                walls_ratio: float = 0.0,
                                map_name_local: str = "example_map",
-                               time_limit: int = 600) -> List[List[Any]]:
+                               time_limit: int = 600,
+                               seed: int = None,
+                               store_path: str = MAP_STORE_PATH) -> List[List[Any]]:
     """
     Generates a list of test cases for simple maps.
 
-    Each test case consists of two entries (for EMOA and BOA algorithms) using generated maps.
+    Each test case consists of two entries (for EMOA and BOA algorithms) using generated maps. With a seed the maps
+    come from a MapStore, so a map with the same parameters and seed is generated only once and shared between sweeps.
+    Without a seed every call gets new random maps, which are not worth storing, so they are generated again as
+    map_name_local files, overwriting those of the previous call.
 
     :param num_tests: The number of test cases to generate.
     :param start: The starting vertex index for the tests.
@@ -66,23 +121,35 @@ def simple_map_tests_generator(num_tests: int = 50,
     :param walls_ratio: The ratio of walls to total vertices in the generated map.
     :param map_name_local: The base name for the generated maps.
     :param time_limit: The time limit for each test case in seconds.
+    :param seed: The map of test k is generated with seed + k - 1, if None the seeds are drawn from the global
+                 NumPy random state.
+    :param store_path: Path to the map store of seeded maps, if None the maps are generated again as map_name_local
+                       files.
     :return: A list of test cases, where each test case is a list containing information about the test.
     """
 
     tests = []
     walls_percent = int(walls_ratio * 100)
+    store = MapStore(store_path) if store_path is not None and seed is not None else None
 
     for exp_number in range(1, num_tests + 1):
-        map_name = f"../data/generated_maps/{num_dims}_dims/{walls_percent}_walls_ratio/{map_name_local}_{num_dims}_{width}_{height}_{walls_percent}_{exp_number}"
-
-        _ = grid_generator(width=width,
-                           height=height,
-                           num_dims=num_dims,
-                           walls=walls,
-                           walls_ratio=walls_ratio,
-                           map_name=map_name)
-
-        map_names_list = [f"{map_name}_{dim}.gr" for dim in range(1, num_dims + 1)]
+        map_seed = seed + exp_number - 1 if seed is not None else np.random.randint(2 ** 31 - 1)
+
+        if store is not None:
+            map_names_list = store.get(width=width, height=height, num_dims=num_dims, walls=walls,
+                                       walls_ratio=walls_ratio, seed=map_seed)
+        else:
+            map_name = f"../data/generated_maps/{num_dims}_dims/{walls_percent}_walls_ratio/{map_name_local}_{num_dims}_{width}_{height}_{walls_percent}_{exp_number}"
+
+            _ = grid_generator(width=width,
+                               height=height,
+                               num_dims=num_dims,
+                               walls=walls,
+                               walls_ratio=walls_ratio,
+                               map_name=map_name,
+                               seed=map_seed)
+
+            map_names_list = [f"{map_name}_{dim}.gr" for dim in range(1, num_dims + 1)]
 
         emoa_test = [exp_number, "emoa", f"simple map {num_dims} dims", time_limit, start, finish,
                      map_names_list]
@@ -1,25 +1,72 @@
 """
-About: Python generator of the third cost file for the NY city map.
+About: Python generator of derived cost files (such as the third one) for the NY city map.
 Author: Denis Derkach
 Date: Monday, January 27, 2025
 """
 
 import numpy as np
 import re
-from typing import List, Tuple, Any
+from typing import Callable, Dict, List, Tuple, Any
 
+from python.map_generator import read_gr_file
 
-def find_first_a_line(lines: List[str]) -> int:
+# Number of arcs written at once to a derived cost file
+WRITE_CHUNK_ARCS = 1 << 18
+
+# Formulas of derived cost layers by name, see register_layer_formula
+LAYER_FORMULAS = dict()
+
+
+def register_layer_formula(name: str) -> Callable:
     """
-    Finds the index of the first line in the list that starts with "a".
+    Registers a per-arc formula of a derived cost layer under the given name.
 
-    :param lines: A list of strings representing lines from a file.
-    :return: The index of the first line starting with "a", or -1 if not found.
+    A formula is called as formula(sources, targets, costs, degrees), where costs is an array of shape
+    (number of arcs, number of input layers) with the weights of the input .gr files and degrees[v] is the
+    number of arcs leaving vertex v. It returns the new weight of every arc.
+
+    :param name: The name of the layer, used in the outputs of generate_layers.
+    :return: A decorator that registers the formula.
     """
-    for index, line in enumerate(lines):
-        if line.strip().startswith("a"):
-            return index
-    return -1
+    def decorator(formula: Callable) -> Callable:
+        LAYER_FORMULAS[name] = formula
+        return formula
+
+    return decorator
+
+
+@register_layer_formula("degree")
+def degree_layer(sources: np.ndarray, targets: np.ndarray, costs: np.ndarray, degrees: np.ndarray) -> np.ndarray:
+    """
+    The average of the degrees of the endpoints of an arc, penalizing busy intersections.
+    """
+    return (degrees[sources] + degrees[targets]) / 2
+
+
+@register_layer_formula("cost_ratio")
+def cost_ratio_layer(sources: np.ndarray, targets: np.ndarray, costs: np.ndarray, degrees: np.ndarray) -> np.ndarray:
+    """
+    The ratio of the second to the first input weight, e.g. travel time per unit of distance for NY.
+    """
+    return costs[:, 1] / np.maximum(costs[:, 0], 1)
+
+
+def read_gr_header(file_path: str) -> List[str]:
+    """
+    Reads the lines of a graph file before its first arc.
+
+    :param file_path: The path to the graph file.
+    :return: A list of header lines (with their line breaks).
+    """
+    header = []
+
+    with open(file_path, "r") as file:
+        for line in file:
+            if line.startswith("a"):
+                break
+            header.append(line)
+
+    return header
 
 
 def extract_edges_vertices(file_path: str) -> Tuple[Any, Any]:
@@ -39,49 +86,56 @@ def extract_edges_vertices(file_path: str) -> Tuple[Any, Any]:
     return None, None
 
 
-def generate_3(orig_file_path: str, new_file_path: str) -> None:
+def generate_layers(orig_file_paths: List[str], outputs: Dict[str, str]) -> None:
     """
-    Generates a new graph file with updated edge weights based on vertex degrees.
+    Generates new cost layers of a graph from the layers it already has.
 
-    The new weight for each edge is calculated as the average of the degrees of its endpoints.
+    Every input file is read once, in blocks. The new files keep the header and the arc order of the first input.
 
-    :param orig_file_path: The path to the original graph file.
-    :param new_file_path: The path where the new graph file will be saved.
+    :param orig_file_paths: The paths to the existing cost files of the graph, all with the same arcs.
+    :param outputs: The new layers, as a dictionary from a formula name (see LAYER_FORMULAS) to the new file path.
     :return: None
     """
+    sources, targets, weights = read_gr_file(orig_file_paths[0])
+    costs = [weights]
+
+    for file_path in orig_file_paths[1:]:
+        layer_sources, layer_targets, layer_weights = read_gr_file(file_path)
+
+        if not (np.array_equal(layer_sources, sources) and np.array_equal(layer_targets, targets)):
+            raise ValueError(f"{file_path} does not have the same arcs as {orig_file_paths[0]}")
+
+        costs.append(layer_weights)
 
-    with open(orig_file_path, mode="r") as fres:
-        lines = fres.readlines()
+    costs = np.stack(costs, axis=1)
+    header = read_gr_header(orig_file_paths[0])
+    num_ver, _ = extract_edges_vertices(orig_file_paths[0])
+    degrees = np.bincount(sources, minlength=max(num_ver or 0, int(targets.max(initial=0))) + 1)
 
-    index = find_first_a_line(lines)
-    num_ver, num_edges = extract_edges_vertices(orig_file_path)
+    for name, new_file_path in outputs.items():
+        new_weights = LAYER_FORMULAS[name](sources, targets, costs, degrees).astype(np.float64)
 
-    temp_lines = np.zeros(num_edges)
-    deg_arr = np.zeros(num_ver + 1)
+        with open(new_file_path, mode="w") as new_file:
+            new_file.writelines(header)
 
-    # Fill temporary lines with edge data
-    for i in range(index, len(lines)):
-        temp_lines[i - 7] = int(lines[i].split(" ")[1])
+            for first in range(0, len(sources), WRITE_CHUNK_ARCS):
+                last = first + WRITE_CHUNK_ARCS
+                new_file.writelines(f"a {x} {y} {z}\n" for x, y, z in zip(sources[first:last].tolist(),
+                                                                          targets[first:last].tolist(),
+                                                                          new_weights[first:last].tolist()))
 
-    # Calculate degrees of each vertex
-    for i in range(1, num_ver):
-        deg = int(np.sum(temp_lines == i))
-        deg_arr[i] = deg
 
-    # Write new graph file with updated weights
-    with open(new_file_path, mode="w") as new_file:
-        for i in range(7):
-            new_file.write(lines[i])
+def generate_3(orig_file_path: str, new_file_path: str) -> None:
+    """
+    Generates a new graph file with updated edge weights based on vertex degrees.
+
+    The new weight for each edge is calculated as the average of the degrees of its endpoints.
 
-        for line in lines[7:]:
-            match = re.match(r"a (\d+) (\d+) (\d+)", line)
-            if match:
-                x, y, z = map(int, match.groups())
-                new_z = (deg_arr[x] + deg_arr[y]) / 2
-                new_line = f"a {x} {y} {new_z}\n"
-                new_file.write(new_line)
-            else:
-                new_file.write(line + "\n")
+    :param orig_file_path: The path to the original graph file.
+    :param new_file_path: The path where the new graph file will be saved.
+    :return: None
+    """
+    generate_layers([orig_file_path], {"degree": new_file_path})
 
 
 if __name__ == "__main__":
@@ -90,3 +144,7 @@ if __name__ == "__main__":
     new_file_path_example = "../data/USA-road-deg.NY.gr"
 
     generate_3(orig_file_path=orig_file_path_example, new_file_path=new_file_path_example)
+
+    # More objectives from the distance and time layers at once, e.g.
+    # generate_layers(["../data/USA-road-d.NY.gr", "../data/USA-road-t.NY.gr"],
+    #                 {"degree": "../data/USA-road-deg.NY.gr", "cost_ratio": "../data/USA-road-ratio.NY.gr"})
@@ -0,0 +1,252 @@
+"""
+About: Benchmark mode of the test system: every worker is pinned to its own cores and every test is repeated,
+       so that the reported times are medians with confidence intervals instead of single noisy measurements.
+Author: Denis Derkach
+"""
+
+import os
+import math
+import shutil
+import tempfile
+import warnings
+import multiprocessing
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple
+
+from python.py_parallel_api import RESULT_COLUMNS, TECHNICAL_TXTS_PATH, WALL_TIME_GRACE_S, test_system
+from python.results_journal import JOURNAL_KEY_COLUMNS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Columns summarized over the repetitions of a test
+TIMING_COLUMNS = ["heuristic_time", "search_time", "wall_time", "user_time"]
+
+# Confidence level of the intervals of the medians
+CONFIDENCE = 0.95
+
+# A test whose search_time varies more than this (coefficient of variation) over its repetitions is flagged
+HIGH_VARIANCE_CV = 0.05
+
+
+def available_cores() -> List[int]:
+    """
+    :return: The ids of the logical CPUs this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    if psutil is not None:
+        return sorted(psutil.Process().cpu_affinity())
+
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores() -> List[int]:
+    """
+    Returns one logical CPU per physical core, so that pinned workers do not share a core through hyper-threading.
+    Without the Linux CPU topology all available CPUs are returned.
+
+    :return: The ids of the logical CPUs.
+    """
+    cores = []
+    seen = set()
+
+    for cpu in available_cores():
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list", mode="r") as file:
+                siblings = file.read().strip()
+        except OSError:
+            return available_cores()
+        if siblings not in seen:
+            seen.add(siblings)
+            cores.append(cpu)
+
+    return cores
+
+
+def _pin_worker(cores_queue) -> None:
+    """
+    Initializer of the benchmark workers, pins the worker (and the executables it starts) to the next free cores.
+    """
+    cores = cores_queue.get()
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    elif psutil is not None:
+        psutil.Process().cpu_affinity(list(cores))
+
+
+def median_interval_order(n: int, confidence: float = CONFIDENCE) -> Tuple[int, float]:
+    """
+    Returns the largest j for which the order statistics x(j) and x(n + 1 - j) of n values cover the median with
+    probability at least confidence, and that probability. With too few values for that confidence, j is 1 (the
+    range of the values) and the coverage is below confidence: at least 6 values are needed for 0.95.
+
+    :param n: The number of values, at least 1.
+    :param confidence: The confidence level.
+    :return: A tuple (j, coverage).
+    """
+    # the interval [x(j), x(n + 1 - j)] misses the median with probability 2 * P(B < j), B ~ binomial(n, 1/2)
+    cdf = np.cumsum([math.comb(n, k) for k in range(n + 1)]) / 2 ** n
+    j = 1
+    while j + 1 <= n - j and 2 * cdf[j] <= 1 - confidence:
+        j += 1
+
+    return j, float(1 - 2 * cdf[j - 1])
+
+
+def median_confidence_interval(values: np.ndarray, confidence: float = CONFIDENCE) -> Tuple[float, float]:
+    """
+    Returns a distribution-free confidence interval of the median, see median_interval_order.
+
+    :param values: The measurements.
+    :param confidence: The confidence level.
+    :return: A tuple (low, high), NaN for no values.
+    """
+    values = np.sort(values[~np.isnan(values)])
+    n = len(values)
+    if n == 0:
+        return float("nan"), float("nan")
+
+    j, _ = median_interval_order(n, confidence)
+    return float(values[j - 1]), float(values[n - j])
+
+
+def summarize_repetitions(raw_results: pd.DataFrame, confidence: float = CONFIDENCE,
+                          max_cv: float = HIGH_VARIANCE_CV) -> pd.DataFrame:
+    """
+    Summarizes the repetitions of every test.
+
+    :param raw_results: The results of all measured repetitions, with a "repetition" column.
+    :param confidence: The confidence level of the intervals.
+    :param max_cv: Coefficient of variation of search_time above which a test is flagged as high variance.
+    :return: A DataFrame with one row per test: the RESULT_COLUMNS of its first repetition with the TIMING_COLUMNS
+             replaced by their medians, and for each of them <column>_ci_low, <column>_ci_high and <column>_cv,
+             plus "repetitions", "ci_coverage" (the lowest probability of the intervals of the test to cover the
+             median, below confidence with too few repetitions, see median_interval_order), "status_varies" (not all
+             repetitions ended the same, see the "status" column) and "high_variance".
+    """
+    groups = raw_results.groupby(JOURNAL_KEY_COLUMNS, sort=False)
+
+    summary = groups[RESULT_COLUMNS].first().reset_index(drop=True)
+    summary["repetitions"] = groups.size().values
+    summary["ci_coverage"] = float("nan")
+
+    for column in TIMING_COLUMNS:
+        values = groups[column]
+        summary[column] = values.median().values
+        intervals = values.apply(lambda x: median_confidence_interval(x.to_numpy(dtype=float), confidence))
+        summary[f"{column}_ci_low"] = [low for low, _ in intervals]
+        summary[f"{column}_ci_high"] = [high for _, high in intervals]
+        summary[f"{column}_cv"] = (values.std() / values.mean()).values
+        coverage = [median_interval_order(n, confidence)[1] if n > 0 else float("nan") for n in values.count()]
+        summary["ci_coverage"] = np.fmin(summary["ci_coverage"].values, coverage)
+
+    summary["status_varies"] = (groups["status"].nunique(dropna=False) > 1).values
+    summary["high_variance"] = (summary["search_time_cv"] > max_cv).values | summary["status_varies"]
+
+    return summary
+
+
+def benchmark_run(tests: list, repetitions: int = 6, warmup: int = 1, n_jobs: int = None,
+                  physical_only: bool = True, pin: bool = True, display_progress: bool = False,
+                  backend: str = "cli", heuristic_cache: str = None, heuristic_threads: int = 1,
+                  memory_limit_mb: float = None, wall_time_grace: float = WALL_TIME_GRACE_S,
+                  confidence: float = CONFIDENCE,
+                  max_cv: float = HIGH_VARIANCE_CV) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Runs every test warmup + repetitions times on pinned workers and summarizes the measured repetitions.
+
+    Each worker gets heuristic_threads dedicated cores, with physical_only one logical CPU per physical core,
+    and the tests are run round by round (all tests once, then all tests again...), so slow drifts of the machine
+    spread over all tests instead of biasing some of them. The warmup rounds (page cache, heuristic cache) are
+    not measured.
+
+    :param tests: A list of test parameters, see parallel_run.
+    :param repetitions: Number of measured runs of every test, a warning is given if they are too few for
+                        the intervals to reach confidence (at least 6 for 0.95).
+    :param warmup: Number of unmeasured runs of every test before them.
+    :param n_jobs: Number of worker processes, at most (and by default) the number of cores divided by
+                   heuristic_threads.
+    :param physical_only: If True, workers are pinned to one logical CPU per physical core.
+    :param pin: If False, workers are not pinned (e.g. where pinning is not supported).
+    :param display_progress: If True, displays a progress bar of finished runs.
+    :param backend: "cli", "server" or "native", see test_system.
+    :param heuristic_cache: Directory of the heuristic cache, see test_system.
+    :param heuristic_threads: Number of threads computing the heuristic of a test, see test_system.
+    :param memory_limit_mb: Address space cap of every run, see test_system.
+    :param wall_time_grace: Wall time a run may take beyond its time limit, see test_system.
+    :param confidence: The confidence level of the intervals, see summarize_repetitions.
+    :param max_cv: Coefficient of variation above which a test is flagged, see summarize_repetitions.
+    :return: A tuple (summary, raw_results): the summary of every test (see summarize_repetitions) and the results
+             of all measured runs with their "repetition" number.
+    """
+    coverage = median_interval_order(repetitions, confidence)[1] if repetitions > 0 else 0.0
+    if coverage < confidence:
+        warnings.warn(f"{repetitions} repetitions give intervals of the medians with a coverage of {coverage:.4f} "
+                      f"instead of {confidence}, see the ci_coverage column")
+
+    cores = physical_cores() if physical_only else available_cores()
+    max_jobs = max(1, len(cores) // heuristic_threads)
+    n_jobs = n_jobs if n_jobs is not None else max_jobs
+    if pin and n_jobs > max_jobs:
+        raise ValueError(f"{n_jobs} workers with {heuristic_threads} cores each need more than the {len(cores)} cores")
+
+    manager = multiprocessing.Manager()
+    cores_queue = manager.Queue()
+    for job in range(n_jobs):
+        cores_queue.put(set(cores[job * heuristic_threads:(job + 1) * heuristic_threads]))
+
+    os.makedirs(TECHNICAL_TXTS_PATH, exist_ok=True)
+    scratch_dir = tempfile.mkdtemp(prefix="benchmark_", dir=TECHNICAL_TXTS_PATH)
+    rounds = []
+
+    for repetition in range(-warmup, repetitions):
+        rounds.append([(repetition, test[:6] + [f"{scratch_dir}/{test[0]}_{test[1]}_{i}_{repetition}.txt", test[6]])
+                       for i, test in enumerate(tests)])
+
+    raw = []
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_pin_worker if pin else None,
+                                 initargs=(cores_queue,) if pin else ()) as executor:
+            progress = tqdm(total=sum(len(r) for r in rounds), desc="Benchmark") if display_progress else None
+
+            for round_tests in rounds:
+                futures = {executor.submit(test_system, [test], backend=backend, heuristic_cache=heuristic_cache,
+                                           heuristic_threads=heuristic_threads, memory_limit_mb=memory_limit_mb,
+                                           wall_time_grace=wall_time_grace): repetition
+                           for repetition, test in round_tests}
+
+                for future in as_completed(futures):
+                    if futures[future] >= 0:
+                        raw.append(future.result().assign(repetition=futures[future]))
+                    if progress is not None:
+                        progress.update(1)
+
+            if progress is not None:
+                progress.close()
+    finally:
+        manager.shutdown()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    raw_results = pd.concat(raw, ignore_index=True) if raw else pd.DataFrame(columns=RESULT_COLUMNS + ["repetition"])
+    raw_results["result_file"] = None
+
+    return summarize_repetitions(raw_results, confidence, max_cv), raw_results
+
+
+if __name__ == "__main__":
+    # Example of usage: 6 measured runs of every test on one worker per physical core
+    from python.tests_generator import simple_map_tests_generator
+
+    tests = simple_map_tests_generator(num_tests=5, start=1, finish=225, width=15, height=15, num_dims=4,
+                                       map_name_local="simple_map", time_limit=600)
+
+    summary, raw_results = benchmark_run(tests, repetitions=6, warmup=1, display_progress=True)
+    summary.to_csv("../data_out/simple_map_4_results/simple_map_4_benchmark.csv", index=False)
+    print(summary[summary["high_variance"]])
@@ -0,0 +1,542 @@
+/*******************************************
+ * About: Frontiers of EMOA* and ext-BOA*-lex, see frontier.hpp.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "frontier.hpp"
+#include "vec_type.hpp"
+
+#include <algorithm>
+#include <iostream>
+#include <stdexcept>
+
+namespace rzq{
+namespace search{
+
+using namespace rzq::basic;
+
+typedef std::vector<double> CostVec;
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+TreeFrontier::TreeFrontier() {
+  return;
+};
+
+TreeFrontier::~TreeFrontier() {
+  return;
+};
+
+bool TreeFrontier::Check(const CostVec& g) {
+  auto pg = _p(g);
+  return _check(_root, pg);
+};
+
+void TreeFrontier::Update(const CostVec& g, long id) {
+  auto pg = _p(g);
+  if (this->Size() == 0){
+    Add( pg );
+    label_ids.push_back(id);
+    return;
+  }
+  // non-empty tree.
+
+  label_ids.push_back(id);
+  Filter(pg);
+  Add(pg); // add at first
+
+  return;
+};
+
+size_t TreeFrontier::Size() const {
+  return basic::AVLTree<CostVec>::Size();
+};
+
+size_t TreeFrontier::Bytes() const {
+  // the keys of the filtered labels are kept until the tree is cleared.
+  size_t d = _key.empty() ? 0 : _key.back().capacity();
+  return sizeof(*this) + label_ids.capacity() * sizeof(long) + _key.capacity() * sizeof(CostVec)
+    + _key.size() * d * sizeof(double) + Size() * sizeof(basic::AVLNode);
+};
+
+CostVec TreeFrontier::_p(const CostVec& v) {
+  CostVec out;
+  for (size_t i = 1; i < v.size(); i++){
+    out.push_back(v[i]);
+  }
+  return out;
+};
+
+void TreeFrontier::Filter(const CostVec& v) {
+  std::unordered_set<long> filtered_node;
+  _root = _filter(_root, v, &filtered_node);
+  if (filtered_node.size()>0) {
+    _rebuildTree(&filtered_node);
+  }
+  return;
+};
+
+basic::AVLNode* TreeFrontier::_filter(
+  basic::AVLNode* n, const CostVec& k, std::unordered_set<long> *filtered_node)
+{
+  if (n == NULL) {return n;}
+  if ( _key[n->id] < k ) { // only need to look at the right sub-tree.
+    n->right = _filter(n->right, k, filtered_node);
+  }else{
+    n->left = _filter(n->left, k, filtered_node);
+    n->right = _filter(n->right, k, filtered_node);
+  }
+  // no return above, will reach here if n != NULL.
+  n_check++;
+  if (EpsDom(k, _key[n->id])) {
+    if (filtered_node) {
+      filtered_node->insert(n->id);
+    }
+  }
+  return n;
+};
+
+void TreeFrontier::_rebuildTree(std::unordered_set<long> *skip_node) {
+  std::vector<long> tree_node_ids;
+  ToSortedVector(NULL, &tree_node_ids, skip_node);
+
+  _size = 0;
+  basic::AVLNode* new_root = _rebuildTreeMethod(tree_node_ids, 0, tree_node_ids.size()-1);
+  _deleteAll(_root);
+  _root = new_root;
+
+  return ;
+};
+
+basic::AVLNode* TreeFrontier::_rebuildTreeMethod(std::vector<long> &tree_node_ids, long start, long end) {
+  if (start > end) {
+    return NULL;
+  }
+  long mid = (start+end)/2;
+  basic::AVLNode* n = basic::NewAVLNode(tree_node_ids[mid]) ;
+  _size++;
+  n->left  = _rebuildTreeMethod(tree_node_ids, start, mid-1);
+  n->right = _rebuildTreeMethod(tree_node_ids, mid+1, end);
+  n->h = 1 + basic::Max(basic::H(n->left), basic::H(n->right));
+  if (DEBUG_AVLTREE) {_verifyTree(n);}
+  return n;
+};
+
+void TreeFrontier::_verifyNonDom(std::vector<long>& tree_node_ids){
+  for (size_t i = 0; i < tree_node_ids.size(); i++) {
+    for (size_t j = i+1; j < tree_node_ids.size(); j++) {
+      if (EpsDom(_key[tree_node_ids[i]], _key[tree_node_ids[j]]) ||
+          EpsDom(_key[tree_node_ids[j]], _key[tree_node_ids[i]]) )
+      {
+        std::cout << " vec1 = " << _key[tree_node_ids[i]] << " vec2 = " << _key[tree_node_ids[j]] << std::endl;
+        throw std::runtime_error("[ERROR] TreeFrontier::_verifyNonDom fails.");
+      }
+    }
+  }
+  return;
+};
+
+bool TreeFrontier::_check(basic::AVLNode* n, const CostVec& k) {
+  if (n == NULL) {return false;}
+
+  n_check++;
+  if (EpsDom(_key[n->id], k)) {
+    return true;
+  }
+
+  if (_key[n->id] > k) {
+    return _check(n->left, k);
+  }else{
+    if (_check(n->left, k)) {return true;}
+    return _check(n->right, k);
+  }
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+static CostVec Project(const CostVec& v) {
+  return CostVec(v.begin() + 1, v.end());
+};
+
+bool LexListFrontier::Check(const CostVec& g) {
+  for (const auto& k : _costs) {
+    n_check++;
+    if (EpsDom(k, g)) {
+      return true;
+    }
+  }
+  return false;
+};
+
+void LexListFrontier::Update(const CostVec& g, long id) {
+  label_ids.push_back(id);
+  auto pg = Project(g);
+  size_t n = 0;
+  for (size_t i = 0; i < _costs.size(); i++) {
+    n_check++;
+    if (!EpsDom(pg, Project(_costs[i]))) {
+      _costs[n++].swap(_costs[i]);
+    }
+  }
+  _costs.resize(n);
+  for (size_t i = 0; i < _costs.size(); i++) {
+    if (LexCompare(Project(_costs[i]), pg) < 0) {
+      _costs.insert(_costs.begin() + i, g);
+      return;
+    }
+  }
+  _costs.push_back(g);
+};
+
+size_t LexListFrontier::Size() const {
+  return _costs.size();
+};
+
+size_t LexListFrontier::Bytes() const {
+  size_t d = _costs.empty() ? 0 : _costs.back().capacity();
+  return sizeof(*this) + label_ids.capacity() * sizeof(long) + _costs.capacity() * sizeof(CostVec)
+    + _costs.size() * d * sizeof(double);
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+size_t FlatFrontier::_bound(double x, bool equal) const {
+  size_t lo = 0, hi = Size();
+  while (lo < hi) {
+    size_t mid = (lo + hi) / 2;
+    double k = _keys[mid * _d];
+    if (k < x || (!equal && k == x)) {
+      lo = mid + 1;
+    } else {
+      hi = mid;
+    }
+  }
+  return lo;
+};
+
+bool FlatFrontier::Check(const CostVec& g) {
+  if (_keys.empty()) {
+    return false;
+  }
+  const double* v = &g[1];
+  size_t end = _bound(v[0], false); // the labels after end have a larger first component.
+  const double* k = _keys.data();
+  n_check += end;
+  for (size_t j = 0; j < end; j++, k += _d) {
+    bool dom = true;
+    for (size_t i = 1; i < _d; i++) {
+      dom &= k[i] <= v[i];
+    }
+    if (dom) {
+      return true;
+    }
+  }
+  return false;
+};
+
+void FlatFrontier::Update(const CostVec& g, long id) {
+  label_ids.push_back(id);
+  _d = g.size() - 1;
+  const double* v = &g[1];
+
+  // remove the labels v dominates, they come at or after the first one with the same first component.
+  size_t begin = _bound(v[0], true);
+  size_t n = begin;
+  size_t size = Size();
+  n_check += size - begin;
+  for (size_t j = begin; j < size; j++) {
+    const double* k = &_keys[j * _d];
+    bool dom = true;
+    for (size_t i = 0; i < _d; i++) {
+      dom &= v[i] <= k[i];
+    }
+    if (!dom) {
+      if (n != j) {
+        std::copy(k, k + _d, &_keys[n * _d]);
+      }
+      n++;
+    }
+  }
+  _keys.resize(n * _d);
+
+  // insert v after the labels with the same first component.
+  size_t pos = _bound(v[0], false);
+  _keys.insert(_keys.begin() + pos * _d, v, v + _d);
+};
+
+size_t FlatFrontier::Size() const {
+  return _d == 0 ? 0 : _keys.size() / _d;
+};
+
+size_t FlatFrontier::Bytes() const {
+  return sizeof(*this) + label_ids.capacity() * sizeof(long) + _keys.capacity() * sizeof(double);
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+NDTreeFrontier::NDTreeFrontier(size_t leaf_size) : _leaf_size(leaf_size < 2 ? 2 : leaf_size) {};
+
+NDTreeFrontier::~NDTreeFrontier() {
+  _delete(_root);
+};
+
+bool NDTreeFrontier::Check(const CostVec& g) {
+  if (_root == NULL) {
+    return false;
+  }
+  return _check(_root, &g[1]);
+};
+
+void NDTreeFrontier::Update(const CostVec& g, long id) {
+  label_ids.push_back(id);
+  if (_root == NULL) {
+    _d = g.size() - 1;
+    _root = new Node;
+    _num_nodes++;
+  }
+  const double* v = &g[1];
+  _filter(_root, v);
+  _insert(_root, v);
+};
+
+size_t NDTreeFrontier::Size() const {
+  return _root == NULL ? 0 : _root->size;
+};
+
+size_t NDTreeFrontier::Bytes() const {
+  // every node has an ideal and a nadir point, the leaves hold the costs.
+  return sizeof(*this) + label_ids.capacity() * sizeof(long)
+    + _num_nodes * (sizeof(Node) + 2 * _d * sizeof(double)) + Size() * _d * sizeof(double);
+};
+
+bool NDTreeFrontier::_check(Node* n, const double* v) {
+  if (n->size == 0) {
+    return false;
+  }
+  n_check++;
+  bool ideal_dom = true, nadir_dom = true;
+  for (size_t i = 0; i < _d; i++) {
+    ideal_dom &= n->ideal[i] <= v[i];
+    nadir_dom &= n->nadir[i] <= v[i];
+  }
+  if (!ideal_dom) {
+    return false; // no cost below n dominates v.
+  }
+  if (nadir_dom) {
+    return true; // all costs below n dominate v.
+  }
+  if (n->child[0] != NULL) {
+    return _check(n->child[0], v) || _check(n->child[1], v);
+  }
+  size_t size = n->keys.size() / _d;
+  n_check += size;
+  for (size_t j = 0; j < size; j++) {
+    const double* k = &n->keys[j * _d];
+    bool dom = true;
+    for (size_t i = 0; i < _d; i++) {
+      dom &= k[i] <= v[i];
+    }
+    if (dom) {
+      return true;
+    }
+  }
+  return false;
+};
+
+void NDTreeFrontier::_filter(Node* n, const double* v) {
+  if (n->size == 0) {
+    return;
+  }
+  n_check++;
+  bool ideal_dom = true, nadir_dom = true;
+  for (size_t i = 0; i < _d; i++) {
+    ideal_dom &= v[i] <= n->ideal[i];
+    nadir_dom &= v[i] <= n->nadir[i];
+  }
+  if (!nadir_dom) {
+    return; // v dominates no cost below n.
+  }
+  if (ideal_dom) {
+    // v dominates all costs below n.
+    _delete(n->child[0]);
+    _delete(n->child[1]);
+    n->child[0] = NULL;
+    n->child[1] = NULL;
+    n->keys.clear();
+    n->size = 0;
+    return;
+  }
+
+  size_t size = n->size;
+  if (n->child[0] != NULL) {
+    _filter(n->child[0], v);
+    _filter(n->child[1], v);
+    n->size = n->child[0]->size + n->child[1]->size;
+    for (int c = 0; c < 2; c++) {
+      if (n->child[c]->size == 0) {
+        // replace n by its other child.
+        Node* empty = n->child[c];
+        Node* other = n->child[1 - c];
+        n->keys.swap(other->keys);
+        n->child[0] = other->child[0];
+        n->child[1] = other->child[1];
+        other->child[0] = NULL;
+        other->child[1] = NULL;
+        delete empty;
+        delete other;
+        _num_nodes -= 2;
+        break;
+      }
+    }
+  } else {
+    size_t m = 0;
+    n_check += size;
+    for (size_t j = 0; j < size; j++) {
+      const double* k = &n->keys[j * _d];
+      bool dom = true;
+      for (size_t i = 0; i < _d; i++) {
+        dom &= v[i] <= k[i];
+      }
+      if (!dom) {
+        if (m != j) {
+          std::copy(k, k + _d, &n->keys[m * _d]);
+        }
+        m++;
+      }
+    }
+    n->keys.resize(m * _d);
+    n->size = m;
+  }
+  if (n->size != size && n->size > 0) {
+    _bounds(n);
+  }
+};
+
+void NDTreeFrontier::_insert(Node* n, const double* v) {
+  if (n->size == 0) {
+    n->ideal.assign(v, v + _d);
+    n->nadir.assign(v, v + _d);
+  } else {
+    for (size_t i = 0; i < _d; i++) {
+      n->ideal[i] = std::min(n->ideal[i], v[i]);
+      n->nadir[i] = std::max(n->nadir[i], v[i]);
+    }
+  }
+  n->size++;
+
+  if (n->child[0] == NULL) {
+    n->keys.insert(n->keys.end(), v, v + _d);
+    if (n->size > _leaf_size) {
+      _split(n);
+    }
+    return;
+  }
+
+  // descend into the child whose box center is the closest to v.
+  double dist[2] = {0, 0};
+  for (int c = 0; c < 2; c++) {
+    for (size_t i = 0; i < _d; i++) {
+      double x = v[i] - 0.5 * (n->child[c]->ideal[i] + n->child[c]->nadir[i]);
+      dist[c] += x * x;
+    }
+  }
+  _insert(n->child[dist[0] <= dist[1] ? 0 : 1], v);
+};
+
+void NDTreeFrontier::_split(Node* n) {
+  size_t axis = 0;
+  for (size_t i = 1; i < _d; i++) {
+    if (n->nadir[i] - n->ideal[i] > n->nadir[axis] - n->ideal[axis]) {
+      axis = i;
+    }
+  }
+  std::vector<size_t> order(n->size);
+  for (size_t j = 0; j < order.size(); j++) {
+    order[j] = j;
+  }
+  const std::vector<double>& keys = n->keys;
+  size_t d = _d;
+  std::sort(order.begin(), order.end(), [&keys, d, axis](size_t a, size_t b) {
+    return keys[a * d + axis] < keys[b * d + axis];
+  });
+
+  for (int c = 0; c < 2; c++) {
+    Node* child = new Node;
+    _num_nodes++;
+    size_t begin = c == 0 ? 0 : order.size() / 2;
+    size_t end = c == 0 ? order.size() / 2 : order.size();
+    for (size_t j = begin; j < end; j++) {
+      child->keys.insert(child->keys.end(), &keys[order[j] * d], &keys[order[j] * d] + d);
+    }
+    child->size = end - begin;
+    _bounds(child);
+    n->child[c] = child;
+  }
+  std::vector<double>().swap(n->keys);
+};
+
+void NDTreeFrontier::_bounds(Node* n) {
+  if (n->child[0] != NULL) {
+    n->ideal = n->child[0]->ideal;
+    n->nadir = n->child[0]->nadir;
+    for (size_t i = 0; i < _d; i++) {
+      n->ideal[i] = std::min(n->ideal[i], n->child[1]->ideal[i]);
+      n->nadir[i] = std::max(n->nadir[i], n->child[1]->nadir[i]);
+    }
+    return;
+  }
+  n->ideal.assign(n->keys.begin(), n->keys.begin() + _d);
+  n->nadir = n->ideal;
+  for (size_t j = 1; j < n->size; j++) {
+    for (size_t i = 0; i < _d; i++) {
+      n->ideal[i] = std::min(n->ideal[i], n->keys[j * _d + i]);
+      n->nadir[i] = std::max(n->nadir[i], n->keys[j * _d + i]);
+    }
+  }
+};
+
+void NDTreeFrontier::_delete(Node* n) {
+  if (n == NULL) {
+    return;
+  }
+  _delete(n->child[0]);
+  _delete(n->child[1]);
+  delete n;
+  _num_nodes--;
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+bool IsFrontierKind(const std::string& kind) {
+  return kind == "avl" || kind == "lex" || kind == "flat" || kind == "ndtree";
+};
+
+ParetoFrontier* NewFrontier(const std::string& kind) {
+  if (kind == "avl") {
+    return new TreeFrontier;
+  }
+  if (kind == "lex") {
+    return new LexListFrontier;
+  }
+  if (kind == "flat") {
+    return new FlatFrontier;
+  }
+  if (kind == "ndtree") {
+    return new NDTreeFrontier;
+  }
+  std::cout << "[ERROR] NewFrontier, unknown frontier '" << kind << "'" << std::endl;
+  throw std::runtime_error("[ERROR] NewFrontier, unknown frontier");
+};
+
+} // end namespace search
+} // end namespace rzq
@@ -287,6 +287,40 @@ std::string SparseGraph::ToStr() const {
   return out;
 };
 
+namespace {
+
+ArcSpan _CopyArcs(const std::vector<long>& nghs, const std::vector< std::vector<double> >& ngh_costs,
+  size_t cdim, ArcBuffer* buf)
+{
+  buf->targets.assign(nghs.begin(), nghs.end());
+  buf->costs.clear();
+  for (auto& c : ngh_costs) {
+    buf->costs.insert(buf->costs.end(), c.begin(), c.end());
+  }
+  ArcSpan out;
+  out.targets = buf->targets.data();
+  out.costs = buf->costs.data();
+  out.size = nghs.size();
+  out.cdim = cdim;
+  return out;
+};
+
+} // end anonymous namespace
+
+ArcSpan SuccArcs(PlannerGraph* g, long v, ArcBuffer* buf) {
+  if (g->HasArcSpans()) {
+    return g->SuccSpan(v);
+  }
+  return _CopyArcs(g->GetSuccs(v), g->GetSuccCosts(v), g->CostDim(), buf);
+};
+
+ArcSpan PredArcs(PlannerGraph* g, long v, ArcBuffer* buf) {
+  if (g->HasArcSpans()) {
+    return g->PredSpan(v);
+  }
+  return _CopyArcs(g->GetPreds(v), g->GetPredCosts(v), g->CostDim(), buf);
+};
+
 std::ostream& operator<<(std::ostream& os, const SparseGraph& c) {
   os << c.ToStr();
   return os;
@@ -296,6 +330,185 @@ std::ostream& operator<<(std::ostream& os, const SparseGraph& c) {
 // ############################################################
 // ############################################################
 
+CSRGraph::CSRGraph() {};
+
+CSRGraph::~CSRGraph() {};
+
+bool CSRGraph::HasVertex(long v) {
+  return v >= 0 && size_t(v) < _n_vertex;
+};
+
+bool CSRGraph::HasArc(long v, long u) {
+  if (!HasVertex(v)) {return false;}
+  for (uint64_t idx = _fwd_offsets[v]; idx < _fwd_offsets[v+1]; idx++){
+    if (_fwd_targets[idx] == u) {return true;}
+  }
+  return false;
+};
+
+std::vector<long> CSRGraph::GetSuccs(long v) {
+  if (!HasVertex(v)) {return std::vector<long>(); }
+  return std::vector<long>(_fwd_targets + _fwd_offsets[v], _fwd_targets + _fwd_offsets[v+1]);
+};
+
+std::vector<long> CSRGraph::GetPreds(long v) {
+  if (!HasVertex(v)) {return std::vector<long>(); }
+  return std::vector<long>(_rev_targets + _rev_offsets[v], _rev_targets + _rev_offsets[v+1]);
+};
+
+std::vector<double> CSRGraph::GetCost(long u, long v) {
+  if (!HasVertex(u)) {return std::vector<double>(); }
+  for (uint64_t idx = _fwd_offsets[u]; idx < _fwd_offsets[u+1]; idx++){
+    if (_fwd_targets[idx] == v) {
+      return std::vector<double>(_fwd_costs + idx*_cdim, _fwd_costs + (idx+1)*_cdim);
+    }
+  }
+  return std::vector<double>();
+};
+
+std::vector<std::vector<double>> CSRGraph::GetSuccCosts(long u) {
+  std::vector<std::vector<double>> out;
+  if (!HasVertex(u)) {return out; }
+  for (uint64_t idx = _fwd_offsets[u]; idx < _fwd_offsets[u+1]; idx++){
+    out.push_back(std::vector<double>(_fwd_costs + idx*_cdim, _fwd_costs + (idx+1)*_cdim));
+  }
+  return out;
+};
+
+std::vector<std::vector<double>> CSRGraph::GetPredCosts(long u) {
+  std::vector<std::vector<double>> out;
+  if (!HasVertex(u)) {return out; }
+  for (uint64_t idx = _rev_offsets[u]; idx < _rev_offsets[u+1]; idx++){
+    out.push_back(std::vector<double>(_rev_costs + idx*_cdim, _rev_costs + (idx+1)*_cdim));
+  }
+  return out;
+};
+
+size_t CSRGraph::NumVertex() {
+  return _n_vertex;
+};
+
+size_t CSRGraph::NumArc() {
+  return _n_arc;
+};
+
+size_t CSRGraph::NumEdge() {
+  return _n_arc / 2;
+};
+
+size_t CSRGraph::CostDim() {
+  return _cdim;
+};
+
+std::vector<long> CSRGraph::AllVertex() {
+  std::vector<long> out;
+  for (size_t i = 0; i < _n_vertex; i++){
+    out.push_back(i);
+  }
+  return out;
+};
+
+bool CSRGraph::HasArcSpans() {
+  return true;
+};
+
+ArcSpan CSRGraph::SuccSpan(long v) {
+  ArcSpan out;
+  if (!HasVertex(v)) {return out; }
+  out.targets = _fwd_targets + _fwd_offsets[v];
+  out.costs = _fwd_costs + _fwd_offsets[v] * _cdim;
+  out.size = _fwd_offsets[v+1] - _fwd_offsets[v];
+  out.cdim = _cdim;
+  return out;
+};
+
+ArcSpan CSRGraph::PredSpan(long v) {
+  ArcSpan out;
+  if (!HasVertex(v)) {return out; }
+  out.targets = _rev_targets + _rev_offsets[v];
+  out.costs = _rev_costs + _rev_offsets[v] * _cdim;
+  out.size = _rev_offsets[v+1] - _rev_offsets[v];
+  out.cdim = _cdim;
+  return out;
+};
+
+bool CSRGraph::MapFile(const std::string& fname) {
+  if (!_file.Open(fname)) {
+    return false;
+  }
+  const size_t header_size = 8 + 3 * sizeof(uint64_t);
+  const char* data = _file.Data();
+  if (_file.Size() < header_size || std::string(data, 8) != CSR_GRAPH_MAGIC) {
+    std::cout << "[ERROR] CSRGraph::MapFile, '" << fname << "' is not a binary graph file" << std::endl;
+    _file.Close();
+    return false;
+  }
+  const uint64_t* header = reinterpret_cast<const uint64_t*>(data + 8);
+  _n_vertex = header[0];
+  _n_arc = header[1];
+  _cdim = header[2];
+
+  size_t expected_size = header_size + 2 * ( (_n_vertex + 1) * sizeof(uint64_t) 
+    + _n_arc * sizeof(int64_t) + _n_arc * _cdim * sizeof(double) );
+  if (_file.Size() != expected_size) {
+    std::cout << "[ERROR] CSRGraph::MapFile, '" << fname << "' has size " << _file.Size() 
+              << ", expected " << expected_size << std::endl;
+    _file.Close();
+    return false;
+  }
+
+  // all sections are 8-byte aligned, since the header is 32 bytes.
+  const char* ptr = data + header_size;
+  _fwd_offsets = reinterpret_cast<const uint64_t*>(ptr);
+  ptr += (_n_vertex + 1) * sizeof(uint64_t);
+  _fwd_targets = reinterpret_cast<const int64_t*>(ptr);
+  ptr += _n_arc * sizeof(int64_t);
+  _fwd_costs = reinterpret_cast<const double*>(ptr);
+  ptr += _n_arc * _cdim * sizeof(double);
+  _rev_offsets = reinterpret_cast<const uint64_t*>(ptr);
+  ptr += (_n_vertex + 1) * sizeof(uint64_t);
+  _rev_targets = reinterpret_cast<const int64_t*>(ptr);
+  ptr += _n_arc * sizeof(int64_t);
+  _rev_costs = reinterpret_cast<const double*>(ptr);
+  return true;
+};
+
+void CSRGraph::CreateFrom(PlannerGraph* g) {
+  _file.Close();
+  _n_vertex = g->NumVertex();
+  _cdim = g->CostDim();
+  _own_offsets.assign(2 * (_n_vertex + 1), 0);
+  _own_targets.clear();
+  _own_costs.clear();
+
+  for (int rev = 0; rev < 2; rev++) {
+    uint64_t* offsets = _own_offsets.data() + rev * (_n_vertex + 1);
+    size_t first = _own_targets.size();
+    for (size_t v = 0; v < _n_vertex; v++) {
+      auto nghs = rev ? g->GetPreds(v) : g->GetSuccs(v);
+      auto ngh_costs = rev ? g->GetPredCosts(v) : g->GetSuccCosts(v);
+      for (size_t j = 0; j < nghs.size(); j++) {
+        _own_targets.push_back(nghs[j]);
+        _own_costs.insert(_own_costs.end(), ngh_costs[j].begin(), ngh_costs[j].end());
+      }
+      offsets[v + 1] = _own_targets.size() - first;
+    }
+  }
+  // NumArc of a SparseGraph counts every arc twice (successor and predecessor lists), so count them here.
+  _n_arc = _own_offsets[_n_vertex];
+
+  _fwd_offsets = _own_offsets.data();
+  _fwd_targets = _own_targets.data();
+  _fwd_costs = _own_costs.data();
+  _rev_offsets = _own_offsets.data() + _n_vertex + 1;
+  _rev_targets = _own_targets.data() + _n_arc;
+  _rev_costs = _own_costs.data() + _n_arc * _cdim;
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
 Grid2d::Grid2d() {};
 
 Grid2d::~Grid2d() {};
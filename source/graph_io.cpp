@@ -6,8 +6,10 @@
 #include <iostream>
 #include <fstream>
 #include <stdlib.h>
+#include <stdint.h>
 
 #include "graph.hpp"
+#include "graph_io.hpp"
 #include "vec_type.hpp"
 // #include "emoa.hpp"
 
@@ -82,6 +84,90 @@ int LoadSparseGraphDIMAC(std::vector<std::string> edge_cost_fnames, SparseGraph*
 	return 1; // true, succeed.
 };
 
+int SaveCSRGraph(std::string fname, PlannerGraph* g) {
+	std::ofstream fout(fname, std::ios::binary);
+	if (!fout) {
+		std::cerr << "[Error] file '" << fname << "' could not be opened" << std::endl;
+		return -1;
+	}
+
+	uint64_t n_vertex = g->NumVertex();
+	uint64_t cdim = g->CostDim();
+	std::vector<uint64_t> fwd_offsets(n_vertex + 1, 0), rev_offsets(n_vertex + 1, 0);
+	std::vector<int64_t> fwd_targets, rev_targets;
+	std::vector<double> fwd_costs, rev_costs;
+	for (uint64_t v = 0; v < n_vertex; v++) {
+		auto succs = g->GetSuccs(v);
+		auto succ_costs = g->GetSuccCosts(v);
+		for (size_t j = 0; j < succs.size(); j++) {
+			fwd_targets.push_back(succs[j]);
+			fwd_costs.insert(fwd_costs.end(), succ_costs[j].begin(), succ_costs[j].end());
+		}
+		fwd_offsets[v + 1] = fwd_targets.size();
+
+		auto preds = g->GetPreds(v);
+		auto pred_costs = g->GetPredCosts(v);
+		for (size_t j = 0; j < preds.size(); j++) {
+			rev_targets.push_back(preds[j]);
+			rev_costs.insert(rev_costs.end(), pred_costs[j].begin(), pred_costs[j].end());
+		}
+		rev_offsets[v + 1] = rev_targets.size();
+	}
+	uint64_t n_arc = fwd_targets.size();
+
+	uint64_t header[3] = {n_vertex, n_arc, cdim};
+	fout.write(CSR_GRAPH_MAGIC, 8);
+	fout.write(reinterpret_cast<const char*>(header), sizeof(header));
+	fout.write(reinterpret_cast<const char*>(fwd_offsets.data()), fwd_offsets.size() * sizeof(uint64_t));
+	fout.write(reinterpret_cast<const char*>(fwd_targets.data()), fwd_targets.size() * sizeof(int64_t));
+	fout.write(reinterpret_cast<const char*>(fwd_costs.data()), fwd_costs.size() * sizeof(double));
+	fout.write(reinterpret_cast<const char*>(rev_offsets.data()), rev_offsets.size() * sizeof(uint64_t));
+	fout.write(reinterpret_cast<const char*>(rev_targets.data()), rev_targets.size() * sizeof(int64_t));
+	fout.write(reinterpret_cast<const char*>(rev_costs.data()), rev_costs.size() * sizeof(double));
+	if (!fout) {
+		std::cerr << "[Error] file '" << fname << "' could not be written" << std::endl;
+		return -1;
+	}
+
+	std::cout << "[INFO] SaveCSRGraph, " << n_vertex << " vertices, " << n_arc << " arcs, " 
+	          << cdim << " costs saved to " << fname << std::endl;
+	return 1;
+};
+
+int LoadCSRGraph(std::string fname, CSRGraph* out) {
+	std::cout << "[INFO] LoadCSRGraph " << fname << std::endl;
+	if (!out->MapFile(fname)) {
+		return -1;
+	}
+	return 1;
+};
+
+bool IsCSRGraphFile(const std::string& fname) {
+	const std::string ext = ".csr";
+	return fname.size() >= ext.size() && fname.compare(fname.size() - ext.size(), ext.size(), ext) == 0;
+};
+
+int LoadPlannerGraph(std::vector<std::string> fnames, std::unique_ptr<PlannerGraph>* out, bool csr) {
+	if (fnames.size() == 1 && IsCSRGraphFile(fnames[0])) {
+		CSRGraph* g = new CSRGraph;
+		out->reset(g);
+		return LoadCSRGraph(fnames[0], g);
+	}
+	if (csr) {
+		SparseGraph sparse;
+		int status = LoadSparseGraphDIMAC(fnames, &sparse);
+		CSRGraph* g = new CSRGraph;
+		out->reset(g);
+		if (status >= 0) {
+			g->CreateFrom(&sparse);
+		}
+		return status;
+	}
+	SparseGraph* g = new SparseGraph;
+	out->reset(g);
+	return LoadSparseGraphDIMAC(fnames, g);
+};
+
 int LoadStartGoal(std::string fname, std::vector<long>* sources, std::vector<long>* goals) {
 	std::ifstream fin;
 	fin.open(fname);
@@ -0,0 +1,320 @@
+/*******************************************
+ * About: Heuristic tables and their on-disk cache.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "heuristic_cache.hpp"
+#include "search_dijkstra.hpp"
+
+#include <algorithm>
+#include <cstdio>
+#include <cstring>
+#include <exception>
+#include <fstream>
+#include <iostream>
+#include <limits>
+#include <sstream>
+#include <thread>
+#include <utility>
+
+#ifdef _WIN32
+#include <windows.h>
+#include <direct.h>
+#include <process.h>
+#include <sys/utime.h>
+#else
+#include <dirent.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include <utime.h>
+#endif
+
+namespace rzq{
+namespace search{
+
+namespace {
+
+const size_t HEURISTIC_HEADER_SIZE = 8 + 4 * sizeof(uint64_t);
+
+// a cached file, for eviction.
+struct CacheEntry {
+  std::string fname;
+  uint64_t size;
+  int64_t mtime;
+};
+
+bool FileExists(const std::string& fname) {
+  std::ifstream fin(fname.c_str(), std::ios::binary);
+  return fin.good();
+};
+
+// mark a file as recently used.
+void TouchFile(const std::string& fname) {
+#ifdef _WIN32
+  _utime(fname.c_str(), NULL);
+#else
+  utime(fname.c_str(), NULL);
+#endif
+};
+
+void MakeDir(const std::string& dir) {
+#ifdef _WIN32
+  _mkdir(dir.c_str());
+#else
+  mkdir(dir.c_str(), 0755);
+#endif
+};
+
+int ProcessId() {
+#ifdef _WIN32
+  return _getpid();
+#else
+  return getpid();
+#endif
+};
+
+std::vector<CacheEntry> ListCacheFiles(const std::string& dir) {
+  std::vector<CacheEntry> out;
+  std::string suffix = HEURISTIC_FILE_SUFFIX;
+#ifdef _WIN32
+  WIN32_FIND_DATAA data;
+  HANDLE h = FindFirstFileA((dir + "/*" + suffix).c_str(), &data);
+  if (h == INVALID_HANDLE_VALUE) {
+    return out;
+  }
+  do {
+    CacheEntry e;
+    e.fname = dir + "/" + data.cFileName;
+    e.size = (uint64_t(data.nFileSizeHigh) << 32) | data.nFileSizeLow;
+    e.mtime = (int64_t(data.ftLastWriteTime.dwHighDateTime) << 32) | data.ftLastWriteTime.dwLowDateTime;
+    out.push_back(e);
+  } while (FindNextFileA(h, &data));
+  FindClose(h);
+#else
+  DIR* d = opendir(dir.c_str());
+  if (d == NULL) {
+    return out;
+  }
+  struct dirent* ent;
+  while ((ent = readdir(d)) != NULL) {
+    std::string name = ent->d_name;
+    if (name.size() < suffix.size() || name.compare(name.size() - suffix.size(), suffix.size(), suffix) != 0) {
+      continue;
+    }
+    CacheEntry e;
+    e.fname = dir + "/" + name;
+    struct stat st;
+    if (stat(e.fname.c_str(), &st) != 0) {
+      continue;
+    }
+    e.size = uint64_t(st.st_size);
+    e.mtime = int64_t(st.st_mtime);
+    out.push_back(e);
+  }
+  closedir(d);
+#endif
+  return out;
+};
+
+// FNV-1a, 64 bit.
+inline void HashBytes(const void* data, size_t n, uint64_t* h) {
+  const unsigned char* p = static_cast<const unsigned char*>(data);
+  for (size_t i = 0; i < n; i++) {
+    *h ^= p[i];
+    *h *= 1099511628211ULL;
+  }
+};
+
+} // end anonymous namespace
+
+//////////////////////////////////////////////////////////////////////
+
+HeuristicTable::HeuristicTable() {};
+
+void HeuristicTable::Compute(basic::PlannerGraph* g, long vd, int n_threads) {
+  _file.Close();
+  _n_vertex = g->NumVertex();
+  _cdim = g->CostDim();
+  _vd = vd;
+  _values.assign(_cdim * _n_vertex, std::numeric_limits<double>::infinity());
+
+  // thread k searches the cost dimensions k, k+n_threads, ..., each writes its own rows of _values.
+  size_t n_workers = std::max(1, std::min(n_threads, int(_cdim)));
+  std::vector<std::exception_ptr> errors(n_workers);
+  auto work = [this, g, vd, n_workers, &errors](size_t k) {
+    try {
+      for (size_t i = k; i < _cdim; i += n_workers) {
+        Dijkstra dijk;
+        dijk.SetGraphPtr(g);
+        dijk.ExhaustiveBackwards(vd, std::numeric_limits<double>::infinity(), i);
+        std::vector<double> dist = dijk.GetDistAll();
+        std::copy(dist.begin(), dist.end(), _values.begin() + i * _n_vertex);
+      }
+    } catch (...) {
+      errors[k] = std::current_exception();
+    }
+  };
+
+  std::vector<std::thread> threads;
+  for (size_t k = 1; k < n_workers; k++) {
+    threads.push_back(std::thread(work, k));
+  }
+  work(0);
+  for (size_t k = 0; k < threads.size(); k++) {
+    threads[k].join();
+  }
+  for (size_t k = 0; k < n_workers; k++) {
+    if (errors[k]) {
+      std::rethrow_exception(errors[k]);
+    }
+  }
+  _data = _values.data();
+};
+
+bool HeuristicTable::Map(const std::string& fname, size_t n_vertex, size_t cdim, long vd, uint64_t graph_key) {
+  if (!FileExists(fname) || !_file.Open(fname)) {
+    return false;
+  }
+  const char* p = _file.Data();
+  uint64_t header[4];
+  if (_file.Size() < HEURISTIC_HEADER_SIZE || std::memcmp(p, HEURISTIC_FILE_MAGIC, 8) != 0) {
+    _file.Close();
+    return false;
+  }
+  std::memcpy(header, p + 8, sizeof(header));
+  if (header[0] != n_vertex || header[1] != cdim || int64_t(header[2]) != vd || header[3] != graph_key ||
+      _file.Size() != HEURISTIC_HEADER_SIZE + n_vertex * cdim * sizeof(double)) {
+    _file.Close();
+    return false;
+  }
+  _values.clear();
+  _n_vertex = n_vertex;
+  _cdim = cdim;
+  _vd = vd;
+  _data = reinterpret_cast<const double*>(p + HEURISTIC_HEADER_SIZE);
+  return true;
+};
+
+int HeuristicTable::Save(const std::string& fname, uint64_t graph_key) const {
+  // write to a temporary file first, so that other processes never map a partial table.
+  std::ostringstream tmp;
+  tmp << fname << ".tmp" << ProcessId();
+  {
+    std::ofstream fout(tmp.str().c_str(), std::ios::binary);
+    if (!fout) {
+      std::cerr << "[Error] file '" << tmp.str() << "' could not be opened" << std::endl;
+      return -1;
+    }
+    uint64_t header[4] = {uint64_t(_n_vertex), uint64_t(_cdim), uint64_t(int64_t(_vd)), graph_key};
+    fout.write(HEURISTIC_FILE_MAGIC, 8);
+    fout.write(reinterpret_cast<const char*>(header), sizeof(header));
+    fout.write(reinterpret_cast<const char*>(_data), _cdim * _n_vertex * sizeof(double));
+    if (!fout) {
+      std::cerr << "[Error] file '" << tmp.str() << "' could not be written" << std::endl;
+      std::remove(tmp.str().c_str());
+      return -1;
+    }
+  }
+  if (std::rename(tmp.str().c_str(), fname.c_str()) != 0) {
+    // another process stored the same table meanwhile.
+    std::remove(tmp.str().c_str());
+  }
+  return 1;
+};
+
+size_t HeuristicTable::NumVertex() const {
+  return _n_vertex;
+};
+
+size_t HeuristicTable::CostDim() const {
+  return _cdim;
+};
+
+//////////////////////////////////////////////////////////////////////
+
+HeuristicCache::HeuristicCache(const std::string& dir, size_t max_bytes) :
+  _dir(dir), _max_bytes(max_bytes)
+{
+  MakeDir(_dir);
+};
+
+bool HeuristicCache::Init(basic::PlannerGraph* g, long vd, HeuristicTable* out, int n_threads) {
+  uint64_t key = GraphKey(g);
+  std::string fname = _FileName(key, vd);
+  if (out->Map(fname, g->NumVertex(), g->CostDim(), vd, key)) {
+    TouchFile(fname);
+    return true;
+  }
+  out->Compute(g, vd, n_threads);
+  if (out->Save(fname, key) > 0) {
+    _Evict();
+  }
+  return false;
+};
+
+uint64_t HeuristicCache::GraphKey(basic::PlannerGraph* g) {
+  // not the address of g, a graph loaded after g was freed may get the same address.
+  if (g->InstanceId() == _graph_id) {
+    return _graph_key;
+  }
+  uint64_t h = 14695981039346656037ULL;
+  uint64_t sizes[2] = {uint64_t(g->NumVertex()), uint64_t(g->CostDim())};
+  HashBytes(sizes, sizeof(sizes), &h);
+  for (size_t v = 0; v < g->NumVertex(); v++) {
+    if (!g->HasVertex(v)) {
+      continue;
+    }
+    std::vector<long> succs = g->GetSuccs(v);
+    std::vector< std::vector<double> > costs = g->GetSuccCosts(v);
+    int64_t header[2] = {int64_t(v), int64_t(succs.size())};
+    HashBytes(header, sizeof(header), &h);
+    for (size_t k = 0; k < succs.size(); k++) {
+      int64_t u = succs[k];
+      HashBytes(&u, sizeof(u), &h);
+      HashBytes(costs[k].data(), costs[k].size() * sizeof(double), &h);
+    }
+  }
+  _graph_id = g->InstanceId();
+  _graph_key = h;
+  return h;
+};
+
+std::string HeuristicCache::_FileName(uint64_t graph_key, long vd) const {
+  std::ostringstream out;
+  out << _dir << "/" << std::hex << graph_key << std::dec << "_" << vd << HEURISTIC_FILE_SUFFIX;
+  return out.str();
+};
+
+void HeuristicCache::_Evict() {
+  std::vector<CacheEntry> entries = ListCacheFiles(_dir);
+  uint64_t total = 0;
+  for (size_t i = 0; i < entries.size(); i++) {
+    total += entries[i].size;
+  }
+  if (total <= _max_bytes) {
+    return;
+  }
+  std::sort(entries.begin(), entries.end(),
+            [](const CacheEntry& a, const CacheEntry& b) { return a.mtime < b.mtime; });
+  for (size_t i = 0; i < entries.size() && total > _max_bytes; i++) {
+    // files still mapped by other processes stay valid until they are unmapped (POSIX),
+    // on Windows removing them fails and they are retried next time.
+    if (std::remove(entries[i].fname.c_str()) == 0) {
+      total -= entries[i].size;
+    }
+  }
+};
+
+//////////////////////////////////////////////////////////////////////
+
+void InitHeuristicTable(basic::PlannerGraph* g, long vd, HeuristicCache* cache, HeuristicTable* out,
+                        int n_threads) {
+  if (cache != NULL) {
+    cache->Init(g, vd, out, n_threads);
+  } else {
+    out->Compute(g, vd, n_threads);
+  }
+};
+
+} // end namespace search
+} // end namespace rzq
@@ -0,0 +1,147 @@
+/*******************************************
+ * About: Label storage of EMOA* and ext-BOA*-lex, see label_arena.hpp.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "label_arena.hpp"
+
+#include <iostream>
+#include <stdexcept>
+
+namespace rzq{
+namespace search{
+
+static const char* LABEL_COSTS_KINDS[] = {"int", "float", "double"};
+static const int KIND_INT = 0, KIND_FLOAT = 1, KIND_DOUBLE = 2;
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+LabelArena::LabelArena() {};
+
+void LabelArena::Init(size_t cdim, const std::string& kind) {
+  _cdim = cdim;
+  _kind = -1;
+  for (int k = KIND_INT; k <= KIND_DOUBLE; k++) {
+    if (kind == LABEL_COSTS_KINDS[k]) {
+      _kind = k;
+    }
+  }
+  if (_kind < 0) {
+    std::cout << "[ERROR] LabelArena::Init, unknown label costs '" << kind << "'" << std::endl;
+    throw std::runtime_error("[ERROR] LabelArena::Init, unknown label costs");
+  }
+  _vp = ChunkedRows<long>(2);
+  _g_int = ChunkedRows<int32_t>(cdim);
+  _g_float = ChunkedRows<float>(cdim);
+  _g_double = ChunkedRows<double>(cdim);
+};
+
+long LabelArena::Add(long v, long parent, const std::vector<double>& g) {
+  if (_kind != KIND_DOUBLE && !_Fits(g)) {
+    _Widen();
+  }
+
+  long id = long(_vp.Size());
+  long* vp = _vp.Append();
+  vp[0] = v;
+  vp[1] = parent;
+
+  if (_kind == KIND_INT) {
+    int32_t* row = _g_int.Append();
+    for (size_t i = 0; i < _cdim; i++) {
+      row[i] = int32_t(g[i]);
+    }
+  } else if (_kind == KIND_FLOAT) {
+    float* row = _g_float.Append();
+    for (size_t i = 0; i < _cdim; i++) {
+      row[i] = float(g[i]);
+    }
+  } else {
+    double* row = _g_double.Append();
+    for (size_t i = 0; i < _cdim; i++) {
+      row[i] = g[i];
+    }
+  }
+  return id;
+};
+
+long LabelArena::V(long id) const {
+  return _vp.Row(id)[0];
+};
+
+long LabelArena::Parent(long id) const {
+  return _vp.Row(id)[1];
+};
+
+std::vector<double> LabelArena::G(long id) const {
+  std::vector<double> g(_cdim);
+  if (_kind == KIND_INT) {
+    const int32_t* row = _g_int.Row(id);
+    for (size_t i = 0; i < _cdim; i++) {
+      g[i] = row[i];
+    }
+  } else if (_kind == KIND_FLOAT) {
+    const float* row = _g_float.Row(id);
+    for (size_t i = 0; i < _cdim; i++) {
+      g[i] = row[i];
+    }
+  } else {
+    const double* row = _g_double.Row(id);
+    for (size_t i = 0; i < _cdim; i++) {
+      g[i] = row[i];
+    }
+  }
+  return g;
+};
+
+size_t LabelArena::Size() const {
+  return _vp.Size();
+};
+
+size_t LabelArena::Bytes() const {
+  return _vp.Bytes() + _g_int.Bytes() + _g_float.Bytes() + _g_double.Bytes();
+};
+
+std::string LabelArena::Kind() const {
+  return LABEL_COSTS_KINDS[_kind];
+};
+
+bool LabelArena::_Fits(const std::vector<double>& g) const {
+  for (size_t i = 0; i < _cdim; i++) {
+    if (_kind == KIND_INT) {
+      if (!(g[i] >= INT32_MIN && g[i] <= INT32_MAX) || double(int32_t(g[i])) != g[i]) {
+        return false;
+      }
+    } else if (double(float(g[i])) != g[i]) {
+      return false;
+    }
+  }
+  return true;
+};
+
+void LabelArena::_Widen() {
+  std::cout << "[INFO] LabelArena, a cost does not fit " << Kind() << ", the label costs are stored as double." << std::endl;
+  for (size_t id = 0; id < _vp.Size(); id++) {
+    std::vector<double> g = G(id);
+    double* row = _g_double.Append();
+    for (size_t i = 0; i < _cdim; i++) {
+      row[i] = g[i];
+    }
+  }
+  _g_int.Clear();
+  _g_float.Clear();
+  _kind = KIND_DOUBLE;
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+bool IsLabelCostsKind(const std::string& kind) {
+  return kind == "int" || kind == "float" || kind == "double";
+};
+
+} // end namespace search
+} // end namespace rzq
@@ -0,0 +1,116 @@
+/*******************************************
+ * About: Read-only memory-mapped files.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "mmap_file.hpp"
+#include <iostream>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+namespace rzq{
+namespace basic{
+
+MappedFile::MappedFile() {};
+
+MappedFile::~MappedFile() {
+  Close();
+};
+
+#ifdef _WIN32
+
+bool MappedFile::Open(const std::string& fname) {
+  Close();
+  HANDLE file = CreateFileA(fname.c_str(), GENERIC_READ, FILE_SHARE_READ, NULL,
+                            OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, NULL);
+  if (file == INVALID_HANDLE_VALUE) {
+    std::cerr << "[Error] file '" << fname << "' could not be opened" << std::endl;
+    return false;
+  }
+  LARGE_INTEGER size;
+  if (!GetFileSizeEx(file, &size) || size.QuadPart == 0) {
+    CloseHandle(file);
+    std::cerr << "[Error] file '" << fname << "' is empty" << std::endl;
+    return false;
+  }
+  HANDLE mapping = CreateFileMappingA(file, NULL, PAGE_READONLY, 0, 0, NULL);
+  CloseHandle(file); // the mapping keeps the file open.
+  if (mapping == NULL) {
+    std::cerr << "[Error] file '" << fname << "' could not be mapped" << std::endl;
+    return false;
+  }
+  void* data = MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0);
+  if (data == NULL) {
+    CloseHandle(mapping);
+    std::cerr << "[Error] file '" << fname << "' could not be mapped" << std::endl;
+    return false;
+  }
+  _handle = mapping;
+  _data = static_cast<const char*>(data);
+  _size = size_t(size.QuadPart);
+  return true;
+};
+
+void MappedFile::Close() {
+  if (_data != NULL) {
+    UnmapViewOfFile(_data);
+    CloseHandle(static_cast<HANDLE>(_handle));
+  }
+  _data = NULL;
+  _handle = NULL;
+  _size = 0;
+};
+
+#else
+
+bool MappedFile::Open(const std::string& fname) {
+  Close();
+  int fd = open(fname.c_str(), O_RDONLY);
+  if (fd < 0) {
+    std::cerr << "[Error] file '" << fname << "' could not be opened" << std::endl;
+    return false;
+  }
+  struct stat st;
+  if (fstat(fd, &st) != 0 || st.st_size == 0) {
+    close(fd);
+    std::cerr << "[Error] file '" << fname << "' is empty" << std::endl;
+    return false;
+  }
+  void* data = mmap(NULL, st.st_size, PROT_READ, MAP_SHARED, fd, 0);
+  close(fd); // the mapping keeps the file open.
+  if (data == MAP_FAILED) {
+    std::cerr << "[Error] file '" << fname << "' could not be mapped" << std::endl;
+    return false;
+  }
+  _data = static_cast<const char*>(data);
+  _size = size_t(st.st_size);
+  return true;
+};
+
+void MappedFile::Close() {
+  if (_data != NULL) {
+    munmap(const_cast<char*>(_data), _size);
+  }
+  _data = NULL;
+  _size = 0;
+};
+
+#endif
+
+const char* MappedFile::Data() const {
+  return _data;
+};
+
+size_t MappedFile::Size() const {
+  return _size;
+};
+
+} // end namespace basic
+} // end namespace rzq
@@ -0,0 +1,222 @@
+/*******************************************
+ * About: Open lists of EMOA* and ext-BOA*-lex, see open_list.hpp.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "open_list.hpp"
+
+#include <algorithm>
+#include <cmath>
+#include <iostream>
+#include <stdexcept>
+
+namespace rzq{
+namespace search{
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+void TreeOpenList::Push(const std::vector<double>& f, long id) {
+  _set.insert(std::make_pair(f, id));
+};
+
+long TreeOpenList::Pop() {
+  long id = _set.begin()->second;
+  _set.erase(_set.begin());
+  return id;
+};
+
+bool TreeOpenList::Empty() const {
+  return _set.empty();
+};
+
+size_t TreeOpenList::Size() const {
+  return _set.size();
+};
+
+size_t TreeOpenList::Bytes() const {
+  if (_set.empty()) {
+    return 0;
+  }
+  // a tree node (color and three pointers) with its pair, and the heap block of f.
+  size_t node = 4 * sizeof(void*) + sizeof(std::pair< std::vector<double>, long >);
+  return _set.size() * (node + _set.begin()->first.capacity() * sizeof(double));
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+HeapOpenList::HeapOpenList(size_t cdim, size_t arity) : _cdim(cdim), _arity(arity < 2 ? 2 : arity) {};
+
+bool HeapOpenList::_Less(size_t a, size_t b) const {
+  const double* ka = &_keys[a * _cdim];
+  const double* kb = &_keys[b * _cdim];
+  for (size_t i = 0; i < _cdim; i++) {
+    if (ka[i] != kb[i]) {
+      return ka[i] < kb[i];
+    }
+  }
+  return _ids[a] < _ids[b];
+};
+
+void HeapOpenList::_Swap(size_t a, size_t b) {
+  for (size_t i = 0; i < _cdim; i++) {
+    std::swap(_keys[a * _cdim + i], _keys[b * _cdim + i]);
+  }
+  std::swap(_ids[a], _ids[b]);
+};
+
+void HeapOpenList::Push(const std::vector<double>& f, long id) {
+  _keys.insert(_keys.end(), f.begin(), f.begin() + _cdim);
+  _ids.push_back(id);
+
+  // sift up
+  size_t k = _ids.size() - 1;
+  while (k > 0) {
+    size_t parent = (k - 1) / _arity;
+    if (!_Less(k, parent)) {
+      break;
+    }
+    _Swap(k, parent);
+    k = parent;
+  }
+};
+
+long HeapOpenList::Pop() {
+  long id = _ids[0];
+  size_t last = _ids.size() - 1;
+  if (last > 0) {
+    _Swap(0, last);
+  }
+  _ids.pop_back();
+  _keys.resize(last * _cdim);
+
+  // sift down
+  size_t k = 0;
+  while (true) {
+    size_t child = k * _arity + 1;
+    if (child >= last) {
+      break;
+    }
+    size_t best = child;
+    size_t end = std::min(child + _arity, last);
+    for (size_t c = child + 1; c < end; c++) {
+      if (_Less(c, best)) {
+        best = c;
+      }
+    }
+    if (!_Less(best, k)) {
+      break;
+    }
+    _Swap(k, best);
+    k = best;
+  }
+  return id;
+};
+
+bool HeapOpenList::Empty() const {
+  return _ids.empty();
+};
+
+size_t HeapOpenList::Size() const {
+  return _ids.size();
+};
+
+size_t HeapOpenList::Bytes() const {
+  return _keys.capacity() * sizeof(double) + _ids.capacity() * sizeof(long);
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+BucketOpenList::BucketOpenList(size_t cdim, size_t arity) : _cdim(cdim), _arity(arity) {};
+
+void BucketOpenList::Push(const std::vector<double>& f, long id) {
+  if (f[0] != std::floor(f[0])) {
+    std::cout << "[ERROR] BucketOpenList::Push, f[0] = " << f[0] << " is not an integer" << std::endl;
+    throw std::runtime_error("[ERROR] BucketOpenList::Push, the bucket open list needs integer costs");
+  }
+  if (_buckets.empty()) {
+    _base = f[0];
+  }
+  if (f[0] < _base) {
+    // shift the buckets, so that the new lowest cost gets bucket 0.
+    size_t shift = size_t(_base - f[0]);
+    std::vector< std::unique_ptr<HeapOpenList> > buckets(shift);
+    for (auto& bucket : _buckets) {
+      buckets.push_back(std::move(bucket));
+    }
+    _buckets.swap(buckets);
+    _base = f[0];
+    _first += shift;
+  }
+
+  size_t k = size_t(f[0] - _base);
+  if (k >= _buckets.size()) {
+    _buckets.resize(k + 1);
+  }
+  if (!_buckets[k]) {
+    _buckets[k].reset(new HeapOpenList(_cdim, _arity));
+  }
+  _buckets[k]->Push(f, id);
+  if (k < _first || _size == 0) {
+    _first = k;
+  }
+  _size++;
+};
+
+long BucketOpenList::Pop() {
+  while (!_buckets[_first] || _buckets[_first]->Empty()) {
+    // free the arrays of an emptied bucket, Push creates it again if a label gets its cost.
+    _buckets[_first].reset();
+    _first++;
+  }
+  _size--;
+  return _buckets[_first]->Pop();
+};
+
+bool BucketOpenList::Empty() const {
+  return _size == 0;
+};
+
+size_t BucketOpenList::Size() const {
+  return _size;
+};
+
+size_t BucketOpenList::Bytes() const {
+  size_t bytes = _buckets.capacity() * sizeof(std::unique_ptr<HeapOpenList>);
+  for (const auto& bucket : _buckets) {
+    if (bucket) {
+      bytes += sizeof(HeapOpenList) + bucket->Bytes();
+    }
+  }
+  return bytes;
+};
+
+// ############################################################
+// ############################################################
+// ############################################################
+
+bool IsOpenListKind(const std::string& kind) {
+  return kind == "set" || kind == "heap" || kind == "bucket";
+};
+
+std::unique_ptr<OpenList> NewOpenList(const std::string& kind, size_t cdim) {
+  if (kind == "set") {
+    return std::unique_ptr<OpenList>(new TreeOpenList);
+  }
+  if (kind == "heap") {
+    return std::unique_ptr<OpenList>(new HeapOpenList(cdim));
+  }
+  if (kind == "bucket") {
+    return std::unique_ptr<OpenList>(new BucketOpenList(cdim));
+  }
+  std::cout << "[ERROR] NewOpenList, unknown open list '" << kind << "'" << std::endl;
+  throw std::runtime_error("[ERROR] NewOpenList, unknown open list");
+};
+
+} // end namespace search
+} // end namespace rzq
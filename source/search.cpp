@@ -6,6 +6,8 @@
 
 
 #include "search.hpp"
+#include <iostream>
+#include <stdexcept>
 
 namespace rzq{
 namespace search{
@@ -24,5 +26,70 @@ void GraphSearch::SetGraphPtr(PlannerGraph* g) {
   _mode = 0;
 };
 
+int ParseSearchOptions(int* argc, char* argv[], SearchOptions* opt) {
+  int n = 1;
+  for (int i = 1; i < *argc; i++) {
+    std::string name = argv[i];
+    if (name != "--heu_cache" && name != "--heu_cache_mb" && name != "--heu_threads" &&
+        name != "--trace" && name != "--graph" && name != "--open_list" &&
+        name != "--label_costs" && name != "--frontier" && name != "--max_labels" &&
+        name != "--max_memory_mb") {
+      argv[n++] = argv[i];
+      continue;
+    }
+    if (i + 1 >= *argc) {
+      std::cout << "[ERROR] option " << name << " needs a value" << std::endl;
+      return -1;
+    }
+    std::string value = argv[++i];
+    try {
+      if (name == "--heu_cache") {
+        opt->heu_cache_dir = value;
+      } else if (name == "--heu_cache_mb") {
+        opt->heu_cache_mb = std::stod(value);
+      } else if (name == "--heu_threads") {
+        opt->heu_threads = std::stoi(value);
+      } else if (name == "--graph") {
+        if (value != "csr" && value != "sparse") {
+          throw std::invalid_argument(value);
+        }
+        opt->csr_graph = value == "csr";
+      } else if (name == "--open_list") {
+        if (!IsOpenListKind(value)) {
+          throw std::invalid_argument(value);
+        }
+        opt->open_list = value;
+      } else if (name == "--label_costs") {
+        if (!IsLabelCostsKind(value)) {
+          throw std::invalid_argument(value);
+        }
+        opt->label_costs = value;
+      } else if (name == "--frontier") {
+        if (!IsFrontierKind(value)) {
+          throw std::invalid_argument(value);
+        }
+        opt->frontier = value;
+      } else if (name == "--max_labels") {
+        opt->max_labels = std::stol(value);
+        if (opt->max_labels < 0) {
+          throw std::invalid_argument(value);
+        }
+      } else if (name == "--max_memory_mb") {
+        opt->max_memory_mb = std::stod(value);
+        if (opt->max_memory_mb < 0) {
+          throw std::invalid_argument(value);
+        }
+      } else {
+        opt->trace = std::stoi(value) != 0;
+      }
+    } catch (const std::exception&) {
+      std::cout << "[ERROR] option " << name << " has an invalid value " << value << std::endl;
+      return -1;
+    }
+  }
+  *argc = n;
+  return 0;
+};
+
 } // end namespace search
 } // end namespace zr
@@ -124,11 +124,14 @@ int BOA::Search(long vo, long vd, double time_limit) {
 
     // ## expand label l ##
     _res.n_expanded++;
-    auto succs = _graph->GetSuccs(l.v);
-    auto cvecs = _graph->GetSuccCosts(l.v);
-    for (int idx = 0; idx < succs.size(); idx++) {
-      auto u = succs[idx];
-      CostVec gu = l.g + cvecs[idx];
+    basic::ArcSpan arcs = basic::SuccArcs(_graph, l.v, &_arc_buf);
+    for (size_t idx = 0; idx < arcs.size; idx++) {
+      long u = arcs.Target(idx);
+      const double* cu = arcs.Cost(idx);
+      CostVec gu = l.g;
+      for (size_t i = 0; i < gu.size(); i++) {
+        gu[i] += cu[i];
+      }
       Label l2(_GenLabelId(), u, gu, gu + _Heuristic(u));
       _label[l2.id] = l2;
       _parent[l2.id] = l.id;
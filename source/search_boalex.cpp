@@ -13,14 +13,13 @@
 // #include <chrono>
 
 #include <fstream>
+#include "result_io.hpp"
 
 namespace rzq{
 namespace search{
 
 #define NO_FILTER_FRONTIER false // just for experiment
 
-long G_DOM_CHECK_COUNT_BOALEX = 0; // global variable, make impl easier...
-
 inline std::ostream& operator<<(std::ostream& os, Label& l){
   std::string s;
   s = "{id:" + std::to_string(l.id) + ",v:" + std::to_string(l.v) + ",g:" 
@@ -51,17 +50,41 @@ void BOALEX::SetGraphPtr(basic::PlannerGraph* g) {
   _graph = g;
 };
 
+void BOALEX::SetHeuristicCache(HeuristicCache* cache) {
+  _heu_cache = cache;
+};
+
+void BOALEX::SetHeuristicThreads(int n_threads) {
+  _heu_threads = n_threads;
+};
+
+void BOALEX::SetSolutionTrace(bool trace) {
+  _trace = trace;
+};
+
+void BOALEX::SetOpenList(const std::string& kind) {
+  _open_kind = kind;
+};
+
+void BOALEX::SetLabelCosts(const std::string& kind) {
+  _label_costs = kind;
+};
+
+void BOALEX::SetFrontier(const std::string& kind) {
+  _frontier_kind = kind;
+};
+
+void BOALEX::SetSearchBudget(long max_labels, double max_memory_mb) {
+  _max_labels = max_labels;
+  _max_memory_mb = max_memory_mb;
+};
+
 void BOALEX::InitHeu(long vd) {
-  SimpleTimer timer;
+  WallTimer timer; // the heuristic may be computed by several threads.
   timer.Start();
-  _dijks.resize(_graph->CostDim());
-  for (size_t i = 0; i<_graph->CostDim(); i++) {
-    _dijks[i].SetGraphPtr(_graph);
-    _dijks[i].ExhaustiveBackwards(vd, std::numeric_limits<double>::infinity(), i) ;
-  }
+  _heu = std::make_shared<HeuristicTable>();
+  InitHeuristicTable(_graph, vd, _heu_cache, _heu.get(), _heu_threads);
   _res.rt_initHeu = timer.GetDurationSecond();
-
-  G_DOM_CHECK_COUNT_BOALEX = 0; // reset dom check counter.
   return ;
 };
 
@@ -73,35 +96,46 @@ int BOALEX::Search(long vo, long vd, double time_limit) {
   // _alpha.resize(_graph->NumVertex()); // this requires the graph vertex are numbered from 0 to |V|.
 
   // ### init ###
-  SimpleTimer timer;
+  WallTimer timer; // wall time, like the ScopedTimer of rt_domCheck.
   timer.Start();
   _vo = vo;
   _vd = vd;
   auto zero_vec = InitVecType(_graph->CostDim(), 0.0);
-  Label lo(_GenLabelId(), vo, zero_vec, _Heuristic(_vo));
-  _label[lo.id] = lo;
-  _parent[lo.id] = -1; 
+  _labels.Init(_graph->CostDim(), _label_costs);
+  Label lo(_labels.Add(vo, -1, zero_vec), vo, zero_vec, _Heuristic(_vo));
   _res.n_generated++;
   // _UpdateFrontier(lo);
-  _open.insert( std::make_pair(lo.f, lo.id) );
+  _open = NewOpenList(_open_kind, _graph->CostDim());
+  _open->Push(lo.f, lo.id);
+  _res.num_open_max = 1;
+  long n_popped = 0;
 
   if (DEBUG_BOALEX > 0) {
     std::cout << "[DEBUG] Init, lo = " << lo << std::endl;
   }
 
   // ### main search loop ###
-  while ( !_open.empty() ) {
+  while ( !_open->Empty() ) {
 
     // check timeout
     if (timer.GetDurationSecond() > time_limit) {
       std::cout << "[INFO] EMOA::Search timeout !" << std::endl;
       _res.timeout = true;
+      _res.termination = TERMINATION_TIMEOUT;
+      break;
+    }
+
+    // check the label and memory budgets, the memory every SEARCH_MEMORY_CHECK_INTERVAL labels popped.
+    int budget = _CheckBudget(n_popped++ % SEARCH_MEMORY_CHECK_INTERVAL == 0);
+    if (budget != TERMINATION_DONE) {
+      std::cout << "[INFO] BOA::Search " << (budget == TERMINATION_LABEL_LIMIT ? "label" : "memory")
+                << " limit reached, the front is partial !" << std::endl;
+      _res.termination = budget;
       break;
     }
 
     // ## select label l, lexicographic order ##
-    Label l = _label[ _open.begin()->second ];
-    _open.erase(_open.begin());
+    Label l = _GetLabel( _open->Pop() );
 
     if (DEBUG_BOALEX > 0) {
       std::cout << "[DEBUG] ### Pop l = " << l << std::endl;
@@ -116,6 +150,10 @@ int BOALEX::Search(long vo, long vd, double time_limit) {
     }
     _UpdateFrontier(l);
     if (l.v == vd) {
+      if (_trace) {
+        _res.trace_times.push_back(timer.GetDurationSecond());
+        _res.trace_costs.push_back(l.g);
+      }
       continue;
     }
     if (DEBUG_BOALEX > 1) {
@@ -124,14 +162,15 @@ int BOALEX::Search(long vo, long vd, double time_limit) {
 
     // ## expand label l ##
     _res.n_expanded++;
-    auto succs = _graph->GetSuccs(l.v);
-    auto cvecs = _graph->GetSuccCosts(l.v);
-    for (int idx = 0; idx < succs.size(); idx++) {
-      auto u = succs[idx];
-      CostVec gu = l.g + cvecs[idx];
-      Label l2(_GenLabelId(), u, gu, gu + _Heuristic(u));
-      _label[l2.id] = l2;
-      _parent[l2.id] = l.id;
+    basic::ArcSpan arcs = basic::SuccArcs(_graph, l.v, &_arc_buf);
+    for (size_t idx = 0; idx < arcs.size; idx++) {
+      long u = arcs.Target(idx);
+      const double* cu = arcs.Cost(idx);
+      CostVec gu = l.g;
+      for (size_t i = 0; i < gu.size(); i++) {
+        gu[i] += cu[i];
+      }
+      Label l2(-1, u, gu, gu + _Heuristic(u)); // stored (and given an id) only if it enters open.
       if (DEBUG_BOALEX > 0) {
         std::cout << "[DEBUG] >>>> Loop v= " << u << " gen l' = " << l2 << std::endl;
       }
@@ -144,16 +183,24 @@ int BOALEX::Search(long vo, long vd, double time_limit) {
       if (DEBUG_BOALEX > 0) {
         std::cout << "[DEBUG] ----- Add to open..." << std::endl;
       }
+      l2.id = _labels.Add(u, l.id, gu);
       _res.n_generated++;
-      _open.insert( std::make_pair(l2.f, l2.id) );
+      _open->Push(l2.f, l2.id);
     } // end for
+    _res.num_open_max = std::max(_res.num_open_max, long(_open->Size()));
   } // end while
 
   // ### post-process the results ###
   std::cout << "[INFO] BOA::_PostProcRes..." << std::endl;
   _PostProcRes();
+  std::cout << "[INFO] BOA::Search, " << _labels.Size() << " labels stored in " << _labels.Bytes() / 1048576.0
+            << " MB (" << _labels.Kind() << " costs)." << std::endl;
 
-  _res.n_domCheck = G_DOM_CHECK_COUNT_BOALEX;
+  _res.n_domCheck = 0;
+  for (auto f : _alpha) {
+    _res.n_domCheck += f->n_check;
+  }
+  _res.num_labels_max = _labels.Size();
   _res.rt_search = timer.GetDurationSecond();
 
   std::cout << "[INFO] BOA::Search exit." << std::endl;
@@ -164,7 +211,7 @@ int BOALEX::Search(long vo, long vd, double time_limit) {
 CostVec BOALEX::_Heuristic(long v) {
   auto out = CostVec(_graph->CostDim(), 0);
   for (size_t cdim = 0; cdim < out.size(); cdim++) {
-    out[cdim] = _dijks[cdim].GetDistValue(v);
+    out[cdim] = _heu->Get(cdim, v);
     // out[cdim] = 0;
     if (out[cdim] < 0) {
       throw std::runtime_error( "[ERROR], unavailable heuristic !?" );
@@ -174,43 +221,45 @@ CostVec BOALEX::_Heuristic(long v) {
   return out;
 };
 
+int BOALEX::_CheckBudget(bool check_memory) {
+  if (_max_labels > 0 && long(_labels.Size()) >= _max_labels) {
+    return TERMINATION_LABEL_LIMIT;
+  }
+  if (_max_memory_mb > 0 && check_memory && (_labels.Bytes() + _open->Bytes() + _frontier_bytes) / 1048576.0 >= _max_memory_mb) {
+    return TERMINATION_MEMORY_LIMIT;
+  }
+  return TERMINATION_DONE;
+};
+
 BOALEXResult BOALEX::GetResult() const {
   return _res;
 };
 
-long BOALEX::_GenLabelId() {
-
-  long out = _label_id_gen++;
-
-  if (_label_id_gen > __vec_alloc_total){
-    __vec_alloc_total += __vec_alloc_batch;
-    _label.resize(__vec_alloc_total);
-    _parent.resize(__vec_alloc_total);
-    if (__vec_alloc_batch < __vec_alloc_batch_max){
-      __vec_alloc_batch += __vec_alloc_batch;
-    }
-  }
-
-  return out;
+Label BOALEX::_GetLabel(long id) {
+  long v = _labels.V(id);
+  CostVec g = _labels.G(id);
+  return Label(id, v, g, g + _Heuristic(v));
 };
 
 void BOALEX::_PostProcRes() {
   // if (_alpha.find(_vd) != _alpha.end()) {
     for (auto lid : _alpha[_vd]->label_ids) {
       _res.paths[lid] = _BuildPath(lid);
-      _res.costs[lid] = _label[lid].g;
+      _res.costs[lid] = _labels.G(lid);
     }
   // }
   return ;
 };
 
 bool BOALEX::_FrontierCheck(Label l) {
+  ScopedTimer timer(&_res.rt_domCheck);
   // if (_alpha.find(l.v) == _alpha.end()) {return false;}
   auto res = _alpha[l.v]->Check(l.g);
   return res;
 };
 
 bool BOALEX::_SolutionCheck(Label l) {
+  ScopedTimer timer(&_res.rt_domCheck);
 
   // if (_alpha.find(_vd) == _alpha.end()) {return false;}
   auto temp = _alpha[_vd]->Check(l.f);
@@ -221,8 +270,8 @@ bool BOALEX::_SolutionCheck(Label l) {
 std::vector<long> BOALEX::_BuildPath(long lid) {
   std::vector<long> out, out2;
   while( lid >= 0 ) {
-    out.push_back(_label[lid].v);
-    lid = _parent[lid];
+    out.push_back(_labels.V(lid));
+    lid = _labels.Parent(lid);
   }
   for (size_t i = 0; i < out.size(); i++) {
     out2.push_back(out[out.size()-1-i]);
@@ -242,7 +291,11 @@ std::vector<long> BOALEX::_BuildPath(long lid) {
 void BOALEX::_InitFrontiers() {
   _alpha.resize(_graph->NumVertex()); // this requires the graph vertex are numbered from 0 to |V|.
   for (int idx = 0; idx < _alpha.size(); idx++){
-    _alpha[idx] = new Frontier_BOALEX;
+    _alpha[idx] = NewFrontier(_frontier_kind);
+  }
+  _frontier_bytes = _alpha.capacity() * sizeof(ParetoFrontier*);
+  for (auto f : _alpha) {
+    _frontier_bytes += f->Bytes();
   }
   return;
 };
@@ -259,7 +312,12 @@ void BOALEX::_UpdateFrontier(Label l) {
 
   // Frontier3d *ptr = dynamic_cast<Frontier3d *>(_alpha[l.v]);
   // ptr->Update(l);
-  _alpha[l.v]->Update(l);
+  {
+    ScopedTimer timer(&_res.rt_domCheck);
+    size_t bytes = _alpha[l.v]->Bytes();
+    _alpha[l.v]->Update(l.g, l.id);
+    _frontier_bytes = _frontier_bytes - bytes + _alpha[l.v]->Bytes();
+  }
 
   // debug info below
   if (DEBUG_BOALEX > 0) {
@@ -344,9 +402,6 @@ basic::AVLNode* Frontier::_rebuildTreeMethod(std::vector<long> &tree_node_ids, l
   if (DEBUG_AVLTREE) {_verifyTree(n);}
   return n;
 };*/
-  Frontier_BOALEX::Frontier_BOALEX(){};
-
-  Frontier_BOALEX::~Frontier_BOALEX(){};
 
 //Naive version 
 //  bool Frontier_BOA::Check(CostVec g){
@@ -375,40 +430,6 @@ basic::AVLNode* Frontier::_rebuildTreeMethod(std::vector<long> &tree_node_ids, l
 //   return;
 // };
 
-//If it faster than Naive, then it can called optimized version
-bool Frontier_BOALEX::Check(CostVec g){
-   for (auto k : labels){
-    if (EpsDom(k.g,g)) {
-      return true;
-    }
-   }
-  return false;
-};
-void Frontier_BOALEX::Update(Label l){
-    if (labels.empty()){
-      label_ids.push_back(l.id);
-      labels.push_back(l);
-      return;
-    }
-    for (int i = 0 ; i < labels.size(); i++){
-      if (EpsDom(_p(l.g), _p(labels[i].g))) { 
-        labels.erase(labels.begin()+i);
-      }
-    }
-    for(int i = 0; i < labels.size();i++) {
-      if (LexCompare(_p(labels[i].g),_p(l.g))< 0){
-        labels.insert(labels.begin()+i,l);
-        label_ids.push_back(l.id);
-        return;
-      }
-     }
-   labels.push_back(l);
-   label_ids.push_back(l.id);
-   return;
- };
-
-
-
 /*void Frontier::_verifyNonDom(std::vector<long>& tree_node_ids){
   for (size_t i = 0; i < tree_node_ids.size(); i++) {
     for (size_t j = i+1; j < tree_node_ids.size(); j++) {
@@ -479,13 +500,6 @@ void Frontier::Update(Label l) {
   return;
 };
 */
-CostVec Frontier_BOALEX::_p(CostVec v) {
-  CostVec out;
-  for (size_t i = 1; i < v.size(); i++){
-    out.push_back(v[i]);
-  }
-  return out;
-};
 
 //////////////////////////////////////////////////
 
@@ -536,7 +550,9 @@ void GraphExpandCostDim_BOALEX(rzq::basic::SparseGraph* g, bool add_deg_cost, bo
   }
 };
 
-int RunBOALEX(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rzq::search::BOALEXResult* res)
+int RunBOALEX(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rzq::search::BOALEXResult* res,
+            HeuristicCache* heu_cache, int heu_threads, bool trace, const std::string& open_list,
+            const std::string& label_costs, const std::string& frontier, long max_labels, double max_memory_mb)
 {
   size_t cdim = g->CostDim();
   std::cout << "[INFO] RunBOALEX, M=" << cdim << " time_limit = " << time_limit << std::endl;
@@ -545,6 +561,13 @@ int RunBOALEX(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit,
   // The following if-else is actually minor. Just use BOAKd for all cases is totally fine...
   auto planner = rzq::search::BOALEX();
   planner.SetGraphPtr(g) ; // set graph to the planner
+  planner.SetHeuristicCache(heu_cache);
+  planner.SetHeuristicThreads(heu_threads);
+  planner.SetSolutionTrace(trace);
+  planner.SetOpenList(open_list);
+  planner.SetLabelCosts(label_costs);
+  planner.SetFrontier(frontier);
+  planner.SetSearchBudget(max_labels, max_memory_mb);
   planner.InitHeu(vd); // this vd must be the same as the vd in Search().
   ret_flag = planner.Search(vo, vd, time_limit) ;
   *res = planner.GetResult(); // get result
@@ -558,6 +581,10 @@ int RunBOALEX(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit,
 
 
 int SaveBOALEXResult(std::string fname, const search::BOALEXResult& res) {
+  if (IsBinaryResultFile(fname)) {
+    return SaveBinaryResult(fname, res);
+  }
+
   std::ofstream fout;
 
   fout.open(fname);
@@ -575,6 +602,10 @@ int SaveBOALEXResult(std::string fname, const search::BOALEXResult& res) {
   fout << "timeout: " << res.timeout << std::endl;
   fout << "num_nondom_labels_max: " << res.num_nondom_labels_max << std::endl;
   fout << "num_nondom_labels_avg: " << res.num_nondom_labels_avg << std::endl;
+  fout << "rt_domCheck: " << res.rt_domCheck << std::endl;
+  fout << "termination: " << res.termination << std::endl;
+  fout << "num_labels_max: " << res.num_labels_max << std::endl;
+  fout << "num_open_max: " << res.num_open_max << std::endl;
   fout << "N: " << res.costs.size() << std::endl;
 
   int index = 0;
@@ -106,32 +106,35 @@ int Dijkstra::_search() {
     }
 
     // expansion
-    std::vector<long> nghs;
-    std::vector< std::vector<double> > ngh_costs;
+    ArcSpan arcs;
     if (_mode == 1) { 
-      nghs = _graph->GetPreds(v);
-      ngh_costs = _graph->GetPredCosts(v);
+      arcs = PredArcs(_graph, v, &_arc_buf);
     }else if (_mode == 0 || _mode == 2){
-      nghs = _graph->GetSuccs(v);
-      ngh_costs = _graph->GetSuccCosts(v);
+      arcs = SuccArcs(_graph, v, &_arc_buf);
     }else{
       std::cout << "[ERROR] Dijkstra::_search, _mode = " << _mode << std::endl;
       throw std::runtime_error( "[ERROR] Dijkstra::_search, unknown _mode !!" );
     }
-    for (size_t j = 0; j < nghs.size(); j++) {
+    for (size_t j = 0; j < arcs.size; j++) {
       // generation
-      long u = nghs[j];
-      auto cvec = ngh_costs[j];
+      long u = arcs.Target(j);
+      const double* cvec = arcs.Cost(j);
       auto c = cvec[_cdim];
       if (c < 0){
         // negative edge !! Input graph has ERROR!!
-        std::cout << "[ERROR] v = " << v << " u = " << u << " cost_vec(u,v) = " << cvec << " c = " << c << std::endl;
+        std::cout << "[ERROR] v = " << v << " u = " << u << " c = " << c << std::endl;
         throw std::runtime_error( "[ERROR] Dijkstra::_search, encounter negative edge costs !!" );
         _v2d.clear();
         return -3; // failed
       } // end if
       auto dist_u = curr_pair.first + c;
-      auto cvec_u = _cvec[v] + cvec; // the corresponding cost vector of the path to vd.
+      if ( !(dist_u < _v2d[u]) ){
+        continue;
+      }
+      auto cvec_u = _cvec[v]; // the corresponding cost vector of the path to vd.
+      for (size_t i = 0; i < cvec_u.size(); i++) {
+        cvec_u[i] += cvec[i];
+      }
       if (DEBUG_DIJKSTRA){ std::cout << "[DEBUG] Dijkstra::_search, generate u = " << u << " g = " << dist_u << std::endl; }
 
       // pruning and add open for non-pruned successors
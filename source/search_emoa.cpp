@@ -9,17 +9,17 @@
 #include "debug.hpp"
 #include <set>
 #include <memory>
+#include <algorithm>
 // #include <chrono>
 
 #include <fstream>
+#include "result_io.hpp"
 
 namespace rzq{
 namespace search{
 
 #define NO_FILTER_FRONTIER false // just for experiment
 
-long G_DOM_CHECK_COUNT = 0; // global variable, make impl easier...
-
 std::ostream& operator<<(std::ostream& os, Label& l)
 {
   std::string s;
@@ -51,17 +51,41 @@ void EMOA::SetGraphPtr(basic::PlannerGraph* g) {
   _graph = g;
 };
 
+void EMOA::SetHeuristicCache(HeuristicCache* cache) {
+  _heu_cache = cache;
+};
+
+void EMOA::SetHeuristicThreads(int n_threads) {
+  _heu_threads = n_threads;
+};
+
+void EMOA::SetSolutionTrace(bool trace) {
+  _trace = trace;
+};
+
+void EMOA::SetOpenList(const std::string& kind) {
+  _open_kind = kind;
+};
+
+void EMOA::SetLabelCosts(const std::string& kind) {
+  _label_costs = kind;
+};
+
+void EMOA::SetFrontier(const std::string& kind) {
+  _frontier_kind = kind;
+};
+
+void EMOA::SetSearchBudget(long max_labels, double max_memory_mb) {
+  _max_labels = max_labels;
+  _max_memory_mb = max_memory_mb;
+};
+
 void EMOA::InitHeu(long vd) {
-  SimpleTimer timer;
+  WallTimer timer; // the heuristic may be computed by several threads.
   timer.Start();
-  _dijks.resize(_graph->CostDim());
-  for (size_t i = 0; i<_graph->CostDim(); i++) {
-    _dijks[i].SetGraphPtr(_graph);
-    _dijks[i].ExhaustiveBackwards(vd, std::numeric_limits<double>::infinity(), i) ;
-  }
+  _heu = std::make_shared<HeuristicTable>();
+  InitHeuristicTable(_graph, vd, _heu_cache, _heu.get(), _heu_threads);
   _res.rt_initHeu = timer.GetDurationSecond();
-
-  G_DOM_CHECK_COUNT = 0; // reset dom check counter.
   return ;
 };
 
@@ -73,35 +97,46 @@ int EMOA::Search(long vo, long vd, double time_limit) {
   // _alpha.resize(_graph->NumVertex()); // this requires the graph vertex are numbered from 0 to |V|.
 
   // ### init ###
-  SimpleTimer timer;
+  WallTimer timer; // wall time, like the ScopedTimer of rt_domCheck.
   timer.Start();
   _vo = vo;
   _vd = vd;
   auto zero_vec = InitVecType(_graph->CostDim(), 0.0);
-  Label lo(_GenLabelId(), vo, zero_vec, _Heuristic(_vo));
-  _label[lo.id] = lo;
-  _parent[lo.id] = -1; 
+  _labels.Init(_graph->CostDim(), _label_costs);
+  Label lo(_labels.Add(vo, -1, zero_vec), vo, zero_vec, _Heuristic(_vo));
   _res.n_generated++;
   // _UpdateFrontier(lo);
-  _open.insert( std::make_pair(lo.f, lo.id) );
+  _open = NewOpenList(_open_kind, _graph->CostDim());
+  _open->Push(lo.f, lo.id);
+  _res.num_open_max = 1;
+  long n_popped = 0;
 
   if (DEBUG_EMOA > 0) {
     std::cout << "[DEBUG] Init, lo = " << lo << std::endl;
   }
 
   // ### main search loop ###
-  while ( !_open.empty() ) {
+  while ( !_open->Empty() ) {
 
     // check timeout
     if (timer.GetDurationSecond() > time_limit) {
       std::cout << "[INFO] EMOA::Search timeout !" << std::endl;
       _res.timeout = true;
+      _res.termination = TERMINATION_TIMEOUT;
+      break;
+    }
+
+    // check the label and memory budgets, the memory every SEARCH_MEMORY_CHECK_INTERVAL labels popped.
+    int budget = _CheckBudget(n_popped++ % SEARCH_MEMORY_CHECK_INTERVAL == 0);
+    if (budget != TERMINATION_DONE) {
+      std::cout << "[INFO] EMOA::Search " << (budget == TERMINATION_LABEL_LIMIT ? "label" : "memory")
+                << " limit reached, the front is partial !" << std::endl;
+      _res.termination = budget;
       break;
     }
 
     // ## select label l, lexicographic order ##
-    Label l = _label[ _open.begin()->second ];
-    _open.erase(_open.begin());
+    Label l = _GetLabel( _open->Pop() );
 
     if (DEBUG_EMOA > 0) {
       std::cout << "[DEBUG] ### Pop l = " << l << std::endl;
@@ -116,6 +151,10 @@ int EMOA::Search(long vo, long vd, double time_limit) {
     }
     _UpdateFrontier(l);
     if (l.v == vd) {
+      if (_trace) {
+        _res.trace_times.push_back(timer.GetDurationSecond());
+        _res.trace_costs.push_back(l.g);
+      }
       continue;
     }
     if (DEBUG_EMOA > 1) {
@@ -124,14 +163,15 @@ int EMOA::Search(long vo, long vd, double time_limit) {
 
     // ## expand label l ##
     _res.n_expanded++;
-    auto succs = _graph->GetSuccs(l.v);
-    auto cvecs = _graph->GetSuccCosts(l.v);
-    for (int idx = 0; idx < succs.size(); idx++) {
-      auto u = succs[idx];
-      CostVec gu = l.g + cvecs[idx];
-      Label l2(_GenLabelId(), u, gu, gu + _Heuristic(u));
-      _label[l2.id] = l2;
-      _parent[l2.id] = l.id;
+    basic::ArcSpan arcs = basic::SuccArcs(_graph, l.v, &_arc_buf);
+    for (size_t idx = 0; idx < arcs.size; idx++) {
+      long u = arcs.Target(idx);
+      const double* cu = arcs.Cost(idx);
+      CostVec gu = l.g;
+      for (size_t i = 0; i < gu.size(); i++) {
+        gu[i] += cu[i];
+      }
+      Label l2(-1, u, gu, gu + _Heuristic(u)); // stored (and given an id) only if it enters open.
       if (DEBUG_EMOA > 0) {
         std::cout << "[DEBUG] >>>> Loop v= " << u << " gen l' = " << l2 << std::endl;
       }
@@ -144,16 +184,24 @@ int EMOA::Search(long vo, long vd, double time_limit) {
       if (DEBUG_EMOA > 0) {
         std::cout << "[DEBUG] ----- Add to open..." << std::endl;
       }
+      l2.id = _labels.Add(u, l.id, gu);
       _res.n_generated++;
-      _open.insert( std::make_pair(l2.f, l2.id) );
+      _open->Push(l2.f, l2.id);
     } // end for
+    _res.num_open_max = std::max(_res.num_open_max, long(_open->Size()));
   } // end while
 
   // ### post-process the results ###
   std::cout << "[INFO] EMOA::_PostProcRes..." << std::endl;
   _PostProcRes();
+  std::cout << "[INFO] EMOA::Search, " << _labels.Size() << " labels stored in " << _labels.Bytes() / 1048576.0
+            << " MB (" << _labels.Kind() << " costs)." << std::endl;
 
-  _res.n_domCheck = G_DOM_CHECK_COUNT;
+  _res.n_domCheck = 0;
+  for (auto f : _alpha) {
+    _res.n_domCheck += f->n_check;
+  }
+  _res.num_labels_max = _labels.Size();
   _res.rt_search = timer.GetDurationSecond();
 
   std::cout << "[INFO] EMOA::Search exit." << std::endl;
@@ -164,7 +212,7 @@ int EMOA::Search(long vo, long vd, double time_limit) {
 CostVec EMOA::_Heuristic(long v) {
   auto out = CostVec(_graph->CostDim(), 0);
   for (size_t cdim = 0; cdim < out.size(); cdim++) {
-    out[cdim] = _dijks[cdim].GetDistValue(v);
+    out[cdim] = _heu->Get(cdim, v);
     // out[cdim] = 0;
     if (out[cdim] < 0) {
       throw std::runtime_error( "[ERROR], unavailable heuristic !?" );
@@ -174,43 +222,45 @@ CostVec EMOA::_Heuristic(long v) {
   return out;
 };
 
+int EMOA::_CheckBudget(bool check_memory) {
+  if (_max_labels > 0 && long(_labels.Size()) >= _max_labels) {
+    return TERMINATION_LABEL_LIMIT;
+  }
+  if (_max_memory_mb > 0 && check_memory && (_labels.Bytes() + _open->Bytes() + _frontier_bytes) / 1048576.0 >= _max_memory_mb) {
+    return TERMINATION_MEMORY_LIMIT;
+  }
+  return TERMINATION_DONE;
+};
+
 EMOAResult EMOA::GetResult() const {
   return _res;
 };
 
-long EMOA::_GenLabelId() {
-
-  long out = _label_id_gen++;
-
-  if (_label_id_gen > __vec_alloc_total){
-    __vec_alloc_total += __vec_alloc_batch;
-    _label.resize(__vec_alloc_total);
-    _parent.resize(__vec_alloc_total);
-    if (__vec_alloc_batch < __vec_alloc_batch_max){
-      __vec_alloc_batch += __vec_alloc_batch;
-    }
-  }
-
-  return out;
+Label EMOA::_GetLabel(long id) {
+  long v = _labels.V(id);
+  CostVec g = _labels.G(id);
+  return Label(id, v, g, g + _Heuristic(v));
 };
 
 void EMOA::_PostProcRes() {
   // if (_alpha.find(_vd) != _alpha.end()) {
     for (auto lid : _alpha[_vd]->label_ids) {
       _res.paths[lid] = _BuildPath(lid);
-      _res.costs[lid] = _label[lid].g;
+      _res.costs[lid] = _labels.G(lid);
     }
   // }
   return ;
 };
 
 bool EMOA::_FrontierCheck(Label l) {
+  ScopedTimer timer(&_res.rt_domCheck);
   // if (_alpha.find(l.v) == _alpha.end()) {return false;}
   auto res = _alpha[l.v]->Check(l.g);
   return res;
 };
 
 bool EMOA::_SolutionCheck(Label l) {
+  ScopedTimer timer(&_res.rt_domCheck);
 
   // if (_alpha.find(_vd) == _alpha.end()) {return false;}
   auto temp = _alpha[_vd]->Check(l.f);
@@ -221,8 +271,8 @@ bool EMOA::_SolutionCheck(Label l) {
 std::vector<long> EMOA::_BuildPath(long lid) {
   std::vector<long> out, out2;
   while( lid >= 0 ) {
-    out.push_back(_label[lid].v);
-    lid = _parent[lid];
+    out.push_back(_labels.V(lid));
+    lid = _labels.Parent(lid);
   }
   for (size_t i = 0; i < out.size(); i++) {
     out2.push_back(out[out.size()-1-i]);
@@ -242,7 +292,11 @@ std::vector<long> EMOA::_BuildPath(long lid) {
 void EMOA::_InitFrontiers() {
   _alpha.resize(_graph->NumVertex()); // this requires the graph vertex are numbered from 0 to |V|.
   for (int idx = 0; idx < _alpha.size(); idx++){
-    _alpha[idx] = new Frontier;
+    _alpha[idx] = NewFrontier(_frontier_kind);
+  }
+  _frontier_bytes = _alpha.capacity() * sizeof(ParetoFrontier*);
+  for (auto f : _alpha) {
+    _frontier_bytes += f->Bytes();
   }
   return;
 };
@@ -259,7 +313,12 @@ void EMOA::_UpdateFrontier(Label l) {
 
   // Frontier3d *ptr = dynamic_cast<Frontier3d *>(_alpha[l.v]);
   // ptr->Update(l);
-  _alpha[l.v]->Update(l);
+  {
+    ScopedTimer timer(&_res.rt_domCheck);
+    size_t bytes = _alpha[l.v]->Bytes();
+    _alpha[l.v]->Update(l.g, l.id);
+    _frontier_bytes = _frontier_bytes - bytes + _alpha[l.v]->Bytes();
+  }
 
   // debug info below
   if (DEBUG_EMOA > 0) {
@@ -277,152 +336,6 @@ void EMOA::_UpdateFrontier(Label l) {
 };
 
 
-//################################################
-// TOA* related //
-//################################################
-
-// EMOATree::EMOATree() {
-  
-// };
-
-// EMOATree::~EMOATree() {
-  
-// };
-
-void Frontier::Filter(CostVec v) {
-  int outFlag = 0;
-  std::unordered_set<long> filtered_node;
-  _root = _filter(_root, v, &filtered_node);
-  if (filtered_node.size()>0) {
-    _rebuildTree(&filtered_node);
-  }
-  return;
-};
-
-basic::AVLNode* Frontier::_filter(
-  basic::AVLNode* n, const CostVec& k, std::unordered_set<long> *filtered_node)
-{
-  if (n == NULL) {return n;}
-  if ( _key[n->id] < k ) { // only need to look at the right sub-tree.
-    n->right = _filter(n->right, k, filtered_node); 
-  }else{
-    n->left = _filter(n->left, k, filtered_node);
-    n->right = _filter(n->right, k, filtered_node);
-  }
-  // no return above, will reach here if n != NULL.
-  if (EpsDom(k, _key[n->id])) {
-    if (filtered_node) {
-      filtered_node->insert(n->id);
-    }
-  }
-  return n;
-};
-
-void Frontier::_rebuildTree(std::unordered_set<long> *skip_node) {
-  std::vector<long> tree_node_ids;
-  size_t current_size = _size;
-  ToSortedVector(NULL, &tree_node_ids, skip_node);
-
-  _size = 0;
-  basic::AVLNode* new_root = _rebuildTreeMethod(tree_node_ids, 0, tree_node_ids.size()-1);
-  _deleteAll(_root);
-  _root = new_root;
-
-  return ;
-};
-
-basic::AVLNode* Frontier::_rebuildTreeMethod(std::vector<long> &tree_node_ids, long start, long end) {
-  if (start > end) {
-    return NULL;
-  }
-  long mid = (start+end)/2;
-  basic::AVLNode* n = basic::NewAVLNode(tree_node_ids[mid]) ;
-  _size++;
-  n->left  = _rebuildTreeMethod(tree_node_ids, start, mid-1);
-  n->right = _rebuildTreeMethod(tree_node_ids, mid+1, end);
-  n->h = 1 + basic::Max(basic::H(n->left), basic::H(n->right));
-  if (DEBUG_AVLTREE) {_verifyTree(n);}
-  return n;
-};
-
-void Frontier::_verifyNonDom(std::vector<long>& tree_node_ids){
-  for (size_t i = 0; i < tree_node_ids.size(); i++) {
-    for (size_t j = i+1; j < tree_node_ids.size(); j++) {
-      if (EpsDom(_key[tree_node_ids[i]], _key[tree_node_ids[j]]) || 
-          EpsDom(_key[tree_node_ids[j]], _key[tree_node_ids[i]]) )
-      {
-        std::cout << " vec1 = " << _key[tree_node_ids[i]] << " vec2 = " << _key[tree_node_ids[j]] << std::endl;
-        throw std::runtime_error("[ERROR] Frontier::_verifyNonDom fails.");
-      }
-    }
-  }
-  return;
-};
-
-
-// bool Frontier::Check2(CostVec v) {
-//   return _check(_root, v);
-// };
-
-bool Frontier::_check(basic::AVLNode* n, const CostVec& k) {
-  if (n == NULL) {return false;}
-
-  if (EpsDom(_key[n->id], k)) {
-    return true;
-  }
-
-  if (_key[n->id] > k) {
-    return _check(n->left, k);
-  }else{
-    if (_check(n->left, k)) {return true;}
-    return _check(n->right, k);
-  }
-};
-
-
-///////////////////////////////////////////////////
-
-Frontier::Frontier() {
-  return;
-};
-
-Frontier::~Frontier() {
-  return;
-};
-
-bool Frontier::Check(CostVec g) {
-  auto pg = g;
-  pg = _p(g);
-  // std::cout << " FrontierKd::Check pg = " << pg << std::endl;
-  // auto temp = Check2(pg);
-  return _check(_root, pg);
-  // return temp;
-};
-
-void Frontier::Update(Label l) {
-  auto pg = _p(l.g);
-  if (this->Size() == 0){
-    Add( pg );
-    label_ids.push_back(l.id);
-    return;
-  }
-  // non-empty tree.
-
-  label_ids.push_back(l.id);
-  Filter(pg);
-  Add(pg); // add at first
-
-  return;
-};
-
-CostVec Frontier::_p(CostVec v) {
-  CostVec out;
-  for (size_t i = 1; i < v.size(); i++){
-    out.push_back(v[i]);
-  }
-  return out;
-};
-
 //////////////////////////////////////////////////
 
 /**
@@ -472,7 +385,9 @@ void GraphExpandCostDim(rzq::basic::SparseGraph* g, bool add_deg_cost, bool add_
   }
 };
 
-int RunEMOA(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rzq::search::EMOAResult* res)
+int RunEMOA(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rzq::search::EMOAResult* res,
+            HeuristicCache* heu_cache, int heu_threads, bool trace, const std::string& open_list,
+            const std::string& label_costs, const std::string& frontier, long max_labels, double max_memory_mb)
 {
   size_t cdim = g->CostDim();
   std::cout << "[INFO] RunEMOA, M=" << cdim << " time_limit = " << time_limit << std::endl;
@@ -481,6 +396,13 @@ int RunEMOA(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rz
   // The following if-else is actually minor. Just use EMOAKd for all cases is totally fine...
   auto planner = rzq::search::EMOA();
   planner.SetGraphPtr(g) ; // set graph to the planner
+  planner.SetHeuristicCache(heu_cache);
+  planner.SetHeuristicThreads(heu_threads);
+  planner.SetSolutionTrace(trace);
+  planner.SetOpenList(open_list);
+  planner.SetLabelCosts(label_costs);
+  planner.SetFrontier(frontier);
+  planner.SetSearchBudget(max_labels, max_memory_mb);
   planner.InitHeu(vd); // this vd must be the same as the vd in Search().
   ret_flag = planner.Search(vo, vd, time_limit) ;
   *res = planner.GetResult(); // get result
@@ -494,6 +416,10 @@ int RunEMOA(rzq::basic::PlannerGraph* g, long vo, long vd, double time_limit, rz
 
 
 int SaveEMOAResult(std::string fname, const search::EMOAResult& res) {
+  if (IsBinaryResultFile(fname)) {
+    return SaveBinaryResult(fname, res);
+  }
+
   std::ofstream fout;
 
   fout.open(fname);
@@ -511,6 +437,10 @@ int SaveEMOAResult(std::string fname, const search::EMOAResult& res) {
   fout << "timeout: " << res.timeout << std::endl;
   fout << "num_nondom_labels_max: " << res.num_nondom_labels_max << std::endl;
   fout << "num_nondom_labels_avg: " << res.num_nondom_labels_avg << std::endl;
+  fout << "rt_domCheck: " << res.rt_domCheck << std::endl;
+  fout << "termination: " << res.termination << std::endl;
+  fout << "num_labels_max: " << res.num_labels_max << std::endl;
+  fout << "num_open_max: " << res.num_open_max << std::endl;
   fout << "N: " << res.costs.size() << std::endl;
 
   int index = 0;
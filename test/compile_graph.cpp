@@ -0,0 +1,59 @@
+/*******************************************
+ * About: Compile M DIMACS cost files into one binary graph file (CSR layout),
+ *        which run_emoa / run_boalex then memory-map instead of parsing.
+ * Author: Denis Derkach
+ *******************************************/
+
+#include "graph_io.hpp"
+#include "debug.hpp"
+#include <iostream>
+#include <string>
+
+void print_help_message();
+
+int main( int argc, char *argv[] ) {
+
+  // help
+  if (argc < 2) {
+      print_help_message();
+      return 0;
+  }
+  std::string arg1 = argv[1];
+  if (arg1 == "-h" || arg1 == "--help") {
+    print_help_message();
+    return 0;
+  }
+
+  int M = std::stoi(argv[1]);
+  int expected_args = M + 3;
+  if (argc != expected_args) {
+    std::cout << "M=" << M << ", expected M+3 (" << expected_args << ") arguments, received " << argc << std::endl;
+    return -1;
+  }
+
+  std::string output_fname = argv[argc - 1];
+  std::vector<std::string> input_fnames;
+  for (int i = 0; i < M; i++) {
+    input_fnames.push_back(argv[i + 2]);
+  }
+
+  rzq::basic::SimpleTimer timer;
+  timer.Start();
+
+  rzq::basic::SparseGraph g;
+  if (rzq::basic::LoadSparseGraphDIMAC(input_fnames, &g) < 0) {
+    std::cout << "Error: ReadRoadmapFromFile()" << std::endl;
+    return -1;
+  }
+  if (rzq::basic::SaveCSRGraph(output_fname, &g) < 0) {
+    return -1;
+  }
+
+  std::cout << "[INFO] compile graph takes " << timer.GetDurationSecond() << " seconds." << std::endl;
+  return 0;
+};
+
+void print_help_message () {
+  std::cout << "[INFO] This program should be called as follows using a command line terminal." << std::endl;
+  std::cout << "    ./compile_graph (arg1 M) (arg2 graph1_path) ... ((arg(M+1) graphM_path)) (arg(M+2) output_path.csr)" << std::endl;
+}
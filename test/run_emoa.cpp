@@ -6,14 +6,25 @@
 
 #include "graph_io.hpp"
 #include "search_emoa.hpp"
+#include "result_io.hpp"
 #include "debug.hpp"
 #include <iostream>
+#include <memory>
+#include <sstream>
 #include <string>
 
 void print_help_message();
 
+int run_server(int argc, char *argv[], const rzq::search::SearchOptions& opt);
+
 int main( int argc, char *argv[] ) {
 
+  // options ("--name value") may be given anywhere, they are removed from argv.
+  rzq::search::SearchOptions opt;
+  if (rzq::search::ParseSearchOptions(&argc, argv, &opt) < 0) {
+    return -1;
+  }
+
   // help
   if (argc < 2) {
       print_help_message();
@@ -25,6 +36,9 @@ int main( int argc, char *argv[] ) {
       print_help_message();
       return 0;
     }
+    if (arg1 == "--server") {
+      return run_server(argc, argv, opt);
+    }
   }
 
   // get args
@@ -37,16 +51,18 @@ int main( int argc, char *argv[] ) {
   double time_limit = std::stod(argv[3]);
   int M = std::stoi(argv[4]);
 
-  int expected_args = M + 6;
+  // a binary graph file (.csr) holds all M costs, otherwise M DIMACS files are expected.
+  int n_files = (argc > 5 && rzq::basic::IsCSRGraphFile(argv[5])) ? 1 : M;
+  int expected_args = n_files + 6;
   if (argc != expected_args) {
-    std::cout << "M=" << M << ", expected M+6 (" << expected_args << ") arguments, received " << argc << std::endl;
+    std::cout << "M=" << M << ", expected " << expected_args << " arguments, received " << argc << std::endl;
     return -1;
   }
 
   // get filenames
   std::string result_fname = argv[argc - 1];
   std::vector<std::string> input_fnames;
-  for (int i = 0; i < M; i++) {
+  for (int i = 0; i < n_files; i++) {
     input_fnames.push_back(argv[i + 5]);
   }
 
@@ -55,32 +71,126 @@ int main( int argc, char *argv[] ) {
   rzq::basic::SimpleTimer timer;
   timer.Start();
 
-  rzq::basic::SparseGraph g;
+  std::unique_ptr<rzq::basic::PlannerGraph> g;
   {
-    int status = rzq::basic::LoadSparseGraphDIMAC(input_fnames, &g);
+    int status = rzq::basic::LoadPlannerGraph(input_fnames, &g, opt.csr_graph);
     if (status < 0) {
       // if return value is less than 0, then error
       std::cout << "Error: ReadRoadmapFromFile()" << std::endl;
       return -1;
     }
+    if (g->CostDim() != M) {
+      std::cout << "M=" << M << ", but the graph has " << g->CostDim() << " costs" << std::endl;
+      return -1;
+    }
   }
 
   double load_graph_time = timer.GetDurationSecond();
   std::cout << "[INFO] load graph takes " << load_graph_time << " seconds." << std::endl;
 
   // do some print and verification to make sure the generated graph is correct.
-  std::cout << "num_nodes: " << g.NumVertex() << std::endl;
-  std::cout << "num_edges: " << g.NumEdge() << std::endl;
-  std::cout << "cdims: " << g.CostDim() << std::endl;
+  std::cout << "num_nodes: " << g->NumVertex() << std::endl;
+  std::cout << "num_edges: " << g->NumEdge() << std::endl;
+  std::cout << "cdims: " << g->CostDim() << std::endl;
 
   // ######################################### //
   // ####### Test 2 - run planner ######### //
   // ######################################### //
 
+  std::unique_ptr<rzq::search::HeuristicCache> heu_cache;
+  if (!opt.heu_cache_dir.empty()) {
+    heu_cache.reset(new rzq::search::HeuristicCache(opt.heu_cache_dir, size_t(opt.heu_cache_mb * 1024 * 1024)));
+  }
+
   rzq::search::EMOAResult res;
-  rzq::search::RunEMOA(&g, vo, vd, time_limit, &res);
+  rzq::search::RunEMOA(g.get(), vo, vd, time_limit, &res, heu_cache.get(), opt.heu_threads, opt.trace,
+      opt.open_list, opt.label_costs,
+      opt.frontier.empty() ? EMOA_FRONTIER_DEFAULT : opt.frontier, opt.max_labels, opt.max_memory_mb);
 
   rzq::search::SaveEMOAResult(result_fname, res);
+  if (opt.trace) {
+    rzq::search::SaveSolutionTrace(result_fname + TRACE_FILE_SUFFIX, res);
+  }
+
+  return 1;
+};
+
+int run_server(int argc, char *argv[], const rzq::search::SearchOptions& opt) {
+
+  if (argc < 4) {
+    print_help_message();
+    return -1;
+  }
+  int M = std::stoi(argv[2]);
+  int n_files = rzq::basic::IsCSRGraphFile(argv[3]) ? 1 : M;
+  int expected_args = n_files + 4;
+  if (argc != expected_args) {
+    std::cout << "M=" << M << ", expected " << expected_args << " arguments in server mode, received " << argc << std::endl;
+    return -1;
+  }
+
+  std::string default_result_fname = argv[argc - 1];
+  std::vector<std::string> input_fnames;
+  for (int i = 0; i < n_files; i++) {
+    input_fnames.push_back(argv[i + 3]);
+  }
+
+  // the graph is loaded only once and shared by all queries.
+  rzq::basic::SimpleTimer timer;
+  timer.Start();
+
+  std::unique_ptr<rzq::basic::PlannerGraph> g;
+  {
+    int status = rzq::basic::LoadPlannerGraph(input_fnames, &g, opt.csr_graph);
+    if (status < 0) {
+      std::cout << "Error: ReadRoadmapFromFile()" << std::endl;
+      return -1;
+    }
+    if (g->CostDim() != M) {
+      std::cout << "M=" << M << ", but the graph has " << g->CostDim() << " costs" << std::endl;
+      return -1;
+    }
+  }
+
+  std::cout << "[INFO] load graph takes " << timer.GetDurationSecond() << " seconds." << std::endl;
+  std::cout << "READY " << g->NumVertex() << " " << g->CostDim() << std::endl;
+
+  // heuristic tables of recurring goals are reused across queries and processes.
+  std::unique_ptr<rzq::search::HeuristicCache> heu_cache;
+  if (!opt.heu_cache_dir.empty()) {
+    heu_cache.reset(new rzq::search::HeuristicCache(opt.heu_cache_dir, size_t(opt.heu_cache_mb * 1024 * 1024)));
+  }
+
+  // one query per line: v_start v_dest time_limit [result_path]
+  std::string line;
+  while (std::getline(std::cin, line)) {
+    if (line.empty() || line == "quit") {
+      break;
+    }
+    std::istringstream query(line);
+    long vo, vd;
+    double time_limit;
+    std::string result_fname;
+    if (!(query >> vo >> vd >> time_limit)) {
+      std::cout << "ERROR bad query: " << line << std::endl;
+      continue;
+    }
+    if (!(query >> result_fname)) {
+      result_fname = default_result_fname;
+    }
+
+    rzq::search::EMOAResult res;
+    rzq::search::RunEMOA(g.get(), vo, vd, time_limit, &res, heu_cache.get(), opt.heu_threads, opt.trace,
+      opt.open_list, opt.label_costs,
+      opt.frontier.empty() ? EMOA_FRONTIER_DEFAULT : opt.frontier, opt.max_labels, opt.max_memory_mb);
+    rzq::search::SaveEMOAResult(result_fname, res);
+    if (opt.trace) {
+      rzq::search::SaveSolutionTrace(result_fname + TRACE_FILE_SUFFIX, res);
+    }
+
+    // one record per query, tells the client that the result file is complete.
+    std::cout << "RESULT " << vo << " " << vd << " " << result_fname << std::endl;
+  }
 
   return 1;
 };
@@ -88,4 +198,19 @@ int main( int argc, char *argv[] ) {
 void print_help_message () {
   std::cout << "[INFO] This program should be called as follows using a command line terminal." << std::endl;
   std::cout << "    ./run_emoa (arg1 v_start) (arg2 v_dest) (arg3 time_limit) (arg4 M) (arg5 graph1_path) (arg6 graph2_path) ... ((arg(M+4) graphM_path)) (arg(M+5) result_path)" << std::endl;
+  std::cout << "[INFO] Instead of M DIMACS files, a single binary graph file (.csr, see compile_graph) can be given." << std::endl;
+  std::cout << "[INFO] A result_path ending with .bin is written in the binary result format (see include/result_io.hpp)." << std::endl;
+  std::cout << "[INFO] Server mode, loads the graph once and answers queries \"v_start v_dest time_limit [result_path]\" read line by line from stdin:" << std::endl;
+  std::cout << "    ./run_emoa --server (arg2 M) (arg3 graph1_path) ... ((arg(M+2) graphM_path)) (arg(M+3) default_result_path)" << std::endl;
+  std::cout << "[INFO] Options, may be added anywhere:" << std::endl;
+  std::cout << "    --heu_cache DIR      reuse heuristic tables of (graph, v_dest) stored in DIR, add new ones to it" << std::endl;
+  std::cout << "    --heu_cache_mb N     size limit of the heuristic cache, least recently used tables are removed (default 4096)" << std::endl;
+  std::cout << "    --heu_threads N      compute the heuristic of the M objectives on N threads (default 1)" << std::endl;
+  std::cout << "    --trace 1            write the time and cost of each solution as it is found to result_path.trace" << std::endl;
+  std::cout << "    --graph csr          keep DIMACS graphs in CSR layout, the search reads the arcs without copies (default sparse)" << std::endl;
+  std::cout << "    --open_list KIND     open list of the search: set, heap (default) or bucket (integer costs only)" << std::endl;
+  std::cout << "    --label_costs KIND   store the label costs as int (default), float or double, exact in all cases" << std::endl;
+  std::cout << "    --frontier KIND      frontier data structure: avl (default), lex, flat or ndtree" << std::endl;
+  std::cout << "    --max_labels N       stop the search once it has stored N labels, the result holds the front found so far (default 0, no limit)" << std::endl;
+  std::cout << "    --max_memory_mb N    stop the search once its labels, open list and frontiers take N MB, as above (default 0, no limit)" << std::endl;
 }